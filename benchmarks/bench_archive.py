@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+  bench_archive.py
+  ----------------
+
+  Compare a per-message JSON lines archive callback with ArchiveWriter Parquet segments on a quote-heavy
+  message stream: time spent in the callback or tap, total time to a finished archive, bytes on disk and
+  time to load the archive back.  Requires pyarrow.
+
+  usage: python benchmarks/bench_archive.py [message_count]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_output import messages
+
+import pyarrow.parquet as pq
+
+from txtrader_monitor.archive import ArchiveWriter, DEFAULT_ARCHIVE_CHANNELS
+
+
+class Controller(object):
+
+    def _pause(self, source):
+        pass
+
+    def _resume(self, source):
+        pass
+
+
+def disk_usage(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, dirs, files in os.walk(path) for f in files)
+
+
+def bench_lines(stream, directory):
+    path = os.path.join(directory, 'archive.jsonl')
+    start = time.perf_counter()
+    with open(path, 'w') as f:
+        for channel, data in stream:
+            if channel in DEFAULT_ARCHIVE_CHANNELS:
+                f.write(json.dumps({'time': time.time(), 'channel': channel, 'data': data}) + '\n')
+                f.flush()
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    load = time.perf_counter() - start
+    return elapsed, elapsed, disk_usage(path), load, len(rows)
+
+
+def bench_archive(stream, directory):
+    path = os.path.join(directory, 'archive')
+    archiver = ArchiveWriter(Controller(), path)
+    tap = archiver.tap
+    start = time.perf_counter()
+    for channel, data in stream:
+        if channel in DEFAULT_ARCHIVE_CHANNELS:
+            tap(channel, data)
+    tapped = time.perf_counter() - start
+    archiver.close()
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    rows = sum(pq.read_table(os.path.join(path, channel)).num_rows for channel in os.listdir(path))
+    load = time.perf_counter() - start
+    return tapped, elapsed, disk_usage(path), load, rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    stream = messages(count)
+    for label, function in (('json lines', bench_lines), ('parquet', bench_archive)):
+        with tempfile.TemporaryDirectory() as directory:
+            tapped, elapsed, size, load, rows = function(stream, directory)
+        print(
+            f'{label:>12}: {rows} rows  callback {tapped:6.2f}s  total {elapsed:6.2f}s  '
+            f'{size / 1e6:8.2f} MB  load {load:6.3f}s'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+  bench_dispatch.py
+  -----------------
+
+  Compare the original linear channel_map scan with ChannelDispatcher on a quote-heavy message stream.
+
+  usage: python benchmarks/bench_dispatch.py [message_count]
+"""
+
+import sys
+import time
+import random
+
+from txtrader_monitor.dispatch import ChannelDispatcher, MESSAGE_TYPES
+
+CHANNEL = 'a1b2c3'
+SYMBOLS = ['AAPL', 'MSFT', 'IBM', 'SPY', 'QQQ', 'TSLA', 'AMZN', 'GOOG']
+
+
+def quote_stream(count):
+    """synthesize a stream of 80% quotes, 15% trades and 5% order/execution/time messages"""
+    rnd = random.Random(0)
+    other = [
+        f'{CHANNEL}.time: 2020-08-17 10:59:45',
+        f'{CHANNEL}.order.9b94c305-b9-001a Completed',
+        f'{CHANNEL}.execution-data {{"ORDER_ID": "9b94c305-b9-001a-3", "VOLUME": 75}}',
+        f'{CHANNEL}.current-account REALTICKDEMO.REALTICK.DEMO31.TRADING',
+    ]
+    ret = []
+    for i in range(count):
+        r = rnd.random()
+        symbol = rnd.choice(SYMBOLS)
+        if r < 0.80:
+            ret.append(f'{CHANNEL}.quote.{symbol}:125.07 100 125.09 200')
+        elif r < 0.95:
+            ret.append(f'{CHANNEL}.trade.{symbol}:125.08 75 1000000')
+        else:
+            ret.append(rnd.choice(other))
+    return ret
+
+
+def linear_route(channel_map, data):
+    for prefix, callback_channel in channel_map.items():
+        if data.startswith(prefix):
+            return callback_channel, len(prefix)
+    return None, 0
+
+
+def bench(label, route, stream):
+    start = time.perf_counter()
+    for data in stream:
+        callback_channel, offset = route(data)
+        data[offset:]
+    elapsed = time.perf_counter() - start
+    print(f'{label:>12}: {len(stream)/elapsed:12,.0f} msgs/sec')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    stream = quote_stream(count)
+    channel_map = {f'{CHANNEL}.{key}': value for key, value in MESSAGE_TYPES.items()}
+    dispatcher = ChannelDispatcher(CHANNEL)
+    for data in stream:
+        assert linear_route(channel_map, data) == dispatcher.route(data), data
+    bench('linear scan', lambda data: linear_route(channel_map, data), stream)
+    bench('dispatcher', dispatcher.route, stream)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+  bench_logging.py
+  ----------------
+
+  Measure receive throughput at WARNING level with the previous eager f-string RX logging
+  against the current lazy logging, for small quotes and large order snapshots.
+
+  usage: python benchmarks/bench_logging.py [message_count]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_dispatch import quote_stream, CHANNEL
+
+
+class EagerStatusClient(StatusClient):
+    """StatusClient formatting every received message into a debug log string, as before lazy logging"""
+
+    def stringReceived(self, data):
+        logging.debug(f"RX: {data.decode()}")
+        return StatusClient.stringReceived(self, data)
+
+
+def snapshot(size):
+    orders = {f'{i:08d}': {'permid': f'{i:08d}', 'symbol': 'IBM', 'note': 'x' * 200} for i in range(size)}
+    return f'{CHANNEL}.orders: {json.dumps(orders)}'.encode()
+
+
+def feed(client_class, messages):
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    client = client_class(m)
+    client.makeConnection(StringTransport())
+    client.stringReceived(f'.Authorized {CHANNEL}'.encode())
+    start = time.perf_counter()
+    for data in messages:
+        client.stringReceived(data)
+    elapsed = time.perf_counter() - start
+    return len(messages) / elapsed, sum(len(data) for data in messages) / elapsed
+
+
+def compare(label, messages):
+    # alternate runs to even out warmup and frequency scaling
+    eager = max(feed(EagerStatusClient, messages), feed(EagerStatusClient, messages))
+    lazy = max(feed(StatusClient, messages), feed(StatusClient, messages))
+    print(f'{label}:')
+    print(f'   eager: {eager[0]:12,.0f} msgs/sec {eager[1] / 1e6:10,.1f} MB/sec')
+    print(f'    lazy: {lazy[0]:12,.0f} msgs/sec {lazy[1] / 1e6:10,.1f} MB/sec')
+    print(f'   saved: {(1 - eager[0] / lazy[0]) * 100:6.1f} % of receive time')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    logging.getLogger().setLevel(logging.WARNING)
+    compare('quotes', [data.encode() for data in quote_stream(count)])
+    compare('4MB order snapshots', [snapshot(16000)] * 20)
+
+
+if __name__ == '__main__':
+    main()
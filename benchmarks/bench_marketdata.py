@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+  bench_marketdata.py
+  -------------------
+
+  Compare MarketData NumPy columns with a list of per-tick dicts: ingest rate, bytes per tick
+  and the time to compute 1 minute OHLCV bars.
+
+  usage: python benchmarks/bench_marketdata.py [message_count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+from txtrader_monitor.marketdata import MarketData
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_dispatch import quote_stream, CHANNEL
+
+
+def payloads(count):
+    prefix = len(CHANNEL) + 1
+    ret = []
+    for data in quote_stream(count):
+        channel = data[prefix:prefix + 6]
+        if channel in ('quote.', 'trade.'):
+            ret.append((channel[:5].upper(), data[prefix + 6:]))
+    return ret
+
+
+def dict_tap(ticks):
+
+    def _tap(channel, data):
+        symbol, dummy, fields = data.partition(':')
+        fields = fields.split()
+        if channel == 'QUOTE':
+            ticks.append({
+                'symbol': symbol,
+                'time': time.time(),
+                'bid': float(fields[0]),
+                'bid_size': int(fields[1]),
+                'ask': float(fields[2]),
+                'ask_size': int(fields[3])
+            })
+        else:
+            ticks.append({'symbol': symbol, 'time': time.time(), 'last': float(fields[0]), 'size': int(fields[1])})
+
+    return _tap
+
+
+def measure(label, tap, messages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for channel, data in messages:
+        tap(channel, data)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'{label:>8}: {len(messages) / elapsed:12,.0f} ticks/sec {size / len(messages):8.1f} bytes/tick')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    messages = payloads(count)
+    ticks = []
+    measure('dicts', dict_tap(ticks), messages)
+    md = MarketData()
+    measure('numpy', md.tap, messages)
+    start = time.perf_counter()
+    for symbol in md.symbols:
+        md.bars(symbol, 60)
+        md.vwap(symbol)
+    print(f'    bars: {(time.perf_counter() - start) * 1000:8.1f} ms for {len(md.symbols)} symbols')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+  bench_metrics.py
+  ----------------
+
+  Measure the overhead of Monitor.enable_metrics() on the receive and dispatch path, feeding netstring
+  framed messages through dataReceived() in socket sized reads.
+
+  usage: python benchmarks/bench_metrics.py [message_count] [rounds]
+"""
+
+import os
+import sys
+import time
+
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_dispatch import quote_stream, CHANNEL
+
+READ_SIZE = 0x10000
+
+
+def feed(metrics, chunks, count):
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    if metrics:
+        m.enable_metrics()
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    authorized = f'.Authorized {CHANNEL}'.encode()
+    client.dataReceived(b'%d:%s,' % (len(authorized), authorized))
+    start = time.perf_counter()
+    for chunk in chunks:
+        client.dataReceived(chunk)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    stream = b''.join(b'%d:%s,' % (len(data), data) for data in (d.encode() for d in quote_stream(count)))
+    chunks = [stream[i:i + READ_SIZE] for i in range(0, len(stream), READ_SIZE)]
+    # alternate runs to even out warmup and frequency scaling; report the best of each
+    base = instrumented = 0
+    for i in range(rounds):
+        base = max(base, feed(False, chunks, count))
+        instrumented = max(instrumented, feed(True, chunks, count))
+    print(f'   no metrics: {base:12,.0f} msgs/sec')
+    print(f' with metrics: {instrumented:12,.0f} msgs/sec')
+    print(f'     overhead: {(base / instrumented - 1) * 100:6.1f} %')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+  bench_monitor.py
+  ----------------
+
+  Run Monitor against a local txtrader_fakeserver under each load profile and report
+  messages/sec, p50/p99 server-to-callback latency and peak RSS.
+
+  The fake server runs in a subprocess; each profile runs the Monitor in a fresh subprocess
+  because the Twisted reactor can only be started once per process.
+
+  usage: python benchmarks/bench_monitor.py [profile ...] [--duration SECONDS]
+"""
+
+import sys
+import time
+import json
+import socket
+import resource
+import argparse
+import subprocess
+
+PROFILES = {
+    'quotes': {
+        'quote_rate': 50000
+    },
+    'quotes+trades': {
+        'quote_rate': 40000,
+        'trade_rate': 10000
+    },
+    'mixed': {
+        'quote_rate': 20000,
+        'trade_rate': 5000,
+        'order_rate': 500,
+        'execution_rate': 500
+    },
+    'executions-large': {
+        'execution_rate': 5000,
+        'payload_size': 4096
+    },
+}
+
+OPTIONS = {'order-notification': 1, 'order-data': 1, 'execution-notification': 1, 'execution-data': 1}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def child(port, duration):
+    from twisted.internet import reactor
+    from txtrader_monitor import Monitor
+
+    counts = {}
+    latencies = []
+    state = {}
+
+    def _count(channel, data):
+        counts[channel] = counts.get(channel, 0) + 1
+        return True
+
+    def _timestamped(channel, data):
+        counts[channel] = counts.get(channel, 0) + 1
+        latencies.append(time.time() - float(data[data.rindex(' ') + 1:]))
+        return True
+
+    def _status(channel, data):
+        if data.startswith('.Authorized'):
+            state['start'] = time.perf_counter()
+            reactor.callLater(duration, m.shutdown, 'benchmark complete')
+        return True
+
+    m = Monitor(
+        host='127.0.0.1',
+        port=port,
+        options=OPTIONS,
+        callbacks={
+            '*': _count,
+            'STATUS': _status,
+            'QUOTE': _timestamped,
+            'TRADE': _timestamped
+        }
+    )
+    m.run()
+    elapsed = time.perf_counter() - state['start']
+    total = sum(counts.values())
+    print(
+        json.dumps({
+            'messages': total,
+            'rate': total / elapsed,
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    )
+
+
+def run_profile(name, profile, duration):
+    port = free_port()
+    args = [sys.executable, '-m', 'txtrader_monitor.fakeserver', '--port', str(port)]
+    for key, value in profile.items():
+        args += ['--' + key.replace('_', '-'), str(value)]
+    server = subprocess.Popen(args)
+    try:
+        time.sleep(1)
+        out = subprocess.run([sys.executable, __file__, '--child',
+                              str(port), '--duration',
+                              str(duration)],
+                             check=True,
+                             capture_output=True,
+                             text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+    print(
+        f"{name:>18}: {result['rate']:10,.0f} msgs/sec  p50 {result['p50']:8.2f} ms  p99 {result['p99']:8.2f} ms  "
+        f"peak RSS {result['rss']:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('profiles', nargs='*', default=list(PROFILES))
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--child', type=int)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.duration)
+    for name in args.profiles:
+        run_profile(name, PROFILES[name], args.duration)
+
+
+if __name__ == '__main__':
+    main()
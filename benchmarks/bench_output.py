@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+  bench_output.py
+  ---------------
+
+  Compare the default print() callback with OutputWriter in each format, writing a quote-heavy message
+  stream to /dev/null.
+
+  usage: python benchmarks/bench_output.py [message_count]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_dispatch import quote_stream, CHANNEL
+
+from txtrader_monitor.dispatch import ChannelDispatcher
+from txtrader_monitor.output import OutputWriter
+
+
+def messages(count):
+    """return (channel, payload) pairs of quote_stream() routed as the monitor does"""
+    dispatcher = ChannelDispatcher(CHANNEL)
+    ret = []
+    for data in quote_stream(count):
+        channel, offset = dispatcher.route(data)
+        if channel:
+            ret.append((channel.name, data[offset:]))
+    return ret
+
+
+def cb_print(channel, msg):
+    print(f'{channel}: {msg}')
+    return True
+
+
+def bench(label, function, stream, close=None):
+    start = time.perf_counter()
+    for channel, data in stream:
+        function(channel, data)
+    if close:
+        close()
+    sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    return f'{label:>14}: {len(stream)/elapsed:12,.0f} lines/sec'
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    stream = messages(count)
+    results = []
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            results.append(bench('print', cb_print, stream))
+            for format in ('text', 'ndjson', 'csv'):
+                writer = OutputWriter(devnull, format)
+                results.append(bench(f'writer {format}', writer.write, stream, writer.close))
+        finally:
+            sys.stdout = stdout
+    for line in results:
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
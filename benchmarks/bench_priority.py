@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+  bench_priority.py
+  -----------------
+
+  Measure EXECUTION notification latency under a quote load, with arrival order dispatch and with
+  Monitor.set_priority().  The QUOTE callback busy-waits to simulate per-quote work, so each burst of
+  quotes from the fake server keeps the reactor busy for most of its 10ms tick.
+
+  usage: python benchmarks/bench_priority.py [--duration SECONDS] [--quote-rate N] [--work SECONDS]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_monitor import free_port, percentile
+
+
+def child(port, duration, work, priority):
+    from twisted.internet import reactor
+    from txtrader_monitor import Monitor
+
+    latencies = []
+    quotes = [0]
+
+    def _quote(channel, data):
+        quotes[0] += 1
+        end = time.perf_counter() + work
+        while time.perf_counter() < end:
+            pass
+        return True
+
+    def _execution(channel, data):
+        latencies.append(time.time() - float(data[data.rindex(' ') + 1:]))
+        return True
+
+    def _status(channel, data):
+        if data.startswith('.Authorized'):
+            reactor.callLater(duration, m.shutdown, 'benchmark complete')
+        return True
+
+    m = Monitor(
+        host='127.0.0.1',
+        port=port,
+        options={'execution-notification': 1},
+        callbacks={
+            '*': None,
+            'STATUS': _status,
+            'QUOTE': _quote,
+            'EXECUTION': _execution
+        }
+    )
+    if priority:
+        m.set_priority()
+    m.run()
+    print(
+        json.dumps({
+            'executions': len(latencies),
+            'quotes': quotes[0],
+            'p50': percentile(latencies, 50) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies, default=0) * 1000,
+        })
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--quote-rate', type=int, default=20000)
+    parser.add_argument('--execution-rate', type=int, default=200)
+    parser.add_argument('--work', type=float, default=40e-6)
+    parser.add_argument('--child', type=int)
+    parser.add_argument('--priority', action='store_true')
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.duration, args.work, args.priority)
+    port = free_port()
+    server = subprocess.Popen([
+        sys.executable, '-m', 'txtrader_monitor.fakeserver', '--port',
+        str(port), '--quote-rate',
+        str(args.quote_rate), '--execution-rate',
+        str(args.execution_rate)
+    ])
+    try:
+        time.sleep(1)
+        for label, flags in (('arrival order', []), ('priority', ['--priority'])):
+            command = [sys.executable, __file__, '--child', str(port), '--duration', str(args.duration)]
+            out = subprocess.run(
+                command + ['--work', str(args.work)] + flags, check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{label:>14}: {result['executions']:6d} executions  p50 {result['p50']:8.2f} ms  "
+                f"p99 {result['p99']:8.2f} ms  max {result['max']:8.2f} ms  ({result['quotes']} quotes)"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+  bench_raw.py
+  ------------
+
+  Compare allocations and throughput of the default str receive path with raw=True
+  on large ORDERS/EXECUTIONS dumps.
+
+  usage: python benchmarks/bench_raw.py [executions_per_dump] [dump_count]
+"""
+
+import sys
+import time
+import json
+import tracemalloc
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+CHANNEL = 'a1b2c3'
+
+
+def executions_dump(count):
+    executions = {
+        f'1549-{i:07d}': {
+            'ORDER_ID': f'9b94c305-b9-{i:04x}-3',
+            'BUYORSELL': 'Buy',
+            'DISP_NAME': 'IBM',
+            'PRICE': 125.08,
+            'VOLUME': 75,
+            'TIME_STAMP': '202008171148032300',
+            'ACCOUNT': 'REALTICKDEMO.REALTICK.DEMO31.TRADING',
+        }
+        for i in range(count)
+    }
+    return f'{CHANNEL}.executions: {json.dumps(executions)}'.encode()
+
+
+def bench(raw, dump, dump_count):
+    received = []
+
+    def _executions(channel, data):
+        received.append(len(data))
+        return True
+
+    m = Monitor(callbacks={'*': None, 'EXECUTIONS': _executions}, raw=raw)
+    client = StatusClient(m)
+    client.controlReceived(f'.Authorized {CHANNEL}')
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(dump_count):
+        client.stringReceived(dump)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(received) == dump_count
+    label = 'raw' if raw else 'str'
+    print(
+        f'{label}: {dump_count/elapsed:10,.1f} dumps/sec {len(dump)*dump_count/elapsed/1e6:10,.1f} MB/sec '
+        f'peak allocation {peak/1e6:8,.1f} MB for {len(dump)/1e6:,.1f} MB dump'
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    dump_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    dump = executions_dump(count)
+    bench(False, dump, dump_count)
+    bench(True, dump, dump_count)
+
+
+if __name__ == '__main__':
+    main()
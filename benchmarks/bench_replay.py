@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+  bench_replay.py
+  ---------------
+
+  Measure recorder overhead on the receive path and replay a capture file through a Monitor
+  as fast as possible.
+
+  usage: python benchmarks/bench_replay.py [capture_file] [message_count]
+    with no capture file, a synthetic quote-heavy capture is generated in a temporary directory
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_dispatch import quote_stream, CHANNEL
+
+
+def feed(record_path, messages):
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    if record_path:
+        m.record(record_path)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.stringReceived(f'.Authorized {CHANNEL}'.encode())
+    start = time.perf_counter()
+    for data in messages:
+        client.stringReceived(data)
+    elapsed = time.perf_counter() - start
+    m.stop_recording()
+    return len(messages) / elapsed
+
+
+def main():
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[1] if len(sys.argv) > 1 else None
+        if not path:
+            messages = [data.encode() for data in quote_stream(count)]
+            print(f'     no recorder: {feed(None, messages):12,.0f} msgs/sec')
+            path = os.path.join(tmp, 'capture.dat')
+            print(f'  with recorder: {feed(path, messages):12,.0f} msgs/sec')
+            gz_path = os.path.join(tmp, 'capture.dat.gz')
+            print(f' gzip recorder: {feed(gz_path, messages):12,.0f} msgs/sec')
+            print(f'capture size: {os.path.getsize(path):,} bytes, compressed {os.path.getsize(gz_path):,} bytes')
+        m = Monitor(callbacks={'*': lambda channel, data: True})
+        start = time.perf_counter()
+        replayed = m.replay(path)
+        elapsed = time.perf_counter() - start
+        print(f'        replay: {replayed/elapsed:12,.0f} msgs/sec ({replayed:,} messages)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+  bench_stream.py
+  ---------------
+
+  Record peak RSS against EXECUTIONS payload size for the buffered json.loads path
+  and the streaming item callback path.  Each measurement runs in a fresh subprocess.
+
+  usage: python benchmarks/bench_stream.py [executions ...]
+"""
+
+import sys
+import json
+import time
+import resource
+import subprocess
+
+CHANNEL = 'a1b2c3'
+CHUNK_SIZE = 65536
+
+
+def executions_stream(count):
+    """yield an EXECUTIONS netstring in CHUNK_SIZE pieces without holding the payload in memory"""
+
+    def records():
+        yield f'{CHANNEL}.executions: {{'.encode()
+        for i in range(count):
+            record = {
+                'ORDER_ID': f'9b94c305-b9-{i:04x}-3',
+                'BUYORSELL': 'Buy',
+                'DISP_NAME': 'IBM',
+                'PRICE': 125.08,
+                'VOLUME': 75,
+                'TIME_STAMP': '202008171148032300',
+                'ACCOUNT': 'REALTICKDEMO.REALTICK.DEMO31.TRADING',
+            }
+            yield (',' if i else '').encode() + f'"1549-{i:07d}":{json.dumps(record)}'.encode()
+        yield b'}'
+
+    length = sum(len(r) for r in records())
+    yield b'%d:' % length
+    chunk = bytearray()
+    for r in records():
+        chunk += r
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    yield bytes(chunk) + b','
+
+
+def child(mode, count):
+    from twisted.internet.testing import StringTransport
+    from txtrader_monitor.monitor import Monitor, StatusClient
+
+    result = {'count': 0}
+
+    def _executions(channel, data):
+        result['count'] = len(json.loads(data)) if mode == 'buffered' else data
+        return True
+
+    def _item(channel, key, item):
+        return True
+
+    item_callbacks = {'EXECUTIONS': _item} if mode == 'streaming' else {}
+    m = Monitor(callbacks={'*': None, 'EXECUTIONS': _executions}, item_callbacks=item_callbacks)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived(f'.Authorized {CHANNEL}')
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    size = 0
+    for chunk in executions_stream(count):
+        size += len(chunk)
+        client.dataReceived(chunk)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert result['count'] == count
+    print(f'{mode:>9}: {size/1e6:8.1f} MB payload {(peak-baseline)/1024:8.1f} MB peak RSS growth {elapsed:6.2f} sec')
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        return child(sys.argv[2], int(sys.argv[3]))
+    counts = [int(c) for c in sys.argv[1:]] or [10000, 100000, 500000]
+    for count in counts:
+        for mode in ['buffered', 'streaming']:
+            subprocess.run([sys.executable, __file__, '--child', mode, str(count)], check=True)
+
+
+if __name__ == '__main__':
+    main()
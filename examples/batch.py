@@ -0,0 +1,22 @@
+from txtrader_monitor import Monitor
+import time
+
+# connect once and reuse the connection for periodic snapshot queries
+m = Monitor(callbacks={'*': None}, lazy_json=True)
+
+
+def main():
+    m.start(timeout=30)
+    try:
+        for i in range(5):
+            executions = m.request('executions', 'EXECUTIONS', timeout=30)
+            orders = m.request('orders', 'ORDERS', timeout=30)
+            print(f'{time.ctime()}: {len(executions.json)} executions, {len(orders.json)} orders')
+            for channel, msg in m.iter_messages(['EXECUTION', 'ORDER'], timeout=60):
+                print(f'{channel}: {msg}')
+    finally:
+        m.close()
+
+
+if __name__ == '__main__':
+    main()
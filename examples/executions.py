@@ -6,19 +6,19 @@ from pprint import pprint
 def main():
 
     options = {'execution-notification': 1, 'execution-data': 1}
-    m = Monitor(options=options)
+    m = Monitor(options=options, lazy_json=True)
 
     def execution(channel, data):
         print(f"{channel} {data}")
         return True
 
     def executions(channel, data):
-        for xid, x in json.loads(data).items():
+        for xid, x in data.json.items():
             pprint(x)
         return True
 
     def execution_data(channel, data):
-        pprint(json.loads(data))
+        pprint(data.json)
         return True
 
     def status(channel, data):
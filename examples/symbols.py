@@ -4,11 +4,10 @@ from pprint import pprint
 
 options = {'symbol': 'MSFT', 'query_sent': False, 'querydata_sent': False}
 
-m = Monitor(log_level='WARNING')
+m = Monitor(log_level='WARNING', lazy_json=True)
 
 
 def symbol(channel, data):
-    result = json.loads(data)
     pprint(json.loads(data))
     symbol = options['symbol']
     if not options['query_sent']:
@@ -21,7 +20,7 @@ def symbol(channel, data):
 
 
 def symbol_data(channel, data):
-    pprint(json.loads(data))
+    pprint(data.json)
     return False
 
 
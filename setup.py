@@ -32,8 +32,15 @@ setup(
     ],
     python_requires='>=3.7',
     install_requires=['twisted==20.3.0', 'click==7.1.2', 'ujson==3.1.0'],
+    extras_require={
+        'numpy': ['numpy'],
+        'archive': ['pyarrow']
+    },
     tests_require=['pytest', 'tox', 'yapf', 'twine', 'wheel', 'pybump'],
     entry_points={
-        'console_scripts': ['txtrader_monitor=txtrader_monitor:txtrader_monitor', ],
+        'console_scripts': [
+            'txtrader_monitor=txtrader_monitor:txtrader_monitor',
+            'txtrader_fakeserver=txtrader_monitor.fakeserver:txtrader_fakeserver',
+        ],
     },
 )
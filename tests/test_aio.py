@@ -0,0 +1,45 @@
+#!/bin/env python
+
+import pytest
+import asyncio
+
+from txtrader_monitor.aio import AsyncMonitor
+
+
+def _netstring(data):
+    return b'%d:%s,' % (len(data), data)
+
+
+async def _server(reader, writer):
+    writer.write(_netstring(b'.connected txTrader test server'))
+    header = await reader.readuntil(b':')
+    command = await reader.readexactly(int(header[:-1]) + 1)
+    assert command.startswith(b'auth ')
+    writer.write(_netstring(b'.Authorized a1b2c3'))
+    writer.write(_netstring(b'a1b2c3.quote.IBM:125.07 100 125.09 200'))
+    header = await reader.readuntil(b':')
+    command = await reader.readexactly(int(header[:-1]) + 1)
+    assert command == b'executions,'
+    writer.write(_netstring(b'a1b2c3.executions: {"1549-1323056": {"VOLUME": 75}}'))
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+async def _run():
+    server = await asyncio.start_server(_server, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    received = []
+    async with AsyncMonitor('127.0.0.1', port, lazy_json=True) as monitor:
+        assert monitor.channel == 'a1b2c3'
+        await monitor.send('executions')
+        async for channel, msg in monitor.stream(channels=['EXECUTIONS']):
+            received.append((channel, msg.json))
+            break
+    server.close()
+    await server.wait_closed()
+    return received
+
+
+def test_async_monitor():
+    assert asyncio.run(_run()) == [('EXECUTIONS', {'1549-1323056': {'VOLUME': 75}})]
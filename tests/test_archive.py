@@ -0,0 +1,129 @@
+#!/bin/env python
+
+import os
+import time
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.archive import ArchiveWriter
+
+
+def _segments(directory, channel):
+    return sorted(os.listdir(os.path.join(directory, channel)))
+
+
+def _wait(archiver):
+    while archiver.pending:
+        time.sleep(0.01)
+
+
+def test_archive(tmp_path):
+    m = Monitor(callbacks={'*': None})
+    archiver = m.archive(str(tmp_path), channels=['QUOTE', 'EXECUTION_DATA', 'TIME'], batch_rows=2)
+    archiver.clock = lambda: 1597676385.5
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    client.stringReceived(b'a1b2c3.quote.MSFT:210.01 300 210.03 400 1597676385.25')
+    client.stringReceived(b'a1b2c3.quote.IBM:garbled')
+    client.stringReceived(b'a1b2c3.time: 2020-08-17 10:59:45')
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f1", "ORDER_ID": "o1", "VOLUME": 75, "PRICE": 125.08}')
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f2", "ORDER_ID": "o1", "VOLUME": 25, "PRICE": 125.1}')
+    # trades are not archived
+    client.stringReceived(b'a1b2c3.trade.IBM:125.08 75 1000000')
+    assert not os.path.exists(tmp_path / 'TRADE')
+    m.stop_archive()
+    assert m.archiver is None
+    assert archiver.errors == 1
+    assert archiver.rows == 5
+
+    quotes = pq.read_table(tmp_path / 'QUOTE').to_pylist()
+    assert quotes == [
+        {
+            'time': 1597676385.5,
+            'symbol': 'IBM',
+            'bid': 125.07,
+            'bid_size': 100,
+            'ask': 125.09,
+            'ask_size': 200,
+            'server_time': None
+        },
+        {
+            'time': 1597676385.5,
+            'symbol': 'MSFT',
+            'bid': 210.01,
+            'bid_size': 300,
+            'ask': 210.03,
+            'ask_size': 400,
+            'server_time': 1597676385.25
+        },
+    ]
+    executions = pq.read_table(tmp_path / 'EXECUTION_DATA')
+    assert executions.column_names == ['time', 'FILL_ID', 'ORDER_ID', 'VOLUME', 'PRICE']
+    assert executions.column('VOLUME').to_pylist() == [75, 25]
+    assert pq.read_table(tmp_path / 'TIME').column('data').to_pylist() == ['2020-08-17 10:59:45']
+    for channel in ('QUOTE', 'EXECUTION_DATA', 'TIME'):
+        names = _segments(tmp_path, channel)
+        assert len(names) == 1
+        assert names[0].startswith(f'{channel}-') and names[0].endswith('.parquet')
+
+
+def test_rotate(tmp_path):
+    m = Monitor(callbacks={'*': None})
+    archiver = ArchiveWriter(m, str(tmp_path), channels=['EXECUTION_DATA'], batch_rows=1)
+    archiver.tap('EXECUTION_DATA', '{"FILL_ID": "f1", "VOLUME": 75}')
+    archiver.tap('EXECUTION_DATA', '{"FILL_ID": "f2", "VOLUME": 25}')
+    # a new field starts a new segment
+    archiver.tap('EXECUTION_DATA', '{"FILL_ID": "f3", "VOLUME": 25, "PRICE": 125.1}')
+    _wait(archiver)
+    archiver.rotate_bytes = 1
+    archiver.tap('EXECUTION_DATA', '{"FILL_ID": "f4", "VOLUME": 10}')
+    archiver.close()
+    names = _segments(tmp_path, 'EXECUTION_DATA')
+    assert len(names) == 3
+    assert len(archiver.finalized) == 3
+    table = pq.read_table(tmp_path / 'EXECUTION_DATA', columns=['FILL_ID'])
+    assert table.column('FILL_ID').to_pylist() == ['f1', 'f2', 'f3', 'f4']
+
+
+def test_finalize(tmp_path):
+    m = Monitor(callbacks={'*': None})
+    archiver = ArchiveWriter(m, str(tmp_path), channels=['TIME'])
+    archiver._write('TIME', [(1597676385.5, '2020-08-17 10:59:45')])
+    # the open segment is a hidden temporary file until it is finalized
+    names = _segments(tmp_path, 'TIME')
+    assert len(names) == 1 and names[0].startswith('.TIME-') and names[0].endswith('.parquet.tmp')
+    archiver.close()
+    assert _segments(tmp_path, 'TIME') == [names[0][1:-len('.tmp')]]
+
+
+def test_max_batches(tmp_path):
+    m = Monitor(callbacks={'*': None})
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    archiver = ArchiveWriter(m, str(tmp_path), channels=['TIME'], batch_rows=1, max_batches=2)
+    # stop the writer thread so batches stay queued
+    archiver.queue.put(None)
+    archiver.thread.join()
+    archiver.tap('TIME', '2020-08-17 10:59:45')
+    assert client.transport.producerState == 'producing'
+    archiver.tap('TIME', '2020-08-17 10:59:46')
+    assert client.transport.producerState == 'paused'
+    archiver.thread = None
+    archiver.close()
+    assert client.transport.producerState == 'producing'
+
+
+def test_record_keeps_archive(tmp_path):
+    m = Monitor(callbacks={'*': None})
+    archiver = m.archive(str(tmp_path / 'archive'), channels=['TIME'])
+    m.record(str(tmp_path / 'capture'))
+    assert m.archiver is archiver
+    assert archiver.thread is not None
+    m.stop_recording()
+    m.stop_archive()
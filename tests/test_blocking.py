@@ -0,0 +1,64 @@
+#!/bin/env python
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+# the reactor can only run once per process, so each scenario runs in its own interpreter
+CLIENT = """
+import json
+import threading
+import time
+
+from twisted.internet import reactor
+
+from txtrader_monitor import Monitor
+from txtrader_monitor.fakeserver import FakeServer
+
+server = FakeServer(quote_rate=100, snapshot_size=3)
+port = reactor.listenTCP(0, server, interface='127.0.0.1')
+m = Monitor(host='127.0.0.1', port=port.getHost().port, callbacks={'*': None})
+m.start(timeout=10)
+result = {'quotes': [], 'pending': []}
+for channel, data in m.iter_messages(['QUOTE'], timeout=10):
+    result['quotes'].append(channel)
+    if len(result['quotes']) == 5:
+        break
+result['orders'] = len(json.loads(m.request('orders', 'ORDERS', timeout=10)))
+
+
+def _iterate():
+    for message in m.iter_messages(['TICKET']):
+        result['pending'].append(message)
+    result['pending'].append('end')
+
+
+def _request():
+    try:
+        m.request('query tickets', 'TICKET')
+    except ConnectionError as e:
+        result['pending'].append(type(e).__name__)
+
+
+threads = [threading.Thread(target=_iterate), threading.Thread(target=_request)]
+for thread in threads:
+    thread.start()
+time.sleep(0.5)
+m.close(timeout=10)
+for thread in threads:
+    thread.join(10)
+result['alive'] = [thread.is_alive() for thread in threads]
+print(json.dumps(result))
+"""
+
+
+def test_blocking_api():
+    out = subprocess.run([sys.executable, '-c', CLIENT], check=True, capture_output=True, text=True, timeout=60)
+    result = json.loads(out.stdout.splitlines()[-1])
+    assert result['quotes'] == ['QUOTE'] * 5
+    assert result['orders'] == 3
+    # close() ends a pending iterator and fails a pending request
+    assert sorted(result['pending']) == ['ConnectionError', 'end']
+    assert result['alive'] == [False, False]
@@ -0,0 +1,132 @@
+#!/bin/env python
+
+import time
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.capture import read_capture, ReplayTransport, CaptureWriter, RECORD_HEADER
+
+MESSAGES = [
+    b'.connected txTrader test server',
+    b'.Authorized a1b2c3',
+    b'a1b2c3.quote.IBM:125.07 100 125.09 200',
+    b'a1b2c3.trade.IBM:125.08 75 1000',
+    b'a1b2c3.execution-data {"VOLUME": 75}',
+]
+
+
+@pytest.mark.parametrize('filename', ['capture.dat', 'capture.dat.gz'])
+def test_record_replay(tmpdir, filename):
+    path = str(tmpdir.join(filename))
+    received = []
+
+    def _cb(channel, data):
+        received.append((channel, data))
+        return True
+
+    m = Monitor(callbacks={'*': _cb})
+    m.record(path)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    for data in MESSAGES:
+        client.stringReceived(data)
+    m.stop_recording()
+    assert [data for timestamp, data in read_capture(path)] == MESSAGES
+    recorded = [msg for msg in received if msg[0] != 'CONNECTION']
+    received.clear()
+
+    r = Monitor(callbacks={'*': _cb})
+    assert r.replay(path) == len(MESSAGES)
+    assert [msg for msg in received if msg[0] != 'CONNECTION'] == recorded
+
+
+def test_record_streamed(tmpdir):
+    path = str(tmpdir.join('capture.dat'))
+    items = []
+    m = Monitor(
+        callbacks={'*': lambda channel, data: True},
+        item_callbacks={'ORDERS': lambda channel, key, item: items.append(key) or True}
+    )
+    m.record(path)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    messages = MESSAGES[:2] + [b'a1b2c3.orders: {"1": {"permid": "1"}, "2": {"permid": "2"}}'] + MESSAGES[2:]
+    for data in messages:
+        client.dataReceived(b'%d:%s,' % (len(data), data))
+    m.stop_recording()
+    assert items == ['1', '2']
+    # the streamed snapshot is recorded whole, in order
+    assert [data for timestamp, data in read_capture(path)] == messages
+
+    received = []
+    r = Monitor(callbacks={'*': lambda channel, data: received.append((channel, data)) or True})
+    assert r.replay(path) == len(messages)
+    assert ('ORDERS', '{"1": {"permid": "1"}, "2": {"permid": "2"}}') in received
+
+
+def test_replay_sessions(tmpdir, monkeypatch):
+    path = str(tmpdir.join('capture.dat'))
+    now = time.time()
+    for session in range(2):
+        # the second session is appended an hour later
+        monkeypatch.setattr(time, 'time', lambda: now + session*3600)
+        writer = CaptureWriter(path)
+        for data in MESSAGES:
+            writer.write(data)
+        writer.close()
+    monkeypatch.undo()
+    records = list(read_capture(path))
+    assert [timestamp for timestamp, data in records] == [now] * len(MESSAGES) + [now+3600] * len(MESSAGES)
+
+    status = []
+    m = Monitor(callbacks={'*': None, 'STATUS': lambda channel, data: status.append(data) or True})
+    start = time.monotonic()
+    assert m.replay(path, speed=1.0) == len(records)
+    assert time.monotonic() - start < 5
+    assert isinstance(m.connection.transport, ReplayTransport)
+    assert status.count('.Authorized a1b2c3') == 2
+
+
+@pytest.mark.parametrize('filename', ['capture.dat', 'capture.dat.gz'])
+def test_unclosed_capture(tmpdir, filename):
+    path = str(tmpdir.join(filename))
+    crashed = str(tmpdir.join('crashed-' + filename))
+    writer = CaptureWriter(path)
+    for data in MESSAGES:
+        writer.write(data)
+    writer.flush()
+    writer.write(MESSAGES[2])
+    # the process dies after the flush, part way through writing a record
+    with open(path, 'rb') as f:
+        content = f.read()
+    if not filename.endswith('.gz'):
+        content += RECORD_HEADER.pack(0, 100) + b'a1b2c3'
+    with open(crashed, 'wb') as f:
+        f.write(content)
+    writer.close()
+    assert [data for timestamp, data in read_capture(crashed)] == MESSAGES
+    # the next session is appended after the last complete record and stays readable
+    writer = CaptureWriter(crashed)
+    for data in MESSAGES:
+        writer.write(data)
+    writer.close()
+    assert [data for timestamp, data in read_capture(crashed)] == MESSAGES * 2
+
+
+def test_replay_item_callbacks(tmpdir):
+    path = str(tmpdir.join('capture.dat'))
+    writer = CaptureWriter(path)
+    for data in MESSAGES[:2] + [b'a1b2c3.orders: {"1": {"permid": "1"}, "2": {"permid": "2"}}']:
+        writer.write(data)
+    writer.close()
+    items = []
+    received = []
+    m = Monitor(
+        callbacks={'*': lambda channel, data: received.append((channel, data)) or True},
+        item_callbacks={'ORDERS': lambda channel, key, item: items.append(key) or True}
+    )
+    assert m.replay(path) == 3
+    assert items == ['1', '2']
+    assert ('ORDERS', 2) in received
@@ -0,0 +1,36 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.task import Clock
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def test_conflation():
+    received = []
+
+    def _cb(channel, data):
+        received.append((channel, data))
+        return True
+
+    m = Monitor(callbacks={'*': _cb})
+    conflator = m.set_conflation(interval=0.5)
+    conflator.clock = clock = Clock()
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    received.clear()
+    for i in range(10):
+        client.stringReceived(b'a1b2c3.quote.IBM:%d 100 125.09 200' % i)
+        client.stringReceived(b'a1b2c3.quote.MSFT:%d 100 210.00 200' % i)
+    client.stringReceived(b'a1b2c3.trade.IBM:125.08 75 1000')
+    client.stringReceived(b'a1b2c3.execution.1234 filled')
+    assert received == [('EXECUTION', '1234 filled')]
+    clock.advance(0.5)
+    assert received[1:] == [
+        ('QUOTE', 'IBM:9 100 125.09 200'),
+        ('QUOTE', 'MSFT:9 100 210.00 200'),
+        ('TRADE', 'IBM:125.08 75 1000'),
+    ]
+    assert conflator.conflated == {'IBM': 9, 'MSFT': 9}
+    assert conflator.received == 21
+    assert conflator.delivered == 3
@@ -0,0 +1,79 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.dedup import Deduplicator
+
+
+def _client(m):
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    return client
+
+
+def test_payload():
+    d = Deduplicator()
+    assert d.check('QUOTE', 'IBM:125.07 100 125.09 200')
+    assert d.check('QUOTE', 'MSFT:210.01 100 210.03 200')
+    assert not d.check('QUOTE', 'IBM:125.07 100 125.09 200')
+    assert d.check('QUOTE', 'IBM:125.07 100 125.09 300')
+    assert d.check('QUOTE', 'IBM:125.07 100 125.09 200')
+    assert not d.check('QUOTE', memoryview(b'MSFT:210.01 100 210.03 200'))
+    assert d.check('ORDER', '9b94c305-b9-001a Submitted')
+    assert not d.check('ORDER', '9b94c305-b9-001a Submitted')
+    assert d.check('ORDER', '9b94c305-b9-001b Submitted')
+    assert dict(d.suppressed) == {'QUOTE': 2, 'ORDER': 1}
+
+
+def test_fields():
+    d = Deduplicator({'ORDER_DATA': ['status', 'filled']})
+    assert d.check('ORDER_DATA', '{"permid": "p1", "status": "Submitted", "filled": 0, "updated": 1}')
+    assert not d.check('ORDER_DATA', '{"permid": "p1", "status": "Submitted", "filled": 0, "updated": 2}')
+    assert d.check('ORDER_DATA', '{"permid": "p2", "status": "Submitted", "filled": 0, "updated": 2}')
+    assert d.check('ORDER_DATA', '{"permid": "p1", "status": "Filled", "filled": 100, "updated": 3}')
+    # item counts of streamed snapshots are delivered
+    d = Deduplicator({'ORDERS': None})
+    assert d.check('ORDERS', 2) and d.check('ORDERS', 2)
+    with pytest.raises(ValueError):
+        Deduplicator({'QUOTE': ['bid']})
+    with pytest.raises(ValueError):
+        Deduplicator({'QUOTES': None})
+
+
+def test_keys_and_lru():
+    d = Deduplicator({'STATUS': None, 'SYMBOL_DATA': None}, keys={'SYMBOL_DATA': 'symbol'}, max_keys=2)
+    assert d.check('STATUS', 'a')
+    assert not d.check('STATUS', 'a')
+    assert d.check('SYMBOL_DATA', '{"symbol": "IBM", "bid": 1}')
+    assert d.check('SYMBOL_DATA', '{"symbol": "MSFT", "bid": 1}')
+    # STATUS was least recently seen and dropped
+    assert d.evicted == 1
+    assert d.check('STATUS', 'a')
+    assert d.snapshot() == {'keys': 2, 'evicted': 2, 'suppressed': {'STATUS': 1}}
+
+
+def test_monitor():
+    quotes = []
+    taps = []
+    m = Monitor(callbacks={'*': None, 'QUOTE': lambda channel, data: quotes.append(data) or True})
+    m.add_tap(lambda channel, data: taps.append(data), ['QUOTE'])
+    m.enable_metrics()
+    m.set_dedup()
+    client = _client(m)
+    for i in range(3):
+        client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    client.stringReceived(b'a1b2c3.quote.IBM:125.08 100 125.09 200')
+    assert quotes == ['IBM:125.07 100 125.09 200', 'IBM:125.08 100 125.09 200']
+    # taps see every message
+    assert len(taps) == 4
+    assert m.metrics.snapshot()['dedup']['suppressed'] == {'QUOTE': 2}
+    assert 'txtrader_monitor_suppressed_total{channel="QUOTE"} 2' in m.metrics.prometheus()
+    # a new connection delivers the next message for every key
+    client = _client(m)
+    client.stringReceived(b'a1b2c3.quote.IBM:125.08 100 125.09 200')
+    assert len(quotes) == 3
+    m.set_dedup(None)
+    assert m.deduplicator is None
@@ -0,0 +1,55 @@
+#!/bin/env python
+
+import pytest
+
+from txtrader_monitor.channel import Channel
+from txtrader_monitor.dispatch import ChannelDispatcher
+
+d = ChannelDispatcher('a1b2c3')
+
+
+@pytest.mark.parametrize(
+    'data, channel, payload', [
+        ('a1b2c3.time: 2020-08-17 10:59:45', Channel.TIME, '2020-08-17 10:59:45'),
+        ('a1b2c3.error: bad symbol', Channel.ERROR, 'bad symbol'),
+        ('a1b2c3.order.1234 Completed', Channel.ORDER, '1234 Completed'),
+        ('a1b2c3.open-order.1234 Pending', Channel.ORDER, '1234 Pending'),
+        ('a1b2c3.order-data {"a": 1}', Channel.ORDER_DATA, '{"a": 1}'),
+        ('a1b2c3.orders: {}', Channel.ORDERS, '{}'),
+        ('a1b2c3.ticket.1234 ok', Channel.TICKET, '1234 ok'),
+        ('a1b2c3.ticket-data {}', Channel.TICKET_DATA, '{}'),
+        ('a1b2c3.execution.1234 filled', Channel.EXECUTION, '1234 filled'),
+        ('a1b2c3.executions: {}', Channel.EXECUTIONS, '{}'),
+        ('a1b2c3.execution-data {}', Channel.EXECUTION_DATA, '{}'),
+        ('a1b2c3.symbol: IBM', Channel.SYMBOL, 'IBM'),
+        ('a1b2c3.symbol-data: {}', Channel.SYMBOL_DATA, '{}'),
+        ('a1b2c3.quote.IBM:125.07 100 125.09 200', Channel.QUOTE, 'IBM:125.07 100 125.09 200'),
+        ('a1b2c3.trade.IBM:125.08 75 1000', Channel.TRADE, 'IBM:125.08 75 1000'),
+    ]
+)
+def test_route(data, channel, payload):
+    callback_channel, offset = d.route(data)
+    assert callback_channel == channel
+    assert data[offset:] == payload
+
+
+@pytest.mark.parametrize(
+    'data', [
+        'a1b2c3.current-account REALTICKDEMO',
+        'a1b2c3.time:no-space',
+        'a1b2c3.order: 1234',
+        'x1y2z3.quote.IBM:1 2 3 4',
+        'unrelated message',
+    ]
+)
+def test_route_unmapped(data):
+    assert d.route(data) == (None, 0)
+
+
+def test_route_raw():
+    r = ChannelDispatcher('a1b2c3', raw=True)
+    data = b'a1b2c3.execution-data {"a": 1}'
+    callback_channel, offset = r.route(data)
+    assert callback_channel == Channel.EXECUTION_DATA
+    assert bytes(memoryview(data)[offset:]) == b'{"a": 1}'
+    assert r.route(b'a1b2c3.current-account X') == (None, 0)
@@ -0,0 +1,133 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.defer import Deferred
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+class Transport(object):
+    paused = False
+
+    def pauseProducing(self):
+        self.paused = True
+
+    def resumeProducing(self):
+        self.paused = False
+
+
+class Connection(object):
+    transport = Transport()
+
+
+def _executor(overflow, channel='QUOTE'):
+    m = Monitor(callbacks={'*': None})
+    m.set_callback(channel, lambda channel, data: True)
+    m.set_execution_policy(channel, 'thread', max_queue=2, overflow=overflow)
+    executor = m.executors[channel]
+    calls = []
+
+    def _submit(func, data):
+        calls.append((Deferred(), data))
+        return calls[-1][0]
+
+    executor._submit = _submit
+    return m, executor, calls
+
+
+def test_executor_order():
+    m, executor, calls = _executor('drop-oldest')
+    for data in ['IBM:1', 'IBM:2', 'IBM:3']:
+        m._callback('QUOTE', data)
+    assert [data for d, data in calls] == ['IBM:1']
+    calls[0][0].callback(True)
+    calls[1][0].callback(True)
+    assert [data for d, data in calls] == ['IBM:1', 'IBM:2', 'IBM:3']
+
+
+def test_executor_drop_oldest():
+    m, executor, calls = _executor('drop-oldest')
+    for data in ['IBM:1', 'IBM:2', 'IBM:3', 'IBM:4']:
+        m._callback('QUOTE', data)
+    assert list(executor.queue) == ['IBM:3', 'IBM:4']
+    assert executor.dropped == 1
+
+
+def test_executor_conflate():
+    m, executor, calls = _executor('conflate')
+    for data in ['IBM:1', 'MSFT:1', 'IBM:2', 'MSFT:2']:
+        m._callback('QUOTE', data)
+    assert list(executor.queue) == ['IBM:2', 'MSFT:2']
+    assert executor.conflated == 1
+
+
+def test_executor_block():
+    m, executor, calls = _executor('block')
+    m.connection = Connection()
+    for data in ['IBM:1', 'IBM:2', 'IBM:3', 'IBM:4']:
+        m._callback('QUOTE', data)
+    assert m.connection.transport.paused
+    assert len(executor.queue) == 3
+    calls[-1][0].callback(True)
+    calls[-1][0].callback(True)
+    assert m.connection.transport.paused
+    calls[-1][0].callback(True)
+    assert not m.connection.transport.paused
+    m.connection = None
+
+
+def test_executor_shutdown():
+    m, executor, calls = _executor('block', 'EXECUTION_DATA')
+    m._callback('EXECUTION_DATA', '{}')
+    calls[0][0].callback(False)
+    assert m.shutdown_pending
+
+
+def test_executor_no_callback():
+    m, executor, calls = _executor('block')
+    executor.max_queue = 10000
+    for i in range(5000):
+        m._callback('QUOTE', f'IBM:{i}')
+    # messages queued for a callback that was removed are released without recursion
+    m.set_callback('QUOTE', None)
+    calls[0][0].callback(True)
+    assert len(calls) == 1
+    assert not executor.queue and not executor.running
+    assert m.flow.pending_bytes == 0
+
+
+def _payload_type(channel, data):
+    return type(data).__name__
+
+
+def test_executor_process_raw():
+    m = Monitor(callbacks={'*': None}, raw=True, lazy_json=True)
+    m.set_callback('ORDER_DATA', _payload_type)
+    m.set_execution_policy('ORDER_DATA', 'process')
+    executor = m.executors['ORDER_DATA']
+    futures = []
+    submit = executor.pool.submit
+    executor.pool.submit = lambda *args: futures.append(submit(*args)) or futures[-1]
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.order-data {"permid": "1"}')
+    # the JSONBuffer wrapping a memoryview is sent to the worker process as bytes
+    assert futures[0].result(timeout=30) == 'bytes'
+    executor.stop()
+
+
+def test_executor_process_picklable():
+    m = Monitor(callbacks={'*': None})
+    m.set_callback('ORDER_DATA', lambda channel, data: True)
+    with pytest.raises(ValueError, match='picklable'):
+        m.set_execution_policy('ORDER_DATA', 'process')
+    assert 'ORDER_DATA' not in m.executors
+    m.set_callback('ORDER_DATA', _payload_type)
+    m.set_execution_policy('ORDER_DATA', 'process')
+    # the default print callback is a bound method of the monitor
+    with pytest.raises(ValueError, match='picklable'):
+        m.set_callback('ORDER_DATA', m._cb_default)
+    with pytest.raises(ValueError, match='picklable'):
+        m.set_callbacks({})
+    assert m.callbacks['ORDER_DATA'] is _payload_type
+    m.executors['ORDER_DATA'].stop()
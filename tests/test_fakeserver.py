@@ -0,0 +1,40 @@
+#!/bin/env python
+
+import pytest
+import ujson as json
+from twisted.internet import reactor
+
+from txtrader_monitor import Monitor
+from txtrader_monitor.fakeserver import FakeServer
+
+server = FakeServer(quote_rate=1000, snapshot_size=10)
+port = reactor.listenTCP(0, server, interface='127.0.0.1')
+m = Monitor(host='127.0.0.1', port=port.getHost().port, callbacks={'*': None})
+
+received = {'QUOTE': 0}
+
+
+def _status(channel, msg):
+    if msg.startswith('.Authorized'):
+        m.send('executions')
+    return True
+
+
+def _executions(channel, data):
+    received['EXECUTIONS'] = data
+    return True
+
+
+def _quote(channel, data):
+    received['QUOTE'] += 1
+    return received['QUOTE'] < 100 or 'EXECUTIONS' not in received
+
+
+def test_fakeserver():
+    m.set_callback('STATUS', _status)
+    m.set_callback('EXECUTIONS', _executions)
+    m.set_callback('QUOTE', _quote)
+    reactor.callLater(30, m.stop)
+    m.run()
+    assert received['QUOTE'] >= 100
+    assert len(json.loads(received['EXECUTIONS'])) == 10
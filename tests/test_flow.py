@@ -0,0 +1,44 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.task import Clock
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def test_pending_bytes():
+    m = Monitor(callbacks={'*': lambda channel, data: True}, max_pending_bytes=100)
+    scheduler = m.set_priority(classes=[('high', ['STATUS', 'CONNECTION'], None), ('low', ['QUOTE'], 0)])
+    scheduler.clock = clock = Clock()
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    clock.advance(0)
+    # 25 byte payloads
+    for i in range(3):
+        client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    assert m.flow.pending_bytes == 75
+    assert client.transport.producerState == 'producing'
+    client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    assert client.transport.producerState == 'paused'
+    assert m.flow.paused and m.flow.pauses == 1
+    scheduler.drain()
+    assert client.transport.producerState == 'paused'
+    scheduler.drain()
+    assert m.flow.pending_bytes == 50
+    assert client.transport.producerState == 'producing'
+    assert m.flow.paused_seconds > 0
+    assert m.flow.peak_bytes == 100
+    m.set_priority(None)
+    assert m.flow.pending_bytes == 0
+
+
+def test_max_message_length():
+    m = Monitor(callbacks={'*': lambda channel, data: True}, max_message_length=64)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.dataReceived(b'18:.Authorized a1b2c3,')
+    assert not client.transport.disconnecting
+    client.dataReceived(b'100:a1b2c3.orders: {')
+    assert client.transport.disconnecting
@@ -0,0 +1,104 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet import reactor
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor import Monitor
+from txtrader_monitor.fakeserver import FakeServer
+from txtrader_monitor.monitor import StatusClient
+
+
+def hub_client(hub, options='{}'):
+    client = hub.buildProtocol(None)
+    client.makeConnection(StringTransport())
+    client.dataReceived(b'%d:auth user secret %s,' % (17 + len(options), options.encode()))
+    return client
+
+
+def test_hub_fanout():
+    upstream = Monitor(username='user', password='secret', callbacks={'*': None})
+    hub = upstream.serve_hub(max_buffer=100)
+    status = StatusClient(upstream)
+    status.makeConnection(StringTransport())
+    quotes = hub_client(hub, '{"channels": ["QUOTE"]}')
+    everything = hub_client(hub)
+    assert not hub.clients
+    status.dataReceived(b'18:.Authorized a1b2c3,')
+    assert hub.clients == {quotes, everything}
+    assert quotes.transport.value().endswith(b'18:.Authorized a1b2c3,')
+    quotes.transport.clear()
+    everything.transport.clear()
+    status.dataReceived(b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,28:a1b2c3.execution.1234 filled,')
+    assert quotes.transport.value() == b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,'
+    assert everything.transport.value().endswith(b'28:a1b2c3.execution.1234 filled,')
+
+    # a paused client queues up to max_buffer bytes, then is disconnected
+    quotes.pauseProducing()
+    status.dataReceived(b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,' * 2)
+    assert len(quotes.queue) == 2
+    quotes.resumeProducing()
+    assert not quotes.queue and quotes.sent == 3
+    quotes.pauseProducing()
+    status.dataReceived(b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,' * 3)
+    assert quotes.dropped == 1
+    assert quotes.transport.disconnecting
+
+    # commands from clients go upstream
+    everything.dataReceived(b'7:add IBM,')
+    assert status.transport.value().endswith(b'7:add IBM,')
+
+
+def test_hub_streamed_snapshots():
+    items = []
+    upstream = Monitor(
+        username='user',
+        password='secret',
+        callbacks={'*': None},
+        item_callbacks={'ORDERS': lambda channel, key, item: items.append(key) or True}
+    )
+    hub = upstream.serve_hub()
+    status = StatusClient(upstream)
+    status.makeConnection(StringTransport())
+    orders = hub_client(hub, '{"channels": ["ORDERS"]}')
+    status.dataReceived(b'18:.Authorized a1b2c3,')
+    orders.transport.clear()
+    snapshot = b'a1b2c3.orders: {"1": {"permid": "1"}, "2": {"permid": "2"}}'
+    message = b'%d:%s,' % (len(snapshot), snapshot)
+    # the snapshot is streamed to the upstream item callbacks and forwarded whole to hub clients
+    for i in range(0, len(message), 5):
+        status.dataReceived(message[i:i + 5])
+    assert items == ['1', '2']
+    assert orders.transport.value() == message
+
+
+def test_hub_end_to_end():
+    server = FakeServer(quote_rate=1000, trade_rate=1000)
+    port = reactor.listenTCP(0, server, interface='127.0.0.1')
+    upstream = Monitor(host='127.0.0.1', port=port.getHost().port, callbacks={'*': None})
+    upstream.serve_hub(port=0)
+    received = {}
+
+    def _count(channel, data):
+        received[channel] = received.get(channel, 0) + 1
+        if received[channel] >= 100:
+            upstream.shutdown('test complete')
+            downstream.shutdown('test complete')
+            reactor.callLater(0.1, upstream.stop)
+        return True
+
+    downstream = Monitor(
+        host='127.0.0.1',
+        port=upstream.hub_ports[0].getHost().port,
+        options={'channels': ['QUOTE']},
+        callbacks={
+            '*': _count,
+            'CONNECTION': None,
+            'STATUS': None
+        }
+    )
+    reactor.callWhenRunning(downstream.connect)
+    reactor.callLater(30, upstream.stop)
+    upstream.run()
+    assert received.get('QUOTE', 0) >= 100
+    assert 'TRADE' not in received
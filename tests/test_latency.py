@@ -0,0 +1,102 @@
+#!/bin/env python
+
+import calendar
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.latency import parse_time, parse_time_stamp, RollingWindow
+
+T = calendar.timegm((2020, 8, 17, 10, 59, 45))
+# local clock 4 hours ahead of the server time zone
+ZONE = 4 * 3600
+
+
+class FakeClock(object):
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _client(m):
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    return client
+
+
+def test_parse():
+    assert parse_time('2020-08-17 10:59:45') == T
+    assert parse_time_stamp('202008171059452300') == pytest.approx(T + 0.23)
+    assert parse_time_stamp('20200817105945') == T
+
+
+def test_rolling_window():
+    w = RollingWindow(4)
+    for value in (5, 1, 2, 3, 4):
+        w.record(value)
+    assert w.count == 5
+    assert w.percentile(50) == 3
+    snapshot = w.snapshot()
+    assert snapshot['max'] == 4 and snapshot['mean'] == 2.5
+
+
+def test_offset_and_stages():
+    status = []
+    m = Monitor(callbacks={'*': None, 'STATUS': lambda channel, data: status.append(data) or True})
+    m.enable_metrics()
+    latency = m.enable_latency(threshold=1.0)
+    latency.clock = clock = FakeClock(T + ZONE + 0.5)
+    client = _client(m)
+    client.stringReceived(b'a1b2c3.time: 2020-08-17 10:59:45')
+    clock.now = T + ZONE + 1.2
+    client.stringReceived(b'a1b2c3.time: 2020-08-17 10:59:46')
+    assert latency.offset == pytest.approx(ZONE + 0.2)
+    network = latency.stages['TIME']['network']
+    assert list(network.samples) == [pytest.approx(0), pytest.approx(0)]
+
+    clock.now = T + ZONE + 0.7
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f1", "TIME_STAMP": "202008171059450000"}')
+    stages = latency.stages['EXECUTION_DATA']
+    assert stages['network'].samples[-1] == pytest.approx(0.5)
+    assert stages['total'].samples[-1] == pytest.approx(0.5)
+    assert stages['queue'].count == 1 and stages['callback'].count == 1
+    assert not status[1:]
+
+    # lag over the threshold raises one alert per alert_interval
+    clock.now = T + ZONE + 2.0
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f2", "TIME_STAMP": "202008171059450000"}')
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f3", "TIME_STAMP": "202008171059450000"}')
+    alerts = [s for s in status if s.startswith('latency alert')]
+    assert alerts == ['latency alert: EXECUTION_DATA lag 1.800s exceeds 1.0s']
+    assert latency.alerts['EXECUTION_DATA'] == 1
+
+    snapshot = m.metrics.snapshot()['latency']
+    assert snapshot['offset'] == pytest.approx(ZONE + 0.2)
+    assert snapshot['channels']['EXECUTION_DATA']['total']['count'] == 3
+    text = m.metrics.prometheus()
+    assert 'txtrader_monitor_lag_seconds{channel="EXECUTION_DATA",stage="total",quantile="0.99"}' in text
+    assert 'txtrader_monitor_lag_alerts_total{channel="EXECUTION_DATA"} 1' in text
+
+
+def test_queue_stage():
+    delivered = []
+    m = Monitor(callbacks={'*': None, 'EXECUTION': lambda channel, data: delivered.append(data) or True})
+    latency = m.enable_latency(channels=['EXECUTION'], offset=0)
+    latency.clock = clock = FakeClock(100.0)
+    scheduler = m.set_priority()
+    client = _client(m)
+    client.stringReceived(b'a1b2c3.execution.f1 o1')
+    client.stringReceived(b'a1b2c3.execution.f2 o1')
+    assert len(latency.pending['EXECUTION']) == 2
+    clock.now = 100.25
+    scheduler.drain()
+    assert delivered == ['f1 o1', 'f2 o1']
+    assert list(latency.stages['EXECUTION']['queue'].samples) == [0.25, 0.25]
+    # no server time in the payload
+    assert not latency.stages['EXECUTION']['total'].count
+    assert not latency.pending['EXECUTION']
@@ -0,0 +1,50 @@
+#!/bin/env python
+
+import logging
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+class Payload(bytes):
+    """counts how often the message text is formatted"""
+
+    formatted = 0
+
+    def __repr__(self):
+        Payload.formatted += 1
+        return bytes.__repr__(self)
+
+
+def test_logger_and_wire_trace(tmp_path):
+    logger = logging.getLogger('test_logging')
+    root_handlers = list(logging.getLogger().handlers)
+    trace = tmp_path / 'wire.log'
+    m = Monitor(callbacks={'*': lambda channel, data: True}, logger=logger, wire_trace=str(trace))
+    assert m.logger is logger
+    assert logger.level == logging.WARNING
+    assert logging.getLogger().handlers == root_handlers
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.dataReceived(b'18:.Authorized a1b2c3,')
+    client.dataReceived(b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,')
+    client.send('add IBM')
+    lines = trace.read_text().splitlines()
+    assert len(lines) == 3
+    assert lines[0].endswith("RX: b'.Authorized a1b2c3'")
+    assert lines[1].endswith("RX: b'a1b2c3.quote.IBM:125.07 100 125.09 200'")
+    assert lines[2].endswith('TX: add IBM')
+
+
+def test_lazy_formatting():
+    m = Monitor(callbacks={'*': lambda channel, data: True}, logger=logging.getLogger('test_logging.lazy'))
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.stringReceived(b'.Authorized a1b2c3')
+    client.stringReceived(Payload(b'a1b2c3.quote.IBM:125.07 100 125.09 200'))
+    assert Payload.formatted == 0
+    m.logger.setLevel(logging.DEBUG)
+    client.stringReceived(Payload(b'a1b2c3.quote.IBM:125.07 100 125.09 200'))
+    assert Payload.formatted > 0
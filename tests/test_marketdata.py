@@ -0,0 +1,42 @@
+#!/bin/env python
+
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def test_market_data():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    md = m.enable_market_data(capacity=2)
+    now = [100.0]
+    md.clock = lambda: now[0]
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    for i, (price, size) in enumerate([(10, 100), (12, 100), (11, 200), (13, 100), (9, 100)]):
+        now[0] = 100.0 + i*30
+        client.stringReceived(b'a1b2c3.trade.IBM:%d %d 1000' % (price, size))
+        client.stringReceived(b'a1b2c3.quote.IBM:%d 100 %d 200 1597676385.000000' % (price, price + 1))
+    client.stringReceived(b'a1b2c3.trade.IBM:garbage')
+    assert md.errors == 1
+    assert md.symbols == ['IBM']
+    assert len(md.trades['IBM']) == 5
+    assert list(md.quote_rows('IBM')['ask']) == [11, 13, 12, 14, 10]
+
+    bars = md.bars('IBM', 60)
+    assert list(bars['time']) == [60, 120, 180]
+    assert list(bars['open']) == [10, 12, 13]
+    assert list(bars['high']) == [10, 12, 13]
+    assert list(bars['low']) == [10, 11, 9]
+    assert list(bars['close']) == [10, 11, 9]
+    assert list(bars['volume']) == [100, 300, 200]
+    assert bars['vwap'][1] == pytest.approx((12*100 + 11*200) / 300)
+    assert len(md.bars('IBM', 60, since=190)) == 1
+
+    assert md.vwap('IBM') == pytest.approx((1000+1200+2200+1300+900) / 600)
+    assert md.vwap('IBM', window=30) == pytest.approx((1300+900) / 200)
+    assert math.isnan(md.vwap('MSFT'))
+    assert len(md.bars('MSFT', 60)) == 0
@@ -0,0 +1,79 @@
+#!/bin/env python
+
+import pytest
+import ujson
+
+from txtrader_monitor.message import JSONMessage, JSONBuffer
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def test_json_message():
+    text = '{"1549-1323056": {"VOLUME": 75}}'
+    msg = JSONMessage(text)
+    assert isinstance(msg, str) and str(msg) == text and ujson.loads(msg) == msg.json
+    assert msg == text and len(msg) == len(text) and f'{msg}' == text
+    assert msg.startswith('{') and 'VOLUME' in msg
+    assert msg.json == {'1549-1323056': {'VOLUME': 75}}
+    assert msg.json is msg.json
+
+
+def test_json_buffer():
+    msg = JSONBuffer(memoryview(b'xx{"VOLUME": 75}')[2:])
+    assert len(msg) == 14
+    assert str(msg) == '{"VOLUME": 75}'
+    assert msg.json == {'VOLUME': 75}
+    assert msg.json is msg.json
+
+
+@pytest.mark.parametrize('raw', [False, True])
+def test_lazy_json_delivery(raw):
+    received = {}
+
+    def _cb(channel, data):
+        received[channel] = data
+        return True
+
+    m = Monitor(callbacks={'*': _cb}, raw=raw, lazy_json=True)
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.execution-data {"VOLUME": 75}')
+    client.stringReceived(b'a1b2c3.execution.1234 filled')
+    assert received['EXECUTION_DATA'].json == {'VOLUME': 75}
+    assert not hasattr(received['EXECUTION'], 'json')
+
+
+def test_raw_default_callback(capsys):
+    m = Monitor(raw=True, lazy_json=True)
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    capsys.readouterr()
+    client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    client.stringReceived(b'a1b2c3.execution-data {"VOLUME": 75}')
+    assert capsys.readouterr().out.splitlines() == [
+        'QUOTE: IBM:125.07 100 125.09 200',
+        'EXECUTION_DATA: {"VOLUME": 75}',
+    ]
+
+
+def test_json_parsed_once(monkeypatch):
+    loads = ujson.loads
+    parsed = []
+    monkeypatch.setattr(ujson, 'loads', lambda data: parsed.append(data) or loads(data))
+    received = []
+
+    def _order_data(channel, data):
+        received.append(data.json['status'])
+        received.append(data.json['status'])
+        return True
+
+    m = Monitor(callbacks={'*': None, 'ORDER_DATA': _order_data}, lazy_json=True)
+    orders = m.track_orders()
+    m.set_dedup({'ORDER_DATA': ['status']})
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.order-data {"permid": "1", "symbol": "IBM", "status": "Submitted"}')
+    client.stringReceived(b'a1b2c3.order-data {"permid": "1", "symbol": "IBM", "status": "Filled"}')
+    assert received == ['Submitted', 'Submitted', 'Filled', 'Filled']
+    assert orders.get('1')['status'] == 'Filled'
+    # the store, the deduplicator and the callback share one parse per message
+    assert len(parsed) == 2
@@ -0,0 +1,65 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.testing import MemoryReactor, StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.metrics import Histogram, serve_metrics
+
+
+def test_histogram():
+    h = Histogram()
+    for i in range(1, 1001):
+        h.record(i / 1e6)
+    assert h.count == 1000
+    for p, expected in [(50, 500e-6), (99, 990e-6)]:
+        assert abs(h.percentile(p) - expected) <= expected / 16
+    assert h.snapshot()['max'] == 1e-3
+
+
+def test_metrics():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    metrics = m.enable_metrics(sample_interval=1)
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.dataReceived(b'18:.Authorized a1b2c3,')
+    client.dataReceived(b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,' * 10)
+    snapshot = metrics.snapshot()
+    assert snapshot['messages']['QUOTE'] == 10
+    assert snapshot['connects'] == 1
+    quote = b'38:a1b2c3.quote.IBM:125.07 100 125.09 200,'
+    assert snapshot['bytes_received'] == len(b'18:.Authorized a1b2c3,') + 10 * len(quote)
+    assert snapshot['channel_latency']['QUOTE']['count'] == 10
+    assert snapshot['callback_latency']['test_metrics.<locals>.<lambda>']['count'] == 12
+    assert 'txtrader_monitor_messages_total{channel="QUOTE"} 10' in metrics.prometheus()
+
+
+def test_metrics_latency_channels():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    metrics = m.enable_metrics(sample_interval=1)
+    m.enable_latency(channels=['EXECUTION_DATA'])
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.execution-data {"FILL_ID": "f1", "TIME_STAMP": "202008171059450000"}')
+    # channels routed through the latency tracker are timed too
+    assert metrics.snapshot()['channel_latency']['EXECUTION_DATA']['count'] == 1
+    assert m.latency.stages['EXECUTION_DATA']['callback'].count == 1
+
+
+def test_serve_metrics():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    metrics = m.enable_metrics()
+    m._callback('QUOTE', 'IBM:125.07 100 125.09 200')
+    reactor = MemoryReactor()
+    serve_metrics(reactor, metrics, 9100)
+    port, site, backlog, interface = reactor.tcpServers[0]
+    assert (port, interface) == (9100, '127.0.0.1')
+    channel = site.buildProtocol(None)
+    transport = StringTransport()
+    channel.makeConnection(transport)
+    channel.dataReceived(b'GET /metrics HTTP/1.0\r\n\r\n')
+    headers, body = transport.value().split(b'\r\n\r\n', 1)
+    assert headers.startswith(b'HTTP/1.0 200 OK')
+    assert b'content-type: text/plain; version=0.0.4' in headers.lower()
+    assert b'txtrader_monitor_messages_total{channel="QUOTE"} 1' in body
@@ -0,0 +1,154 @@
+#!/bin/env python
+
+import io
+import json
+
+import pytest
+from twisted.internet.task import Clock
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient, channel_list
+from txtrader_monitor.message import JSONMessage
+from txtrader_monitor.output import OutputWriter, CSV_HEADER
+
+
+class BrokenStream(object):
+
+    def write(self, data):
+        raise BrokenPipeError(32, 'Broken pipe')
+
+    def flush(self):
+        pass
+
+
+def _writer(format, **kwargs):
+    writer = OutputWriter(io.StringIO(), format, **kwargs)
+    writer.clock = lambda: 1597676385.5
+    return writer
+
+
+def test_text():
+    writer = _writer('text')
+    assert writer.write('QUOTE', 'IBM:125.07 100 125.09 200')
+    assert writer.write('QUOTE', memoryview(b'MSFT:210.01 100 210.03 200'))
+    assert writer.stream.getvalue() == ''
+    writer.flush()
+    assert writer.stream.getvalue() == 'QUOTE: IBM:125.07 100 125.09 200\nQUOTE: MSFT:210.01 100 210.03 200\n'
+    assert writer.written == 2
+
+
+def test_ndjson():
+    writer = _writer('ndjson')
+    writer.write('EXECUTION_DATA', '{"FILL_ID": "f1", "PRICE": 125.08}')
+    writer.write('ORDERS', 2)
+    writer.write('STATUS', '.Authorized "a/b"')
+    writer.write('ORDER_DATA', '{\n"permid": "p1"\n}')
+    writer.flush()
+    lines = writer.stream.getvalue().splitlines()
+    assert len(lines) == 4
+    records = [json.loads(line) for line in lines]
+    assert records[0] == {
+        'channel': 'EXECUTION_DATA',
+        'timestamp': 1597676385.5,
+        'data': {
+            'FILL_ID': 'f1',
+            'PRICE': 125.08
+        }
+    }
+    assert records[1]['data'] == 2
+    assert records[2]['data'] == '.Authorized "a/b"'
+    assert records[3]['data'] == '{\n"permid": "p1"\n}'
+
+
+@pytest.mark.parametrize('payload', ['{"permid": "p1"', '{"permid": "p1"} trailing', 'not json', ''])
+def test_ndjson_invalid(payload):
+    writer = _writer('ndjson')
+    writer.write('ORDER_DATA', payload)
+    writer.write('ORDER_DATA', JSONMessage('{"permid": "p2"}'))
+    writer.flush()
+    records = [json.loads(line) for line in writer.stream.getvalue().splitlines()]
+    # a payload that does not parse is written as a string, keeping every line valid JSON
+    assert [record['data'] for record in records] == [payload, {'permid': 'p2'}]
+    assert writer.invalid == 1
+
+
+def test_ndjson_validate_json():
+    # a str payload is only checked for its outer braces, unless validate_json is set
+    payload = '{"permid": }'
+    writer = _writer('ndjson')
+    writer.write('ORDER_DATA', payload)
+    assert writer.lines == [f'{{"channel":"ORDER_DATA","timestamp":1597676385.500000,"data":{payload}}}\n']
+    writer = _writer('ndjson', validate_json=True)
+    writer.write('ORDER_DATA', payload)
+    writer.flush()
+    assert json.loads(writer.stream.getvalue())['data'] == payload
+    assert writer.invalid == 1
+
+
+def test_csv():
+    writer = _writer('csv')
+    writer.write('QUOTE', 'IBM:125.07 100 125.09 200 1597676385.25')
+    writer.write('TRADE', 'IBM:125.08 75 1000000')
+    writer.write('QUOTE', 'IBM:garbled')
+    writer.flush()
+    assert writer.stream.getvalue() == CSV_HEADER + (
+        '1597676385.500000,QUOTE,IBM,125.07,100,125.09,200,,,,1597676385.25\n'
+        '1597676385.500000,TRADE,IBM,,,,,125.08,75,1000000,\n'
+    )
+    assert writer.errors == 1
+
+
+def test_buffer_and_interval():
+    writer = _writer('text', buffer_lines=3, flush_interval=1)
+    clock = Clock()
+    writer.start(clock)
+    writer.write('TIME', '2020-08-17 10:59:45')
+    writer.write('TIME', '2020-08-17 10:59:46')
+    assert writer.written == 0
+    writer.write('TIME', '2020-08-17 10:59:47')
+    assert writer.written == 3
+    writer.write('TIME', '2020-08-17 10:59:48')
+    clock.advance(1)
+    assert writer.written == 4
+    writer.write('TIME', '2020-08-17 10:59:49')
+    writer.close()
+    assert writer.written == 5
+    assert not clock.getDelayedCalls()
+
+
+def test_broken_pipe():
+    writer = OutputWriter(BrokenStream(), 'text', buffer_lines=1)
+    assert not writer.write('TIME', '2020-08-17 10:59:45')
+    assert writer.broken
+    assert not writer.write('TIME', '2020-08-17 10:59:46')
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        OutputWriter(io.StringIO(), 'xml')
+
+
+def test_set_output():
+    m = Monitor()
+    stream = io.StringIO()
+    writer = m.set_output('ndjson', include=channel_list(['quote,trade', 'status']), exclude=['TRADE'], stream=stream)
+    assert m.callbacks['QUOTE'] == writer.write
+    assert m.callbacks['STATUS'] == writer.write
+    assert m.callbacks['TRADE'] is None
+    assert m.callbacks['ORDER'] is None
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    client.stringReceived(b'a1b2c3.trade.IBM:125.08 75 1000000')
+    writer.close()
+    channels = [json.loads(line)['channel'] for line in stream.getvalue().splitlines()]
+    assert channels == ['STATUS', 'QUOTE']
+    with pytest.raises(RuntimeError):
+        m.set_output()
+
+
+def test_unknown_channel():
+    m = Monitor()
+    with pytest.raises(ValueError):
+        m.set_output(include=['QUOTES'])
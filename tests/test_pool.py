@@ -0,0 +1,37 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet import reactor
+
+from txtrader_monitor.fakeserver import FakeServer
+from txtrader_monitor.pool import MonitorPool
+
+
+def test_pool():
+    pool = MonitorPool(callbacks={'*': None})
+    for source in ['broker1', 'broker2']:
+        port = reactor.listenTCP(0, FakeServer(channel=source, quote_rate=1000), interface='127.0.0.1')
+        pool.add(source, host='127.0.0.1', port=port.getHost().port)
+    received = {}
+    health = {}
+
+    def _quote(source, channel, data):
+        received[source] = received.get(source, 0) + 1
+        if all(received.get(s, 0) >= 100 for s in pool.monitors):
+            health.update(pool.health())
+            return False
+        return True
+
+    pool.set_callback('QUOTE', _quote)
+    timeout = reactor.callLater(30, pool.stop)
+    pool.run()
+    assert timeout.active()
+    timeout.cancel()
+    assert min(received.values()) >= 100
+    for source in ['broker1', 'broker2']:
+        assert health[source]['state'] == 'CONNECTED'
+        assert health[source]['channel'] == source
+        assert health[source]['authorized']
+        assert health[source]['connects'] == 1
+        assert health[source]['idle'] < 1
+    assert pool.stopped == set(pool.monitors.values())
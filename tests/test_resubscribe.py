@@ -0,0 +1,76 @@
+#!/bin/env python
+
+import json
+
+import pytest
+from twisted.internet.error import ConnectionLost
+from twisted.internet.testing import StringTransport
+from twisted.python.failure import Failure
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def connect(m):
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    m.connection = client
+    client.dataReceived(b'18:.Authorized a1b2c3,')
+    return client
+
+
+def test_resubscribe():
+    m = Monitor(callbacks={'*': lambda channel, data: True}, reconnect_delay=0.1, reconnect_max_delay=2)
+    assert (m.factory.initialDelay, m.factory.delay, m.factory.maxDelay) == (0.1, 0.1, 2)
+    metrics = m.enable_metrics()
+    orders = m.track_orders()
+    m.send('add IBM')
+    m.send('add MSFT')
+    m.send('del MSFT')
+    client = connect(m)
+    assert client.transport.value() == b'7:add IBM,6:orders,'
+    snapshot = b'a1b2c3.orders: ' + json.dumps({'1': {'permid': '1'}}).encode()
+    client.dataReceived(b'%d:%s,' % (len(snapshot), snapshot))
+    assert orders.last_diff == {'added': ['1'], 'changed': [], 'removed': []}
+    assert m.time_to_resubscribe is None
+
+    m._disconnected(Failure(ConnectionLost()))
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    m.connection = client
+    # commands the STATUS callback already sent on this connection are not repeated
+    m.send('add IBM')
+    client.dataReceived(b'18:.Authorized a1b2c3,')
+    assert client.transport.value() == b'7:add IBM,6:orders,'
+    assert m.time_to_resubscribe >= 0
+    assert metrics.snapshot()['resubscribe_latency']['count'] == 1
+
+
+def test_queued_authorized_callback():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+
+    def _status(channel, data):
+        if data.startswith('.Authorized'):
+            for command in ('add IBM', 'add MSFT'):
+                # the resubscription already ran; subscribe only to new symbols
+                if command not in m.subscriptions:
+                    m.send(command)
+        return True
+
+    m.set_callback('STATUS', _status)
+    scheduler = m.set_priority()
+    m.send('add IBM')
+    client = connect(m)
+    # the resubscription is sent while the '.Authorized' STATUS is still queued for the callback
+    assert client.transport.value() == b'7:add IBM,'
+    scheduler.drain()
+    assert client.transport.value() == b'7:add IBM,8:add MSFT,'
+
+
+@pytest.mark.parametrize('resubscribe', [True, False])
+def test_repeat_add(resubscribe):
+    m = Monitor(callbacks={'*': lambda channel, data: True}, resubscribe=resubscribe)
+    client = connect(m)
+    # commands sent by the user are never deduplicated
+    m.send('add IBM')
+    m.send('add IBM')
+    assert client.transport.value() == b'7:add IBM,7:add IBM,'
@@ -0,0 +1,43 @@
+#!/bin/env python
+
+import pytest
+from twisted.internet.task import Clock
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+
+
+def test_priority():
+    received = []
+
+    def _cb(channel, data):
+        received.append(channel)
+        return True
+
+    m = Monitor(callbacks={'*': _cb})
+    scheduler = m.set_priority(classes=[('high', ['EXECUTION', 'STATUS'], None), ('low', ['QUOTE'], 0)], max_pending=4)
+    scheduler.clock = clock = Clock()
+    paused = []
+    m._pause = paused.append
+    m._resume = paused.remove
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    clock.advance(0)
+    received.clear()
+    for i in range(4):
+        client.stringReceived(b'a1b2c3.quote.IBM:%d 100 125.09 200' % i)
+    assert paused == [scheduler]
+    client.stringReceived(b'a1b2c3.execution.1234 filled')
+    client.stringReceived(b'a1b2c3.trade.IBM:125.08 75 1000')
+    assert received == []
+    # a zero budget delivers one low priority message per reactor iteration
+    scheduler.drain()
+    assert received == ['EXECUTION', 'QUOTE']
+    client.stringReceived(b'a1b2c3.execution.1235 filled')
+    scheduler.drain()
+    assert received[2:] == ['EXECUTION', 'QUOTE']
+    scheduler.drain()
+    assert received[4:] == ['QUOTE']
+    assert paused == []
+    m.set_priority(None)
+    assert received[5:] == ['QUOTE', 'TRADE']
+    assert m.scheduler is None
@@ -0,0 +1,45 @@
+#!/bin/env python
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.shm import QuoteTableReader
+
+READER = """
+import sys
+from txtrader_monitor.shm import QuoteTableReader
+with QuoteTableReader(sys.argv[1]) as reader:
+    quote = reader.get('IBM')
+    print(quote.bid, quote.ask, quote.last)
+"""
+
+
+def test_shared_quotes():
+    name = f'txtrader-test-{os.getpid()}'
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    writer = m.share_quotes(name, slots=2)
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.quote.IBM:125.07 100 125.09 200')
+    client.stringReceived(b'a1b2c3.trade.IBM:125.08 75 1000')
+    reader = QuoteTableReader(name)
+    quote = reader.get('IBM')
+    assert (quote.bid, quote.bid_size, quote.ask, quote.ask_size) == (125.07, 100, 125.09, 200)
+    assert (quote.last, quote.size) == (125.08, 75)
+    assert reader.get('MSFT') is None
+    client.stringReceived(b'a1b2c3.quote.MSFT:210.00 100 210.02 200')
+    client.stringReceived(b'a1b2c3.quote.AAPL:460.00 100 460.02 200')
+    assert writer.dropped == 1
+    assert reader.symbols == ['IBM', 'MSFT']
+    assert reader.get('MSFT').ask == 210.02
+    out = subprocess.run([sys.executable, '-c', READER, name], check=True, capture_output=True, text=True).stdout
+    assert out.split() == ['125.07', '125.09', '125.08']
+    reader.close()
+    m.shutdown('test complete')
+    assert m.quote_table is None
+    with pytest.raises(FileNotFoundError):
+        QuoteTableReader(name)
@@ -0,0 +1,91 @@
+#!/bin/env python
+
+import json
+
+import pytest
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.store import OrderBook
+
+
+def order(permid, symbol='IBM', account='A1', status='Submitted'):
+    return {'permid': permid, 'symbol': symbol, 'account': account, 'status': status}
+
+
+def execution(fill_id, order_id, symbol='IBM', account='A1'):
+    return {'FILL_ID': fill_id, 'ORDER_ID': order_id, 'DISP_NAME': symbol, 'ACCOUNT': account, 'VOLUME': 100}
+
+
+def test_order_book_seed_and_update():
+    book = OrderBook()
+    diff = book.seed({'1': order('1'), '2': order('2', 'MSFT', 'A2')})
+    assert sorted(diff['added']) == ['1', '2']
+    assert book.get('1')['status'] == 'Submitted'
+    assert [o['permid'] for o in book.by_symbol('MSFT')] == ['2']
+    assert [o['permid'] for o in book.by_account('A1')] == ['1']
+    book.update(order('1', 'AAPL', status='Filled'))
+    assert book.by_symbol('IBM') == []
+    assert book.by_symbol('AAPL')[0]['status'] == 'Filled'
+    diff = book.seed({'1': order('1', 'AAPL', status='Filled'), '3': order('3')})
+    assert diff == {'added': ['3'], 'changed': [], 'removed': ['2']}
+    assert book.by_account('A2') == []
+    assert len(book) == 2
+    with pytest.raises(ValueError):
+        book.update({'symbol': 'IBM'})
+
+
+def test_monitor_stores():
+    m = Monitor(callbacks={'*': lambda channel, data: True}, lazy_json=True)
+    orders = m.track_orders()
+    executions = m.track_executions()
+    client = StatusClient(m)
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(f'a1b2c3.orders: {json.dumps({"1": order("1")})}'.encode())
+    client.stringReceived(f'a1b2c3.executions: {json.dumps({"F1": execution("F1", "1")})}'.encode())
+    client.stringReceived(f'a1b2c3.order-data {json.dumps(order("1", status="Filled"))}'.encode())
+    client.stringReceived(f'a1b2c3.execution-data {json.dumps(execution("F2", "1"))}'.encode())
+    assert orders.get('1')['status'] == 'Filled'
+    assert orders.seeded and orders.updates == 1
+    assert sorted(e['FILL_ID'] for e in executions.by_order('1')) == ['F1', 'F2']
+    assert len(executions.by_symbol('IBM')) == 2
+
+
+def test_streamed_snapshot():
+    items = {}
+    m = Monitor(
+        callbacks={'*': lambda channel, data: True},
+        item_callbacks={'ORDERS': lambda channel, key, item: items.update({key: item}) or True}
+    )
+    orders = m.track_orders()
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    for snapshot in ({'1': order('1'), '2': order('2', 'MSFT')}, {'1': order('1', status='Filled'), '3': order('3')}):
+        data = f'a1b2c3.orders: {json.dumps(snapshot)}'.encode()
+        client.dataReceived(b'%d:%s,' % (len(data), data))
+    # the item callbacks still see every item
+    assert sorted(items) == ['1', '2', '3']
+    assert orders.seeded and len(orders) == 2
+    assert orders.get('1')['status'] == 'Filled'
+    assert orders.last_diff == {'added': ['3'], 'changed': ['1'], 'removed': ['2']}
+    assert not orders.streamed
+
+
+def test_invalid_records():
+    m = Monitor(callbacks={'*': lambda channel, data: True})
+    orders = m.track_orders()
+    taps = []
+    m.add_tap(lambda channel, data: 1 / 0, ['ORDER_DATA'])
+    m.add_tap(lambda channel, data: taps.append(data), ['ORDER_DATA'])
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    client.stringReceived(b'a1b2c3.order-data {"symbol": "IBM", "status": "Submitted"}')
+    client.stringReceived(b'a1b2c3.order-data {"permid": "1", "status": ')
+    assert orders.errors == 2 and not len(orders)
+    # neither the store nor a failing tap drop the connection, and later taps still run
+    assert not client.transport.disconnecting
+    assert len(taps) == 2
+    client.stringReceived(f'a1b2c3.order-data {json.dumps(order("1"))}'.encode())
+    assert orders.get('1')['status'] == 'Submitted'
@@ -0,0 +1,63 @@
+#!/bin/env python
+
+import pytest
+import json
+from twisted.internet.testing import StringTransport
+
+from txtrader_monitor.monitor import Monitor, StatusClient
+from txtrader_monitor.streaming import JSONItemStream
+
+ITEMS = {
+    '1549-1323056': {
+        'ORDER_ID': '9b94c305-b9-001a-3',
+        'NOTE': 'brace } bracket ] quote \\" comma ,',
+        'FILLS': [[1, 2], {
+            'a': None
+        }],
+    },
+    '1549-1323057': 'scalar string',
+    '1549-1323058': 125.08,
+    'esc\\"aped': [],
+}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64, 100000])
+def test_item_stream(chunk_size):
+    data = json.dumps(ITEMS, indent=2).encode()
+    parser = JSONItemStream()
+    items = []
+    for i in range(0, len(data), chunk_size):
+        items.extend(parser.feed(data[i:i + chunk_size]))
+    assert parser.done
+    assert dict(items) == ITEMS
+    assert len(parser.buffer) < 100
+
+
+def test_item_callbacks():
+    items = {}
+    received = {}
+
+    def _item(channel, key, item):
+        items[key] = item
+        return True
+
+    def _cb(channel, data):
+        received[channel] = data
+        return True
+
+    m = Monitor(callbacks={'*': _cb}, item_callbacks={'EXECUTIONS': _item})
+    client = StatusClient(m)
+    client.makeConnection(StringTransport())
+    client.controlReceived('.Authorized a1b2c3')
+    messages = [
+        b'a1b2c3.executions: ' + json.dumps(ITEMS).encode(),
+        b'a1b2c3.orders: {}',
+        b'a1b2c3.time: 2020-08-17 10:59:45',
+    ]
+    stream = b''.join(b'%d:%s,' % (len(data), data) for data in messages)
+    for i in range(0, len(stream), 7):
+        client.dataReceived(stream[i:i + 7])
+    assert items == ITEMS
+    assert received['EXECUTIONS'] == len(ITEMS)
+    assert received['ORDERS'] == '{}'
+    assert received['TIME'] == '2020-08-17 10:59:45'
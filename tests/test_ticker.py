@@ -0,0 +1,99 @@
+#!/bin/env python
+
+import pickle
+
+import pytest
+from twisted.internet.task import Clock
+
+from txtrader_monitor.monitor import Monitor
+from txtrader_monitor.ticker import Tick
+
+
+def _monitor():
+    ticks = []
+    m = Monitor(callbacks={'*': None, 'TICK': lambda channel, data: ticks.append(data) or True})
+    clock = Clock()
+    clock.advance(1000)
+    m.tick_scheduler.clock = clock
+    m.tick_scheduler.monotonic = clock.seconds
+    m.tick_scheduler.wall = lambda: clock.seconds() + 1597676000
+    return m, clock, ticks
+
+
+def test_tick():
+    tick = Tick(1597677000.5, 'fast', 1000.5, 2)
+    assert tick == 1597677000.5 and isinstance(tick, float)
+    assert (tick.name, tick.monotonic, tick.missed) == ('fast', 1000.5, 2)
+    copy = pickle.loads(pickle.dumps(tick))
+    assert copy == tick and copy.name == 'fast' and copy.missed == 2
+
+
+def test_intervals():
+    m, clock, ticks = _monitor()
+    fast = m.set_tick_interval(1, 'fast')
+    m.set_tick_interval(2.5, 'slow')
+    # one reactor timer for every interval
+    assert len(clock.getDelayedCalls()) == 1
+    clock.advance(0)
+    assert [t.name for t in ticks] == ['fast', 'slow']
+    del ticks[:]
+    for i in range(5):
+        clock.advance(1)
+    assert [(t.name, t.monotonic) for t in ticks] == [
+        ('fast', 1001),
+        ('fast', 1002),
+        ('slow', 1002.5),
+        ('fast', 1003),
+        ('fast', 1004),
+        ('slow', 1005),
+        ('fast', 1005),
+    ]
+    assert ticks[0] == 1597677001
+    assert len(clock.getDelayedCalls()) == 1
+    with pytest.raises(ValueError):
+        m.set_tick_interval(1, 'fast')
+
+    # stop_ticker() by Timer or name
+    m.stop_ticker(fast)
+    assert not fast.running
+    del ticks[:]
+    for i in range(5):
+        clock.advance(1)
+    assert [t.name for t in ticks] == ['slow', 'slow']
+    m.stop_ticker('slow')
+    assert not clock.getDelayedCalls()
+
+
+def test_skip():
+    m, clock, ticks = _monitor()
+    timer = m.set_tick_interval(1)
+    clock.advance(0)
+    # the reactor was busy for 3.5 intervals
+    clock.advance(3.5)
+    assert [(t.monotonic, t.missed) for t in ticks] == [(1000, 0), (1003, 2)]
+    assert timer.missed == 2
+    # no drift: the next tick is due on the original schedule
+    clock.advance(0.5)
+    assert ticks[-1].monotonic == 1004 and ticks[-1].missed == 0
+    assert ticks[-1].name == 'tick1'
+
+
+def test_catchup():
+    m, clock, ticks = _monitor()
+    m.tick_scheduler.max_catchup = 3
+    m.set_tick_interval(1, policy='catchup')
+    clock.advance(0)
+    clock.advance(5.5)
+    assert [(t.monotonic, t.missed) for t in ticks] == [(1000, 0), (1003, 2), (1004, 0), (1005, 0)]
+    del ticks[:]
+    clock.advance(0.5)
+    assert [(t.monotonic, t.missed) for t in ticks] == [(1006, 0)]
+
+
+def test_shutdown():
+    m, clock, ticks = _monitor()
+    m.set_tick_interval(1)
+    m.set_tick_interval(3)
+    m.shutdown('test')
+    assert not clock.getDelayedCalls()
+    assert not m.tick_scheduler.timers
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  aio.py
+  ------
+
+  TxTrader AsyncMonitor - asyncio-native monitor with an async iterator API
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import os
+import asyncio
+import logging
+
+from twisted.protocols.basic import NetstringParseError
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.connection_state import ConnectionState
+from txtrader_monitor.protocol import StatusReceiver
+from txtrader_monitor.streaming import NetstringDecoder
+from txtrader_monitor.monitor import (
+    LINE_BUFFER_LENGTH, DEFAULT_TXTRADER_HOST, DEFAULT_TXTRADER_TCP_PORT, DEFAULT_TXTRADER_USERNAME,
+    DEFAULT_TXTRADER_PASSWORD, DEFAULT_WIRE_TRACE_MAX_BYTES, wire_trace_logger
+)
+
+# messages buffered per stream before reading from the server is paused
+DEFAULT_STREAM_QUEUE = 10000
+
+
+class AsyncStatusClient(StatusReceiver, asyncio.Protocol):
+
+    MAX_LENGTH = LINE_BUFFER_LENGTH
+
+    def __init__(self, controller):
+        self.initReceiver(controller)
+        self.logger.info('%s __init__(%s)', self, hex(id(controller)))
+        self.transport = None
+        self.netstrings = NetstringDecoder(self.stringReceived, self.streamRoute, self.MAX_LENGTH)
+
+    def connection_made(self, transport):
+        self.logger.info("%s connection_made()", self)
+        self.transport = transport
+        self.controller._connected(self)
+
+    def connection_lost(self, exc):
+        self.logger.info("%s connection_lost(%s)", self, exc)
+        self.controller._disconnected(exc)
+
+    def data_received(self, data):
+        try:
+            self.netstrings.feed(data)
+        except (NetstringParseError, ValueError) as e:
+            self.logger.error('%s %s', self, e)
+            self.transport.close()
+
+    def sendString(self, data):
+        self.transport.write(b'%d:%s,' % (len(data), data))
+
+
+class MessageStream(object):
+    """bounded queue of (channel, message) tuples for one AsyncMonitor.stream() consumer"""
+
+    def __init__(self, controller, channels, max_queue):
+        self.controller = controller
+        self.channels = set(channels) if channels else None
+        self.max_queue = max_queue
+        self.queue = asyncio.Queue()
+        self.paused = False
+
+    def put(self, item):
+        self.queue.put_nowait(item)
+        if item and self.max_queue and self.queue.qsize() >= self.max_queue and not self.paused:
+            self.paused = True
+            self.controller._pause(self)
+
+    async def get(self):
+        item = await self.queue.get()
+        if self.paused and self.queue.qsize() <= self.max_queue // 2:
+            self.paused = False
+            self.controller._resume(self)
+        return item
+
+
+class AsyncMonitor(object):
+
+    def __init__(
+        self,
+        host: str = None,
+        port: int = None,
+        username: str = None,
+        password: str = None,
+        options: dict = {},
+        raw: bool = False,
+        lazy_json: bool = False,
+        logger: logging.Logger = None,
+        wire_trace: str = None,
+        wire_trace_max_bytes: int = DEFAULT_WIRE_TRACE_MAX_BYTES,
+    ):
+        """Initialize AsyncMonitor:
+          connection parameters: host, port, username, password, options, raw, lazy_json as for Monitor
+          logger, wire_trace, wire_trace_max_bytes: as for Monitor, but logging configuration is left to the caller
+
+          async with AsyncMonitor() as monitor:
+              await monitor.send('executions')
+              async for channel, msg in monitor.stream(channels=['EXECUTIONS']):
+                  ...
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.wire_trace = wire_trace_logger(wire_trace, wire_trace_max_bytes) if wire_trace else None
+        self.logger.info("%s __init__(%s, %s, %s, XXXXXXXX, %s)", self, host, port, username, options)
+
+        if not isinstance(options, dict):
+            raise ValueError(f'options: expected dict type, got {type(options)}')
+
+        self.host = host or os.environ.get('TXTRADER_HOST', DEFAULT_TXTRADER_HOST)
+        self.port = int(port or os.environ.get('TXTRADER_TCP_PORT', DEFAULT_TXTRADER_TCP_PORT))
+        self.username = username or os.environ.get('TXTRADER_USERNAME', DEFAULT_TXTRADER_USERNAME)
+        self.password = password or os.environ.get('TXTRADER_PASSWORD', DEFAULT_TXTRADER_PASSWORD)
+
+        self.options = options
+        self.raw = raw
+        self.lazy_json = lazy_json
+        self.item_callbacks = {}
+        self.wire_taps = []
+
+        self.connection_state = ConnectionState.INITIALIZING
+        self.connection = None
+        self.channel = None
+        self.authorized = None
+        self.streams = set()
+        self.paused_by = set()
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def connect(self):
+        """connect to the server and wait for authorization"""
+        self.logger.info('%s connect()', self)
+        loop = asyncio.get_running_loop()
+        self.authorized = loop.create_future()
+        self.set_connection_state(ConnectionState.CONNECTING)
+        await loop.create_connection(lambda: AsyncStatusClient(self), self.host, self.port)
+        await self.authorized
+
+    async def send(self, command):
+        if not self.connection:
+            raise ConnectionError(f'send failed; connection state is {self.connection_state.name}')
+        self.connection.send(command)
+
+    async def close(self, reason='client requested shutdown'):
+        self.logger.info('%s close(reason=%s)', self, reason)
+        if self.connection:
+            self.connection.send(f'exit {reason}')
+            self.connection.transport.close()
+        self.set_connection_state(ConnectionState.SHUTDOWN)
+
+    async def stream(self, channels: list = None, max_queue: int = DEFAULT_STREAM_QUEUE):
+        """async iterator of (channel, message) for channels (default all) until the connection is lost"""
+        for channel in channels or []:
+            if channel not in ALL_CHANNELS:
+                raise ValueError(f'unknown channel {channel}')
+        stream = MessageStream(self, channels, max_queue)
+        self.streams.add(stream)
+        try:
+            while True:
+                item = await stream.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self.streams.discard(stream)
+            if stream.paused:
+                self._resume(stream)
+
+    def set_connection_state(self, state):
+        if self.connection_state != state:
+            self.connection_state = state
+            self._callback(Channel.CONNECTION, state.name)
+
+    def _connected(self, connection):
+        self.connection = connection
+        self.set_connection_state(ConnectionState.CONNECTED)
+
+    def _authorized(self, channel):
+        self.channel = channel
+        if not self.authorized.done():
+            self.authorized.set_result(channel)
+
+    def _disconnected(self, exc):
+        self.connection = None
+        self.set_connection_state(ConnectionState.DISCONNECTED)
+        if self.authorized and not self.authorized.done():
+            self.authorized.set_exception(exc or ConnectionError('connection closed before authorization'))
+        for stream in self.streams:
+            stream.put(None)
+
+    def _pause(self, source):
+        if not self.paused_by and self.connection:
+            self.connection.transport.pause_reading()
+        self.paused_by.add(source)
+
+    def _resume(self, source):
+        self.paused_by.discard(source)
+        if not self.paused_by and self.connection:
+            self.connection.transport.resume_reading()
+
+    def _callback(self, channel: Channel, data):
+        if isinstance(channel, Channel):
+            channel = channel.name
+        for stream in self.streams:
+            if stream.channels is None or channel in stream.channels:
+                stream.put((channel, data))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  archive.py
+  ----------
+
+  TxTrader ArchiveWriter - batch channel messages into compressed, typed Parquet segment files
+
+  Each archived channel is written to DIRECTORY/CHANNEL/CHANNEL-YYYYmmddTHHMMSS-NNNN.parquet.  A segment is
+  written as a hidden .tmp file and renamed when it is complete, so a finished segment name is never a
+  partial file; .tmp files left in place are segments interrupted by a crash.  pyarrow.parquet.read_table()
+  of a channel directory skips them.
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import os
+import time
+import logging
+import threading
+from queue import Queue
+
+import ujson
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.message import JSON_CHANNELS
+from txtrader_monitor.store import decode
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_CHANNELS = [
+    Channel.QUOTE.name,
+    Channel.TRADE.name,
+    Channel.ORDER_DATA.name,
+    Channel.EXECUTION_DATA.name,
+    Channel.ORDER.name,
+    Channel.EXECUTION.name,
+]
+
+# rows per channel handed to the writer thread at once
+DEFAULT_BATCH_ROWS = 10000
+
+# seconds between hand-offs of partial batches
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# a segment is finalized and a new one started after this many seconds or bytes
+DEFAULT_ROTATE_SECONDS = 3600
+DEFAULT_ROTATE_BYTES = 0x10000000
+
+# batches waiting for the writer thread before reading from the server is paused
+DEFAULT_MAX_BATCHES = 64
+
+JSON_CHANNEL_NAMES = frozenset(c.name for c in JSON_CHANNELS)
+SNAPSHOT_CHANNELS = [Channel.ORDERS.name, Channel.EXECUTIONS.name]
+
+
+def channel_schema(channel: str):
+    """return the pyarrow schema of a QUOTE, TRADE or text channel segment; None for the JSON channels, whose
+       record columns are inferred from the first batch of a segment
+    """
+    if channel in JSON_CHANNEL_NAMES:
+        return None
+    symbol = pa.dictionary(pa.int32(), pa.string())
+    if channel == Channel.QUOTE.name:
+        return pa.schema([('time', pa.float64()), ('symbol', symbol), ('bid', pa.float64()), ('bid_size', pa.int64()),
+                          ('ask', pa.float64()), ('ask_size', pa.int64()), ('server_time', pa.float64())])
+    if channel == Channel.TRADE.name:
+        return pa.schema([('time', pa.float64()), ('symbol', symbol), ('last', pa.float64()), ('size', pa.int64()),
+                          ('volume', pa.int64()), ('server_time', pa.float64())])
+    return pa.schema([('time', pa.float64()), ('data', pa.string())])
+
+
+class Segment(object):
+    """One open segment file of a channel"""
+
+    def __init__(self, path: str, schema, compression: str):
+        self.path = path
+        self.temp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+        self.file = open(self.temp_path, 'wb')
+        self.writer = pq.ParquetWriter(self.file, schema, compression=compression)
+        self.schema = schema
+        self.opened = time.monotonic()
+        self.rows = 0
+
+    def write(self, table):
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+
+    @property
+    def size(self):
+        return self.file.tell()
+
+    def finalize(self):
+        """write the Parquet footer, sync, and rename the segment to its final name"""
+        self.writer.close()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+        directory = os.open(os.path.dirname(self.path), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class ArchiveWriter(object):
+    """Monitor tap archiving the messages of channels to Parquet segment files (requires pyarrow)
+
+    The tap only appends (receive time, payload) to a per-channel batch; parsing, column building,
+    compression and file writes run in one writer thread.  Batches are handed off at batch_rows and every
+    flush_interval seconds.  QUOTE and TRADE payloads become typed price and size columns, JSON channel
+    records become one column per field, and other channels are stored as text.  Segments are rotated
+    every rotate_seconds or at rotate_bytes, and finalized by close().  When max_batches wait for the
+    writer thread, reading from the server is paused until half have been written.
+    """
+
+    def __init__(
+        self,
+        controller,
+        directory: str,
+        channels: list = DEFAULT_ARCHIVE_CHANNELS,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        rotate_seconds: float = DEFAULT_ROTATE_SECONDS,
+        rotate_bytes: int = DEFAULT_ROTATE_BYTES,
+        compression: str = 'zstd',
+        max_batches: int = DEFAULT_MAX_BATCHES
+    ):
+        if pa is None:
+            raise ImportError('ArchiveWriter requires pyarrow; pip install txtrader-monitor[archive]')
+        for channel in channels:
+            if channel not in ALL_CHANNELS:
+                raise ValueError(f'unknown channel {channel}')
+        self.controller = controller
+        self.directory = directory
+        self.channels = list(channels)
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.rotate_seconds = rotate_seconds
+        self.rotate_bytes = rotate_bytes
+        self.compression = compression
+        self.max_batches = max_batches
+        self.clock = time.time
+        self.batches = {channel: [] for channel in self.channels}
+        self.segments = {}
+        self.segment_count = 0
+        self.finalized = []
+        self.rows = 0
+        self.errors = 0
+        self.pending = 0
+        self.blocked = False
+        self.lock = threading.Lock()
+        self.queue = Queue()
+        for channel in self.channels:
+            os.makedirs(os.path.join(directory, channel), exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name=str(self), daemon=True)
+        self.thread.start()
+        self.flusher = None
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def start(self, clock=reactor):
+        """hand off partial batches every flush_interval seconds on clock"""
+        if not self.flusher:
+            self.flusher = LoopingCall(self.flush)
+            self.flusher.clock = clock
+            self.flusher.start(self.flush_interval, now=False)
+
+    def tap(self, channel: str, data):
+        """Monitor tap function; see Monitor.add_tap()"""
+        if isinstance(data, int):
+            # item count of a streamed snapshot
+            return
+        if not isinstance(data, str):
+            data = bytes(data)
+        batch = self.batches[channel]
+        batch.append((self.clock(), data))
+        if len(batch) >= self.batch_rows:
+            self._submit(channel)
+
+    def _submit(self, channel):
+        batch = self.batches[channel]
+        self.batches[channel] = []
+        with self.lock:
+            self.pending += 1
+            blocked = self.pending >= self.max_batches and not self.blocked
+        if blocked:
+            self.blocked = True
+            self.controller._pause(self)
+        self.queue.put((channel, batch))
+
+    def flush(self):
+        """hand off every partial batch, and let the writer thread rotate expired segments"""
+        for channel, batch in self.batches.items():
+            if batch:
+                self._submit(channel)
+        self.queue.put((None, None))
+
+    def close(self):
+        """write everything batched, finalize the open segments and stop the writer thread"""
+        if self.flusher and self.flusher.running:
+            self.flusher.stop()
+        self.flusher = None
+        if self.thread:
+            self.flush()
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.blocked:
+            self._unblock()
+        logger.info('%s close() %s rows, %s segments', self, self.rows, len(self.finalized))
+
+    def _unblock(self):
+        if self.blocked:
+            self.blocked = False
+            self.controller._resume(self)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            channel, batch = item
+            try:
+                if channel is None:
+                    self._rotate_expired()
+                else:
+                    self._write(channel, batch)
+            except Exception as ex:
+                logger.error('%s %s: %r', self, channel, ex)
+                self.errors += 1
+            if channel is not None:
+                with self.lock:
+                    self.pending -= 1
+                    unblock = self.blocked and self.pending <= self.max_batches // 2
+                if unblock:
+                    reactor.callFromThread(self._unblock)
+        for channel in list(self.segments):
+            self._finalize(channel)
+
+    def _write(self, channel, batch):
+        if channel == Channel.QUOTE.name or channel == Channel.TRADE.name:
+            table = self._market_table(channel, batch)
+        elif channel in JSON_CHANNEL_NAMES:
+            table = self._record_table(channel, batch)
+        else:
+            table = pa.table([[t for t, data in batch], [self._text(data) for t, data in batch]],
+                             schema=channel_schema(channel))
+        if not table.num_rows:
+            return
+        segment = self.segments.get(channel)
+        if segment and not segment.schema.equals(table.schema):
+            table = self._conform(table, segment.schema)
+            if not table.schema.equals(segment.schema):
+                # the record fields changed; start a new segment with the new columns
+                self._finalize(channel)
+                segment = None
+        if not segment:
+            segment = self._open(channel, table.schema)
+        segment.write(table)
+        self.rows += table.num_rows
+        if segment.size >= self.rotate_bytes:
+            self._finalize(channel)
+
+    def _text(self, data):
+        return data if isinstance(data, str) else data.decode()
+
+    def _market_table(self, channel, batch):
+        quote = channel == Channel.QUOTE.name
+        width = 4 if quote else 3
+        columns = [[] for i in range(width + 3)]
+        for t, data in batch:
+            symbol, dummy, fields = self._text(data).partition(':')
+            fields = fields.split()
+            try:
+                if quote:
+                    row = (float(fields[0]), int(fields[1]), float(fields[2]), int(fields[3]))
+                else:
+                    row = (float(fields[0]), int(fields[1]), int(fields[2]))
+                server_time = float(fields[width]) if len(fields) > width else None
+            except (ValueError, IndexError):
+                self.errors += 1
+                continue
+            columns[0].append(t)
+            columns[1].append(symbol)
+            for column, value in zip(columns[2:], row):
+                column.append(value)
+            columns[-1].append(server_time)
+        schema = channel_schema(channel)
+        columns[1] = pa.array(columns[1], pa.string()).dictionary_encode()
+        return pa.table(columns, schema=schema)
+
+    def _record_table(self, channel, batch):
+        times = []
+        records = []
+        for t, data in batch:
+            try:
+                record = decode(data)
+            except ValueError:
+                self.errors += 1
+                continue
+            if channel in SNAPSHOT_CHANNELS:
+                # one row per order or execution of the snapshot
+                rows = list(record.values())
+            else:
+                rows = [record]
+            times.extend([t] * len(rows))
+            records.extend(rows)
+        try:
+            table = pa.Table.from_pylist(records)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # fields with mixed types; keep the record text
+            self.errors += 1
+            table = pa.table({'record': [ujson.dumps(record) for record in records]})
+        return table.add_column(0, 'time', pa.array(times, pa.float64()))
+
+    def _conform(self, table, schema):
+        """return table cast to schema if it has the same columns, else table"""
+        if set(table.schema.names) != set(schema.names):
+            return table
+        try:
+            return table.select(schema.names).cast(schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return table
+
+    def _open(self, channel, schema):
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        self.segment_count += 1
+        path = os.path.join(self.directory, channel, f'{channel}-{stamp}-{self.segment_count:04d}.parquet')
+        segment = self.segments[channel] = Segment(path, schema, self.compression)
+        logger.info('%s open %s', self, segment.temp_path)
+        return segment
+
+    def _finalize(self, channel):
+        segment = self.segments.pop(channel)
+        segment.finalize()
+        self.finalized.append(segment.path)
+        logger.info('%s finalized %s, %s rows', self, segment.path, segment.rows)
+
+    def _rotate_expired(self):
+        now = time.monotonic()
+        for channel, segment in list(self.segments.items()):
+            if now - segment.opened >= self.rotate_seconds:
+                self._finalize(channel)
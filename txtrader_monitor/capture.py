@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  capture.py
+  ----------
+
+  TxTrader capture files - record raw server netstrings and replay them through a Monitor
+
+  A capture file is CAPTURE_MAGIC followed by records of (float64 wall clock time, uint32 length, bytes),
+  optionally gzip compressed.  Sessions recorded into the same file are appended; a capture left by a
+  process that did not close it is cut back to its last complete record before the next session is added.
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import os
+import gzip
+import zlib
+import time
+import struct
+import logging
+
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b'TXTRADER-CAPTURE-1\n'
+GZIP_MAGIC = b'\x1f\x8b'
+RECORD_HEADER = struct.Struct('<dI')
+
+# write buffer size; records are flushed when it fills or the capture is closed
+CAPTURE_BUFFER_SIZE = 0x100000
+
+# seconds between flushes of a capture started with start(); records after the last flush are lost on a crash
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# first message of each server session; replay timing restarts here
+SESSION_PREFIX = b'.connected'
+
+READ_CHUNK_SIZE = 0x100000
+
+
+def complete_records(data: bytes, offset: int = 0):
+    """return the end offset of the last complete record in data, reading records from offset"""
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        timestamp, length = RECORD_HEADER.unpack_from(data, offset)
+        if offset + RECORD_HEADER.size + length > end:
+            break
+        offset += RECORD_HEADER.size + length
+    return offset
+
+
+def repair_plain(path: str):
+    """truncate an uncompressed capture after its last complete record; returns the number of bytes dropped"""
+    size = os.path.getsize(path)
+    offset = len(CAPTURE_MAGIC)
+    with open(path, 'r+b') as f:
+        while True:
+            f.seek(offset)
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            timestamp, length = RECORD_HEADER.unpack(header)
+            if offset + RECORD_HEADER.size + length > size:
+                break
+            offset += RECORD_HEADER.size + length
+        offset = min(offset, size)
+        if offset < size:
+            f.truncate(offset)
+    return size - offset
+
+
+def repair_gzip(path: str):
+    """cut a gzip capture back to its complete gzip members and rewrite the complete records of an unfinished
+       last member (flushed by the writer before it stopped) as a new member; returns the bytes dropped
+    """
+    size = os.path.getsize(path)
+    complete = offset = 0
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    tail = bytearray()
+    with open(path, 'rb') as f:
+        pending = b''
+        while True:
+            chunk = pending or f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending = b''
+            try:
+                tail += decompressor.decompress(chunk)
+            except zlib.error:
+                break
+            if decompressor.eof:
+                used = len(chunk) - len(decompressor.unused_data)
+                offset += used
+                complete = offset
+                pending = decompressor.unused_data
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                tail = bytearray()
+            else:
+                offset += len(chunk)
+    if complete == size:
+        return 0
+    # members start at a session, after the file header in the first one
+    start = len(CAPTURE_MAGIC) if complete == 0 else 0
+    end = complete_records(tail, start) if len(tail) >= start else 0
+    with open(path, 'r+b') as f:
+        f.truncate(complete)
+    if end:
+        with gzip.open(path, 'ab', compresslevel=1) as f:
+            f.write(tail[:end])
+    return len(tail) - end
+
+
+class CaptureWriter(object):
+    """Append raw netstring payloads with a wall clock timestamp to a capture file
+
+    Records are buffered; call flush(), or start() to flush every flush_interval seconds, to bound what a crash
+    loses.  A gzip capture is complete only after close(), but read_capture() reads the flushed records of an
+    unclosed one, and the next CaptureWriter on the file cuts it back to its last complete record.
+    """
+
+    def __init__(self, path: str, compress: bool = None, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if compress is None:
+            compress = path.endswith('.gz')
+        logger.info('%s __init__(%s, compress=%s)', self, path, compress)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flusher = None
+        empty = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not empty:
+            dropped = repair_gzip(path) if compress else repair_plain(path)
+            if dropped:
+                logger.warning('%s %s: dropped %s bytes of an incomplete record', self, path, dropped)
+        if compress:
+            self.file = gzip.open(path, 'ab', compresslevel=1)
+        else:
+            self.file = open(path, 'ab', buffering=CAPTURE_BUFFER_SIZE)
+        if empty:
+            self.file.write(CAPTURE_MAGIC)
+        self.count = 0
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def write(self, data: bytes):
+        self.file.write(RECORD_HEADER.pack(time.time(), len(data)))
+        self.file.write(data)
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def start(self, clock=reactor):
+        """flush every flush_interval seconds on clock"""
+        if not self.flusher:
+            self.flusher = LoopingCall(self.flush)
+            self.flusher.clock = clock
+            self.flusher.start(self.flush_interval, now=False)
+
+    def close(self):
+        logger.info('%s close() %s records', self, self.count)
+        if self.flusher and self.flusher.running:
+            self.flusher.stop()
+        self.flusher = None
+        self.file.close()
+
+
+def read_capture(path: str):
+    """generate (time, data) records from a capture file, up to the last complete record"""
+    with open(path, 'rb') as f:
+        compressed = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+    opener = gzip.open if compressed else open
+    with opener(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f'{path}: not a txtrader capture file')
+        while True:
+            try:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                timestamp, length = RECORD_HEADER.unpack(header)
+                data = f.read(length)
+            except (EOFError, zlib.error):
+                # a gzip capture whose writer did not close it
+                return
+            if len(data) < length:
+                return
+            yield timestamp, data
+
+
+class ReplayTransport(object):
+    """Transport of a replayed connection: commands sent to the server are counted and discarded"""
+
+    disconnecting = False
+
+    def __init__(self):
+        self.written = 0
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def write(self, data):
+        self.written += len(data)
+
+    def writeSequence(self, data):
+        for chunk in data:
+            self.write(chunk)
+
+    def pauseProducing(self):
+        pass
+
+    def resumeProducing(self):
+        pass
+
+    def stopProducing(self):
+        pass
+
+    def loseConnection(self):
+        self.disconnecting = True
+
+
+def replay(controller, path: str, speed: float = None):
+    """Feed a capture file through a StatusClient connected to controller, without a server or reactor;
+      records are framed as netstrings again, so streamed snapshots reach item callbacks as when recorded
+      speed: None replays as fast as possible, 1.0 at the recorded rate, 2.0 at twice the recorded rate...
+        the time between recorded sessions is skipped
+      returns the number of messages replayed
+    """
+    from txtrader_monitor.monitor import StatusClient
+
+    client = StatusClient(controller)
+    client.makeConnection(ReplayTransport())
+    count = 0
+    start = first = None
+    for timestamp, data in read_capture(path):
+        if speed:
+            if first is None or data.startswith(SESSION_PREFIX):
+                start, first = time.monotonic(), timestamp
+            delay = (timestamp-first) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        client.dataReceived(b'%d:%s,' % (len(data), data))
+        count += 1
+    return count
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  conflate.py
+  -----------
+
+  TxTrader Conflator - per-symbol latest-value coalescing of QUOTE and TRADE updates
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+from collections import defaultdict
+
+from twisted.internet import reactor
+
+from txtrader_monitor.channel import Channel
+from txtrader_monitor.quote import message_symbol
+
+DEFAULT_CONFLATE_CHANNELS = [Channel.QUOTE.name, Channel.TRADE.name]
+
+
+class Conflator(object):
+    """Hold only the latest update per (channel, symbol) and deliver pending updates in one flush
+
+    With interval=0 the flush runs as soon as the reactor is free, after all messages already read from
+    the socket have been parsed; otherwise pending updates are flushed at most once every interval seconds.
+    """
+
+    def __init__(self, controller, channels: list = DEFAULT_CONFLATE_CHANNELS, interval: float = 0):
+        self.controller = controller
+        self.channels = set(channels)
+        self.interval = interval
+        self.clock = reactor
+        self.pending = {}
+        self.flush_call = None
+        # updates replaced by a newer one before delivery, by symbol
+        self.conflated = defaultdict(int)
+        self.received = 0
+        self.delivered = 0
+
+    def put(self, channel: str, data):
+        key = (channel, message_symbol(data))
+        if key in self.pending:
+            self.conflated[key[1]] += 1
+        self.pending[key] = data
+        self.received += 1
+        if not self.flush_call:
+            self.flush_call = self.clock.callLater(self.interval, self.flush)
+
+    def flush(self):
+        self.flush_call = None
+        pending, self.pending = self.pending, {}
+        for (channel, symbol), data in pending.items():
+            self.delivered += 1
+            self.controller._schedule(channel, data)
+
+    def stop(self):
+        if self.flush_call and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+        self.pending = {}
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  dedup.py
+  --------
+
+  TxTrader Deduplicator - suppress messages that repeat the last payload for their symbol, order or channel
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+from collections import OrderedDict, defaultdict
+
+import ujson
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.message import JSON_CHANNELS
+from txtrader_monitor.quote import message_symbol
+from txtrader_monitor.store import decode
+
+# {channel: None to compare the whole payload, or a list of JSON record fields to compare}
+DEFAULT_DEDUP_CHANNELS = {Channel.QUOTE.name: None, Channel.ORDER.name: None}
+
+# keys remembered before the least recently seen is dropped
+DEFAULT_MAX_KEYS = 100000
+
+JSON_CHANNEL_NAMES = frozenset(c.name for c in JSON_CHANNELS)
+
+# record field identifying the order or execution of a JSON channel message
+KEY_FIELDS = {Channel.ORDER_DATA.name: 'permid', Channel.EXECUTION_DATA.name: 'FILL_ID'}
+
+
+def symbol_key(data):
+    return message_symbol(data)
+
+
+def word_key(data):
+    """first word of a notification payload, the order, execution or ticket id"""
+    if isinstance(data, str):
+        return data.partition(' ')[0]
+    return bytes(data).partition(b' ')[0].decode()
+
+
+def channel_key(data):
+    return None
+
+
+DEFAULT_KEYS = {
+    Channel.QUOTE.name: symbol_key,
+    Channel.TRADE.name: symbol_key,
+    Channel.ORDER.name: word_key,
+    Channel.EXECUTION.name: word_key,
+    Channel.TICKET.name: word_key,
+}
+
+
+def payload_hash(data):
+    """return the hash of a str, bytes, memoryview or JSONBuffer payload"""
+    raw = getattr(data, 'raw', None)
+    return hash(raw if raw is not None else data)
+
+
+class Deduplicator(object):
+    """Drop a message when its value equals the last value seen for its key on the same channel
+
+    channels maps a channel name to None, comparing the hash of the whole payload, or to a list of JSON
+    record fields, comparing only those.  The key is the symbol for QUOTE and TRADE, the first word (order,
+    execution or ticket id) for ORDER, EXECUTION and TICKET, the KEY_FIELDS record field for ORDER_DATA and
+    EXECUTION_DATA, and the channel itself otherwise; keys maps a channel to a record field name or a
+    function(data) returning the key instead.  The last values of up to max_keys keys are kept, least
+    recently seen dropped first.  Item counts of streamed snapshots are never suppressed.
+    """
+
+    def __init__(self, channels: dict = DEFAULT_DEDUP_CHANNELS, keys: dict = {}, max_keys: int = DEFAULT_MAX_KEYS):
+        self.rules = {}
+        for channel, fields in channels.items():
+            if channel not in ALL_CHANNELS:
+                raise ValueError(f'unknown channel {channel}')
+            if fields and channel not in JSON_CHANNEL_NAMES:
+                raise ValueError(f'{channel}: fields require a JSON channel')
+            key = keys.get(channel, KEY_FIELDS.get(channel))
+            if isinstance(key, str):
+                key = self._field_key(key)
+            self.rules[channel] = (key or DEFAULT_KEYS.get(channel, channel_key), fields)
+        self.channels = frozenset(self.rules)
+        self.max_keys = max_keys
+        self.last = OrderedDict()
+        self.suppressed = defaultdict(int)
+        self.evicted = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    @staticmethod
+    def _field_key(field):
+
+        def _key(data):
+            return decode(data).get(field)
+
+        return _key
+
+    def check(self, channel: str, data):
+        """return True if the message should be delivered, False if it repeats the last value for its key"""
+        if isinstance(data, int):
+            return True
+        key_function, fields = self.rules[channel]
+        try:
+            key = (channel, key_function(data))
+            if fields:
+                record = decode(data)
+                value = hash(ujson.dumps([record.get(field) for field in fields]))
+            else:
+                value = payload_hash(data)
+        except (ValueError, AttributeError, TypeError):
+            self.errors += 1
+            return True
+        last = self.last
+        if last.get(key) == value:
+            last.move_to_end(key)
+            self.suppressed[channel] += 1
+            return False
+        last[key] = value
+        last.move_to_end(key)
+        if len(last) > self.max_keys:
+            last.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def clear(self):
+        """forget the last values, so the next message for every key is delivered"""
+        self.last.clear()
+
+    def snapshot(self):
+        return {'keys': len(self.last), 'evicted': self.evicted, 'suppressed': dict(self.suppressed)}
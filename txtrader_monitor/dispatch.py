@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  dispatch.py
+  -----------
+
+  TxTrader ChannelDispatcher - single-pass message type routing
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import re
+
+from txtrader_monitor.channel import Channel
+
+# message type prefix (following '<channel>.') mapped to callback channel
+MESSAGE_TYPES = {
+    'time: ': Channel.TIME,
+    'error: ': Channel.ERROR,
+    'order.': Channel.ORDER,
+    'order-data ': Channel.ORDER_DATA,
+    'orders: ': Channel.ORDERS,
+    'ticket.': Channel.TICKET,
+    'ticket-data ': Channel.TICKET_DATA,
+    'open-order.': Channel.ORDER,
+    'execution.': Channel.EXECUTION,
+    'executions: ': Channel.EXECUTIONS,
+    'execution-data ': Channel.EXECUTION_DATA,
+    'symbol: ': Channel.SYMBOL,
+    'symbol-data: ': Channel.SYMBOL_DATA,
+    'quote.': Channel.QUOTE,
+    'trade.': Channel.TRADE,
+}
+
+
+class ChannelDispatcher(object):
+    """Resolve '<channel>.<type><sep>' message prefixes with one regex match and one dict lookup
+
+    Built once when the '.authorized <channel>' message arrives; route() returns (Channel, payload_offset)
+    or (None, 0) for messages that are not mapped to a data channel.  With raw=True, route() accepts the
+    undecoded bytes of the netstring.
+    """
+
+    def __init__(self, channel: str, raw: bool = False):
+        self.channel = channel
+        pattern = r'%s\.([^.: ]+(?:\.|: | ))' % re.escape(channel)
+        if raw:
+            self.message_types = {key.encode(): value for key, value in MESSAGE_TYPES.items()}
+            self.pattern = re.compile(pattern.encode())
+        else:
+            self.message_types = MESSAGE_TYPES
+            self.pattern = re.compile(pattern)
+
+    def route(self, data):
+        match = self.pattern.match(data)
+        if match:
+            channel = self.message_types.get(match.group(1))
+            if channel:
+                return channel, match.end()
+        return None, 0
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  executor.py
+  -----------
+
+  TxTrader ChannelExecutor - run a channel's callbacks off the reactor thread, in order, with a bounded queue
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import pickle
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.threads import deferToThreadPool
+
+from txtrader_monitor.channel import Channel
+from txtrader_monitor.message import JSONBuffer
+from txtrader_monitor.quote import message_symbol
+from txtrader_monitor.flow import message_size
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ['inline', 'thread', 'process']
+OVERFLOW_POLICIES = ['block', 'drop-oldest', 'conflate']
+
+DEFAULT_MAX_QUEUE = 1000
+
+SYMBOL_CHANNELS = [Channel.QUOTE.name, Channel.TRADE.name]
+
+
+def _run_in_process(func, channel, data):
+    return func(channel, data)
+
+
+def check_picklable(channel, func):
+    """raise ValueError unless func (or None) can be sent to a process pool worker"""
+    if func is None:
+        return
+    try:
+        pickle.dumps(func)
+    except Exception as e:
+        raise ValueError(
+            f'{channel}: process policy callbacks must be picklable, such as module level functions; '
+            f'{func!r} is not: {e}'
+        ) from e
+
+
+class ChannelExecutor(object):
+    """Queue one channel's messages and run its callback in a thread or process pool, one call at a time
+
+    Calls complete in arrival order.  When max_queue messages are waiting, overflow selects the policy:
+      block: pause reading from the socket until the queue drains to half of max_queue (see flow.FlowControl)
+      drop-oldest: discard the oldest waiting message
+      conflate: discard a waiting message for the same symbol (QUOTE/TRADE), else the oldest
+    A callback returning False shuts down the monitor, as with inline callbacks.  Queued payload bytes
+    count toward the monitor's max_pending_bytes limit.  Callbacks and payloads are pickled for the process
+    policy: the callback must be a module level function (not a lambda, closure or bound method, including
+    the Monitor's default print callback), and raw mode payloads (memoryview, JSONBuffer) reach it as bytes.
+    """
+
+    def __init__(
+        self,
+        controller,
+        channel: str,
+        policy: str = 'thread',
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        overflow: str = 'block',
+        workers: int = None
+    ):
+        if policy not in POLICIES[1:]:
+            raise ValueError(f'policy: expected one of {POLICIES[1:]}, got {policy}')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow: expected one of {OVERFLOW_POLICIES}, got {overflow}')
+        if policy == 'process':
+            check_picklable(channel, controller.callbacks[channel])
+        self.controller = controller
+        self.flow = controller.flow
+        self.channel = channel
+        self.policy = policy
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.queue = deque()
+        self.running = False
+        self.blocked = False
+        self.dropped = 0
+        self.conflated = 0
+        self.errors = 0
+        if policy == 'process':
+            self.pool = ProcessPoolExecutor(max_workers=workers or 1)
+        else:
+            self.pool = reactor.getThreadPool()
+            if workers:
+                reactor.suggestThreadPoolSize(workers)
+
+    def put(self, data):
+        if len(self.queue) >= self.max_queue:
+            if self.overflow == 'block':
+                if not self.blocked:
+                    self.blocked = True
+                    self.controller._pause(self)
+            elif self.overflow == 'conflate' and self.channel in SYMBOL_CHANNELS:
+                self._conflate(message_symbol(data))
+            else:
+                self.flow.released(message_size(self.queue.popleft()))
+                self.dropped += 1
+        self.queue.append(data)
+        self.flow.queued(message_size(data))
+        if not self.running:
+            self._next()
+
+    def _conflate(self, symbol):
+        for i, queued in enumerate(self.queue):
+            if message_symbol(queued) == symbol:
+                del self.queue[i]
+                self.flow.released(message_size(queued))
+                self.conflated += 1
+                return
+        self.flow.released(message_size(self.queue.popleft()))
+        self.dropped += 1
+
+    def _next(self):
+        while True:
+            if self.blocked and len(self.queue) <= self.max_queue // 2:
+                self.blocked = False
+                self.controller._resume(self)
+            if not self.queue:
+                self.running = False
+                return
+            data = self.queue.popleft()
+            self.flow.released(message_size(data))
+            func = self.controller.callbacks[self.channel]
+            if func:
+                break
+        self.running = True
+        d = self._submit(func, data)
+        d.addCallbacks(self._done, self._failed)
+
+    def _submit(self, func, data):
+        if self.policy == 'thread':
+            return deferToThreadPool(reactor, self.pool, func, self.channel, data)
+        if isinstance(data, (memoryview, JSONBuffer)):
+            data = bytes(data)
+        d = Deferred()
+        future = self.pool.submit(_run_in_process, func, self.channel, data)
+        future.add_done_callback(lambda f: reactor.callFromThread(self._resolve, d, f))
+        return d
+
+    def _resolve(self, d, future):
+        try:
+            d.callback(future.result())
+        except Exception as e:
+            d.errback(e)
+
+    def _done(self, result):
+        if not result:
+            self.controller.shutdown('client requested shutdown')
+        self._next()
+
+    def _failed(self, failure):
+        self.errors += 1
+        logger.error('%s callback failed: %s', self.channel, failure.getErrorMessage())
+        self._next()
+
+    def stop(self):
+        self.flow.released(sum(message_size(data) for data in self.queue))
+        self.queue.clear()
+        if self.blocked:
+            self.blocked = False
+            self.controller._resume(self)
+        if self.policy == 'process':
+            self.pool.shutdown(wait=False)
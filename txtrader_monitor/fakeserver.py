@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  fakeserver.py
+  -------------
+
+  TxTrader FakeServer - local stand-in for the txtrader TCP update channel
+
+  Speaks the netstring protocol including the '.connected' / 'auth' / '.Authorized <channel>' handshake
+  and generates synthetic QUOTE, TRADE, ORDER and EXECUTION streams at configurable rates.  With
+  timestamp=True, quote, trade and execution notification payloads carry the server send time
+  (time.time()) as an extra last field, for latency measurement.
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+import json
+import random
+import logging
+from itertools import count
+
+import click
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+from twisted.internet.protocol import Factory
+from twisted.protocols.basic import NetstringReceiver
+
+from txtrader_monitor.version import VERSION
+from txtrader_monitor.monitor import (
+    LINE_BUFFER_LENGTH, DEFAULT_TXTRADER_TCP_PORT, DEFAULT_TXTRADER_USERNAME, DEFAULT_TXTRADER_PASSWORD
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYMBOLS = ['AAPL', 'MSFT', 'IBM', 'SPY', 'QQQ', 'TSLA', 'AMZN', 'GOOG']
+DEFAULT_ACCOUNT = 'FAKE.TXTRADER.DEMO.TRADING'
+
+# stream generation timer frequency
+TICKS_PER_SECOND = 100
+
+
+class FakeServerProtocol(NetstringReceiver):
+
+    MAX_LENGTH = LINE_BUFFER_LENGTH
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.authorized = False
+        self.options = {}
+        self.symbols = set()
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def connectionMade(self):
+        logger.info("%s connectionMade()", self)
+        self.sendString(b'.connected txTrader fake server')
+
+    def connectionLost(self, reason):
+        logger.info("%s connectionLost(%s)", self, reason.getErrorMessage())
+        self.factory.clients.discard(self)
+
+    def send(self, data):
+        self.sendString(data.encode())
+
+    def stringReceived(self, data):
+        command, dummy, args = data.decode().partition(' ')
+        if command == 'auth':
+            self.auth(*(args.split(' ', 2) + ['', '', ''])[:3])
+        elif not self.authorized:
+            self.send('.not authorized')
+        elif command == 'exit':
+            self.transport.loseConnection()
+        elif command == 'add':
+            self.symbols.add(args)
+            self.send(f'{self.factory.channel}.symbol: {json.dumps(self.factory.symbol(args))}')
+        elif command == 'del':
+            self.symbols.discard(args)
+        elif command == 'query':
+            self.send(f'{self.factory.channel}.symbol: {json.dumps(self.factory.symbol(args))}')
+        elif command == 'querydata':
+            self.send(f'{self.factory.channel}.symbol-data: {json.dumps(self.factory.symbol(args))}')
+        elif command == 'orders':
+            self.send(f'{self.factory.channel}.orders: {json.dumps(self.factory.orders)}')
+        elif command == 'executions':
+            self.send(f'{self.factory.channel}.executions: {json.dumps(self.factory.executions)}')
+        elif command == 'accounts':
+            self.send(f'.accounts: {json.dumps([DEFAULT_ACCOUNT])}')
+        else:
+            self.send(f'.unknown command: {command}')
+
+    def auth(self, username, password, options):
+        if (username, password) != (self.factory.username, self.factory.password):
+            self.send('.Authorization failed')
+            return self.transport.loseConnection()
+        self.options = json.loads(options or '{}')
+        self.authorized = True
+        self.factory.clients.add(self)
+        self.send(f'.Authorized {self.factory.channel}')
+        self.send(f'{self.factory.channel}.current-account {DEFAULT_ACCOUNT}')
+
+
+class FakeServer(Factory):
+    """Factory for FakeServerProtocol clients; rates are messages per second sent to each client
+      snapshot_size: number of orders and executions returned by the 'orders' and 'executions' commands
+      payload_size: bytes of padding added to each order and execution record
+    """
+
+    def __init__(
+        self,
+        channel: str = 'fake',
+        username: str = DEFAULT_TXTRADER_USERNAME,
+        password: str = DEFAULT_TXTRADER_PASSWORD,
+        quote_rate: float = 0,
+        trade_rate: float = 0,
+        order_rate: float = 0,
+        execution_rate: float = 0,
+        symbols: list = DEFAULT_SYMBOLS,
+        snapshot_size: int = 100,
+        payload_size: int = 0,
+        timestamp: bool = True,
+    ):
+        self.channel = channel
+        self.username = username
+        self.password = password
+        self.rates = {
+            self.quote: quote_rate,
+            self.trade: trade_rate,
+            self.order: order_rate,
+            self.execution: execution_rate,
+        }
+        self.symbol_list = list(symbols)
+        self.payload_size = payload_size
+        self.timestamp = timestamp
+        self.clients = set()
+        self.random = random.Random(0)
+        self.ids = count(1)
+        self.orders = {}
+        self.executions = {}
+        for i in range(snapshot_size):
+            order = self.order_record()
+            self.orders[order['permid']] = order
+            execution = self.execution_record(order)
+            self.executions[execution['FILL_ID']] = execution
+        self.credits = {generator: 0.0 for generator in self.rates}
+        self.looper = LoopingCall(self.tick)
+        self.time_looper = LoopingCall(self.time)
+
+    def buildProtocol(self, addr):
+        return FakeServerProtocol(self)
+
+    def startFactory(self):
+        if any(self.rates.values()):
+            self.looper.start(1 / TICKS_PER_SECOND, now=False)
+        self.time_looper.start(1, now=False)
+
+    def stopFactory(self):
+        for looper in (self.looper, self.time_looper):
+            if looper.running:
+                looper.stop()
+
+    def symbol(self, symbol):
+        return {'symbol': symbol, 'fullname': f'{symbol} fake security', 'last': 100.0}
+
+    def order_record(self):
+        symbol = self.random.choice(self.symbol_list)
+        oid = f'fake-{next(self.ids):08d}'
+        return {
+            'permid': oid,
+            'symbol': symbol,
+            'account': DEFAULT_ACCOUNT,
+            'quantity': 100,
+            'filled': 0,
+            'status': 'Submitted',
+            'note': 'x' * self.payload_size,
+        }
+
+    def execution_record(self, order):
+        return {
+            'ORDER_ID': order['permid'],
+            'FILL_ID': f'fill-{next(self.ids):08d}',
+            'DISP_NAME': order['symbol'],
+            'BUYORSELL': 'Buy',
+            'PRICE': round(100 + self.random.random(), 2),
+            'VOLUME': 100,
+            'TIME_STAMP': time.strftime('%Y%m%d%H%M%S0000'),
+            'ACCOUNT': order['account'],
+            'NOTE': 'x' * self.payload_size,
+        }
+
+    def stamp(self):
+        return f' {time.time():.6f}' if self.timestamp else ''
+
+    def broadcast(self, data, option=None):
+        data = data.encode()
+        for client in self.clients:
+            if not option or client.options.get(option):
+                client.sendString(data)
+
+    def tick(self):
+        for generator, rate in self.rates.items():
+            if rate:
+                self.credits[generator] += rate / TICKS_PER_SECOND
+                while self.credits[generator] >= 1:
+                    self.credits[generator] -= 1
+                    generator()
+
+    def time(self):
+        self.broadcast(f'{self.channel}.time: {time.strftime("%Y-%m-%d %H:%M:%S")}')
+
+    def quote(self):
+        symbol = self.random.choice(self.symbol_list)
+        bid = round(100 + self.random.random(), 2)
+        self.broadcast(f'{self.channel}.quote.{symbol}:{bid} 100 {bid + 0.02:.2f} 200{self.stamp()}')
+
+    def trade(self):
+        symbol = self.random.choice(self.symbol_list)
+        last = round(100 + self.random.random(), 2)
+        self.broadcast(f'{self.channel}.trade.{symbol}:{last} 100 {next(self.ids)}{self.stamp()}')
+
+    def order(self):
+        order = self.order_record()
+        self.orders[order['permid']] = order
+        self.broadcast(f'{self.channel}.order.{order["permid"]} {order["status"]}')
+        self.broadcast(f'{self.channel}.order-data {json.dumps(order)}', 'order-data')
+
+    def execution(self):
+        order = self.random.choice(list(self.orders.values()))
+        execution = self.execution_record(order)
+        self.executions[execution['FILL_ID']] = execution
+        self.broadcast(f'{self.channel}.execution.{execution["FILL_ID"]} {execution["ORDER_ID"]}{self.stamp()}')
+        self.broadcast(f'{self.channel}.execution-data {json.dumps(execution)}', 'execution-data')
+
+
+@click.command('txtrader_fakeserver', short_help='run a local fake txtrader update channel server')
+@click.option('-p', '--port', type=int, default=DEFAULT_TXTRADER_TCP_PORT, envvar='TXTRADER_TCP_PORT')
+@click.option('-u', '--username', default=DEFAULT_TXTRADER_USERNAME, envvar='TXTRADER_USERNAME')
+@click.option('-P', '--password', default=DEFAULT_TXTRADER_PASSWORD, envvar='TXTRADER_PASSWORD')
+@click.option('--interface', default='127.0.0.1')
+@click.option('--quote-rate', type=float, default=0, help='quotes per second per client')
+@click.option('--trade-rate', type=float, default=0, help='trades per second per client')
+@click.option('--order-rate', type=float, default=0, help='orders per second per client')
+@click.option('--execution-rate', type=float, default=0, help='executions per second per client')
+@click.option('--snapshot-size', type=int, default=100, help='orders and executions in snapshots')
+@click.option('--payload-size', type=int, default=0, help='padding bytes per order/execution record')
+@click.option(
+    '-l',
+    '--log_level',
+    type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], case_sensitive=False),
+    default='WARNING',
+    envvar='TXTRADER_LOG_LEVEL'
+)
+@click.version_option(VERSION)
+def txtrader_fakeserver(
+    port, username, password, interface, quote_rate, trade_rate, order_rate, execution_rate, snapshot_size,
+    payload_size, log_level
+):
+    logging.basicConfig(level=log_level)
+    server = FakeServer(
+        username=username,
+        password=password,
+        quote_rate=quote_rate,
+        trade_rate=trade_rate,
+        order_rate=order_rate,
+        execution_rate=execution_rate,
+        snapshot_size=snapshot_size,
+        payload_size=payload_size,
+    )
+    reactor.listenTCP(port, server, interface=interface)
+    reactor.run()
+
+
+if __name__ == '__main__':
+    txtrader_fakeserver()
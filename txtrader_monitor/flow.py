@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  flow.py
+  -------
+
+  TxTrader FlowControl - pause reading from the server while downstream queues are full
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+from collections import defaultdict
+
+# bytes held in executor and scheduler queues before reading from the server is paused
+DEFAULT_HIGH_WATER = 0x4000000
+
+
+def message_size(data):
+    """return the size of a queued message payload; item counts and other non-sequences count as 0"""
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+class FlowControl(object):
+    """Pause and resume the transport of controller.connection on behalf of downstream queues
+
+    Any object may pause reading with pause(source); reading resumes when every source has called
+    resume(source).  Queues also report the bytes they hold with queued() and released(); when the
+    total reaches high_water the FlowControl itself pauses reading until it falls to low_water.
+    """
+
+    def __init__(self, controller, high_water: int = DEFAULT_HIGH_WATER, low_water: int = None):
+        self.controller = controller
+        self.high_water = high_water
+        self.low_water = high_water // 2 if low_water is None else low_water
+        self.paused_by = set()
+        self.pending_bytes = 0
+        self.peak_bytes = 0
+        self.pauses = 0
+        self.pauses_by_source = defaultdict(int)
+        self.paused_since = None
+        self.paused_total = 0.0
+
+    @property
+    def paused(self):
+        return bool(self.paused_by)
+
+    @property
+    def paused_seconds(self):
+        """total time reading has been paused, including the current pause"""
+        if self.paused_since is None:
+            return self.paused_total
+        return self.paused_total + time.monotonic() - self.paused_since
+
+    def _transport(self):
+        connection = self.controller.connection
+        return connection.transport if connection else None
+
+    def connected(self):
+        """pause a new connection if a source is still paused"""
+        if self.paused_by and self._transport():
+            self._transport().pauseProducing()
+
+    def pause(self, source):
+        """stop reading from the server until every source that paused has called resume()"""
+        if source in self.paused_by:
+            return
+        if not self.paused_by:
+            self.pauses += 1
+            self.paused_since = time.monotonic()
+            transport = self._transport()
+            if transport:
+                transport.pauseProducing()
+        self.paused_by.add(source)
+        self.pauses_by_source[source.__class__.__name__] += 1
+
+    def resume(self, source):
+        if source not in self.paused_by:
+            return
+        self.paused_by.discard(source)
+        if not self.paused_by:
+            self.paused_total += time.monotonic() - self.paused_since
+            self.paused_since = None
+            transport = self._transport()
+            if transport:
+                transport.resumeProducing()
+
+    def queued(self, nbytes: int):
+        self.pending_bytes += nbytes
+        if self.pending_bytes > self.peak_bytes:
+            self.peak_bytes = self.pending_bytes
+        if self.pending_bytes >= self.high_water:
+            self.pause(self)
+
+    def released(self, nbytes: int):
+        self.pending_bytes -= nbytes
+        if self.pending_bytes <= self.low_water:
+            self.resume(self)
+
+    def snapshot(self):
+        return {
+            'paused': self.paused,
+            'pauses': self.pauses,
+            'pauses_by_source': dict(self.pauses_by_source),
+            'paused_seconds': self.paused_seconds,
+            'pending_bytes': self.pending_bytes,
+            'peak_bytes': self.peak_bytes,
+        }
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  hub.py
+  ------
+
+  TxTrader Hub - re-serve one Monitor's upstream connection to many local clients
+
+  The hub speaks the txtrader update channel protocol, so an unmodified Monitor can connect to it in
+  place of the server.  Clients authenticate with the hub's username and password and may select
+  channels with the auth option {"channels": ["QUOTE", "ORDER_DATA", ...]}; by default they receive
+  every message.  Messages are forwarded as received from the server, without being decoded again.
+  Commands from clients (add, orders, executions, ...) are sent upstream, and their responses are
+  delivered to every client subscribed to the response channel.
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import json
+import logging
+from collections import deque
+
+from zope.interface import implementer
+from twisted.internet.interfaces import IPushProducer
+from twisted.internet.protocol import Factory
+from twisted.protocols.basic import NetstringReceiver
+
+from txtrader_monitor.channel import Channel, ALL_CHANNELS
+from txtrader_monitor.dispatch import ChannelDispatcher
+
+logger = logging.getLogger(__name__)
+
+# longest command accepted from a client
+MAX_COMMAND_LENGTH = 0x10000
+
+# bytes queued for a client while its socket is not writable
+DEFAULT_MAX_BUFFER = 0x4000000
+
+SLOW_CONSUMER_POLICIES = ['disconnect', 'drop']
+
+# upstream handshake messages answered by the hub itself
+HANDSHAKE_PREFIXES = (b'.connected', b'.authorized')
+
+
+@implementer(IPushProducer)
+class HubProtocol(NetstringReceiver):
+    """One downstream client connection; queues messages while the transport has paused this producer"""
+
+    MAX_LENGTH = MAX_COMMAND_LENGTH
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.authorized = False
+        self.channels = None
+        self.paused = False
+        self.queue = deque()
+        self.queued_bytes = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def connectionMade(self):
+        logger.info('%s connectionMade()', self)
+        self.transport.registerProducer(self, True)
+        self.sendString(b'.connected txTrader monitor hub')
+
+    def connectionLost(self, reason):
+        logger.info('%s connectionLost(%s) sent=%s dropped=%s', self, reason.getErrorMessage(), self.sent, self.dropped)
+        self.hub.clients.discard(self)
+        self.hub.pending.discard(self)
+        self.queue.clear()
+
+    def stringReceived(self, data):
+        command, dummy, args = data.decode().partition(' ')
+        if command == 'auth':
+            self.auth(*(args.split(' ', 2) + ['', '', ''])[:3])
+        elif not self.authorized:
+            self.sendString(b'.not authorized')
+        elif command == 'exit':
+            self.transport.loseConnection()
+        else:
+            self.hub.controller.send(data.decode())
+
+    def auth(self, username, password, options):
+        if (username, password) != (self.hub.username, self.hub.password):
+            self.sendString(b'.Authorization failed')
+            return self.transport.loseConnection()
+        try:
+            channels = json.loads(options or '{}').get('channels')
+        except ValueError:
+            channels = None
+        if channels:
+            unknown = set(channels) - set(ALL_CHANNELS)
+            if unknown:
+                self.sendString(f'.Authorization failed: unknown channels {sorted(unknown)}'.encode())
+                return self.transport.loseConnection()
+            self.channels = set(channels) | {Channel.STATUS.name}
+        self.authorized = True
+        self.hub.authorize(self)
+
+    def write(self, data):
+        if self.paused or self.queue:
+            if self.queued_bytes + len(data) > self.hub.max_buffer:
+                if self.hub.slow_consumer == 'disconnect':
+                    logger.warning('%s slow consumer: %s bytes queued; disconnecting', self, self.queued_bytes)
+                    self.queue.clear()
+                    self.queued_bytes = 0
+                    self.dropped += 1
+                    return self.transport.abortConnection()
+                while self.queue and self.queued_bytes + len(data) > self.hub.max_buffer:
+                    self.queued_bytes -= len(self.queue.popleft())
+                    self.dropped += 1
+            self.queue.append(data)
+            self.queued_bytes += len(data)
+        else:
+            self.sendString(data)
+            self.sent += 1
+
+    def pauseProducing(self):
+        self.paused = True
+
+    def resumeProducing(self):
+        self.paused = False
+        while self.queue and not self.paused:
+            data = self.queue.popleft()
+            self.queued_bytes -= len(data)
+            self.sendString(data)
+            self.sent += 1
+
+    def stopProducing(self):
+        self.queue.clear()
+        self.queued_bytes = 0
+
+
+class Hub(Factory):
+    """Serve the messages received by controller (a Monitor) to HubProtocol clients; see Monitor.serve_hub()
+      username, password: credentials required from clients
+      max_buffer: bytes queued per client while its socket is not writable
+      slow_consumer: when max_buffer is exceeded, 'disconnect' the client or 'drop' its oldest messages
+    """
+
+    def __init__(
+        self,
+        controller,
+        username: str,
+        password: str,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+        slow_consumer: str = 'disconnect',
+    ):
+        if slow_consumer not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f'slow_consumer: expected one of {SLOW_CONSUMER_POLICIES}, got {slow_consumer}')
+        self.controller = controller
+        self.username = username
+        self.password = password
+        self.max_buffer = max_buffer
+        self.slow_consumer = slow_consumer
+        self.channel = None
+        self.dispatcher = None
+        self.clients = set()
+        self.pending = set()
+        self.forwarded = 0
+
+    def buildProtocol(self, addr):
+        return HubProtocol(self)
+
+    def authorize(self, client):
+        """send '.Authorized' once the upstream channel is known"""
+        if self.channel:
+            client.sendString(f'.Authorized {self.channel}'.encode())
+            self.clients.add(client)
+        else:
+            self.pending.add(client)
+
+    def forward(self, data: bytes):
+        """Monitor wire tap: classify an upstream netstring and write it to the subscribed clients"""
+        if data.startswith(b'.'):
+            if data.lower().startswith(HANDSHAKE_PREFIXES):
+                if data.lower().startswith(b'.authorized'):
+                    self.upstream_authorized(data.split()[1].decode())
+                return
+            channel = Channel.STATUS.name
+        else:
+            channel = self.dispatcher.route(data)[0] if self.dispatcher else None
+            channel = channel.name if channel else Channel.STATUS.name
+        self.forwarded += 1
+        for client in self.clients:
+            if client.channels is None or channel in client.channels:
+                client.write(data)
+
+    def upstream_authorized(self, channel):
+        if self.channel and channel != self.channel:
+            # clients route on the channel name; reconnect them to pick up the new one
+            logger.info('%s upstream channel changed; disconnecting %s clients', self, len(self.clients))
+            for client in list(self.clients):
+                client.transport.loseConnection()
+            self.clients.clear()
+        self.channel = channel
+        self.dispatcher = ChannelDispatcher(channel, raw=True)
+        while self.pending:
+            self.authorize(self.pending.pop())
+
+    def stop(self):
+        for client in list(self.clients | self.pending):
+            client.transport.loseConnection()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  latency.py
+  ----------
+
+  TxTrader LatencyTracker - server time to callback end lag per channel, with a clock offset estimated
+  from the TIME channel
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+import logging
+import calendar
+from collections import defaultdict, deque
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.metrics import PERCENTILES
+from txtrader_monitor.store import decode
+
+logger = logging.getLogger(__name__)
+
+# channels carrying a server time
+DEFAULT_LATENCY_CHANNELS = [Channel.TIME.name, Channel.EXECUTION_DATA.name]
+
+STAGES = ['network', 'queue', 'callback', 'total']
+
+# samples per channel and stage used for percentiles
+DEFAULT_WINDOW = 1024
+
+# TIME messages used for the clock offset estimate
+DEFAULT_OFFSET_WINDOW = 60
+
+# seconds of lag from server time to callback end that raise an alert
+DEFAULT_LAG_THRESHOLD = 2.0
+
+# minimum seconds between alerts for a channel
+DEFAULT_ALERT_INTERVAL = 10.0
+
+
+def parse_time(text: str):
+    """return the seconds of a TIME payload 'YYYY-MM-DD HH:MM:SS' read as UTC"""
+    return calendar.timegm(time.strptime(text.strip(), '%Y-%m-%d %H:%M:%S'))
+
+
+def parse_time_stamp(text: str):
+    """return the seconds of an execution TIME_STAMP 'YYYYmmddHHMMSS' with optional fraction digits, read as UTC"""
+    seconds = calendar.timegm(time.strptime(text[:14], '%Y%m%d%H%M%S'))
+    fraction = text[14:]
+    return seconds + int(fraction) / 10**len(fraction) if fraction else seconds
+
+
+def server_time(channel: str, data):
+    """return the server time of a TIME or EXECUTION_DATA message, or None"""
+    if channel == Channel.TIME.name:
+        return parse_time(data if isinstance(data, str) else bytes(data).decode())
+    if channel == Channel.EXECUTION_DATA.name:
+        stamp = decode(data).get('TIME_STAMP')
+        return parse_time_stamp(stamp) if stamp else None
+    return None
+
+
+class RollingWindow(object):
+    """the latest size samples, in seconds, with percentiles computed on demand"""
+
+    def __init__(self, size: int = DEFAULT_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, p: float):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def snapshot(self):
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        ret = {'count': self.count, 'mean': sum(ordered) / n if n else 0.0, 'max': ordered[-1] if n else 0.0}
+        for p in PERCENTILES:
+            ret[f'p{p}'] = ordered[min(int(n * p / 100), n - 1)] if n else 0.0
+        return ret
+
+
+class LatencyTracker(object):
+    """Record the stages of each message on channels:
+      network: server time, corrected by the clock offset, to socket receive
+      queue: socket receive to dispatch start (conflation, priority and reactor delays)
+      callback: dispatch start to callback end
+      total: server time to callback end
+
+    Server times are read from TIME payloads and EXECUTION_DATA TIME_STAMP fields; both are in the server's
+    time zone.  Unless offset is given, the clock offset is the smallest (receive - server time) of the last
+    offset_window TIME messages, so network lag is measured above the fastest recent TIME message, and the
+    one second resolution of TIME limits its accuracy.  Channels without a server time record the queue and
+    callback stages; messages handled by a ChannelExecutor or conflated record the network stage only.
+
+    When the lag of a message exceeds threshold seconds, a 'latency alert' STATUS message is sent to the
+    monitor's callbacks, at most once per alert_interval seconds per channel.
+    """
+
+    def __init__(
+        self,
+        controller,
+        channels: list = DEFAULT_LATENCY_CHANNELS,
+        threshold: float = DEFAULT_LAG_THRESHOLD,
+        window: int = DEFAULT_WINDOW,
+        offset: float = None,
+        offset_window: int = DEFAULT_OFFSET_WINDOW,
+        alert_interval: float = DEFAULT_ALERT_INTERVAL
+    ):
+        for channel in channels:
+            if channel not in ALL_CHANNELS:
+                raise ValueError(f'unknown channel {channel}')
+        self.controller = controller
+        self.channels = frozenset(channels)
+        self.threshold = threshold
+        self.window = window
+        self.fixed_offset = offset
+        self.offsets = deque(maxlen=offset_window)
+        self.alert_interval = alert_interval
+        self.clock = time.time
+        # time of the latest read from the socket, set by StatusClient.dataReceived()
+        self.received_at = None
+        self.stages = defaultdict(lambda: {stage: RollingWindow(window) for stage in STAGES})
+        self.pending = defaultdict(deque)
+        self.alerts = defaultdict(int)
+        self.last_alert = {}
+        self.errors = 0
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    @property
+    def offset(self):
+        """estimated local clock minus server clock in seconds, or None before a TIME message"""
+        if self.fixed_offset is not None:
+            return self.fixed_offset
+        return min(self.offsets) if self.offsets else None
+
+    def tap(self, channel: str, data):
+        """Monitor tap function; see Monitor.add_tap()"""
+        received = self.received_at or self.clock()
+        try:
+            server = server_time(channel, data)
+        except (ValueError, AttributeError, TypeError):
+            self.errors += 1
+            server = None
+        if server is not None:
+            if channel == Channel.TIME.name:
+                self.offsets.append(received - server)
+            offset = self.offset
+            if offset is None:
+                server = None
+            else:
+                server += offset
+                self.stages[channel]['network'].record(received - server)
+        controller = self.controller
+        if channel in controller.executors or (controller.conflator and channel in controller.conflator.channels):
+            if server is not None:
+                self._check(channel, received - server)
+            return
+        self.pending[channel].append((data, received, server))
+
+    def dispatch(self, func, channel: str, data):
+        """call func(channel, data) if set, recording the queue, callback and total stages; returns its result"""
+        start = self.clock()
+        pending = self.pending[channel]
+        entry = None
+        while pending:
+            entry = pending.popleft()
+            if entry[0] is data:
+                break
+            entry = None
+        ret = func(channel, data) if func else True
+        end = self.clock()
+        if entry:
+            dummy, received, server = entry
+            stages = self.stages[channel]
+            stages['queue'].record(start - received)
+            stages['callback'].record(end - start)
+            if server is not None:
+                stages['total'].record(end - server)
+                self._check(channel, end - server)
+        return ret
+
+    def _check(self, channel, lag):
+        if lag <= self.threshold:
+            return
+        now = self.clock()
+        if now - self.last_alert.get(channel, 0) < self.alert_interval:
+            return
+        self.last_alert[channel] = now
+        self.alerts[channel] += 1
+        logger.warning('%s %s lag %.3fs exceeds %ss', self, channel, lag, self.threshold)
+        self.controller._callback(Channel.STATUS, f'latency alert: {channel} lag {lag:.3f}s exceeds {self.threshold}s')
+
+    def snapshot(self):
+        return {
+            'offset': self.offset,
+            'alerts': dict(self.alerts),
+            'channels': {
+                channel: {
+                    stage: w.snapshot()
+                    for stage, w in stages.items()
+                }
+                for channel, stages in self.stages.items()
+            },
+        }
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  marketdata.py
+  -------------
+
+  TxTrader MarketData - QUOTE and TRADE payloads parsed into growable NumPy columns per symbol,
+  with OHLCV bar and VWAP aggregation
+
+  Requires numpy: pip install txtrader-monitor[numpy]
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from txtrader_monitor.channel import Channel
+
+QUOTE_FIELDS = [('time', 'f8'), ('bid', 'f8'), ('bid_size', 'i8'), ('ask', 'f8'), ('ask_size', 'i8')]
+TRADE_FIELDS = [('time', 'f8'), ('last', 'f8'), ('size', 'i8')]
+BAR_FIELDS = [('time', 'f8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'), ('volume', 'i8'),
+              ('vwap', 'f8')]
+
+DEFAULT_CAPACITY = 4096
+
+
+class Columns(object):
+    """Preallocated structured array grown by doubling; rows holds the filled part"""
+
+    def __init__(self, fields: list, capacity: int = DEFAULT_CAPACITY):
+        self.data = np.empty(capacity, dtype=fields)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row: tuple):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+        self.data[self.size] = row
+        self.size += 1
+
+    @property
+    def rows(self):
+        """view of the filled rows; column arrays are rows['bid'], rows['last'], ..."""
+        return self.data[:self.size]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+
+class MarketData(object):
+    """Per-symbol quote and trade tables fed by a Monitor tap; see Monitor.enable_market_data()
+
+    QUOTE payloads 'SYM:bid bid_size ask ask_size' and TRADE payloads 'SYM:last size volume' are
+    stored with their receive time from clock().  Fields beyond these are ignored.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if np is None:
+            raise ImportError('MarketData requires numpy; pip install txtrader-monitor[numpy]')
+        self.capacity = capacity
+        self.clock = time.time
+        self.quotes = {}
+        self.trades = {}
+        self.errors = 0
+
+    @property
+    def channels(self):
+        return [Channel.QUOTE.name, Channel.TRADE.name]
+
+    @property
+    def symbols(self):
+        return sorted(set(self.quotes) | set(self.trades))
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.quotes.values()) + sum(c.nbytes for c in self.trades.values())
+
+    def tap(self, channel: str, data):
+        """Monitor tap function; see Monitor.add_tap()"""
+        if isinstance(data, str):
+            symbol, dummy, fields = data.partition(':')
+        else:
+            symbol, dummy, fields = bytes(data).partition(b':')
+            symbol = symbol.decode()
+        fields = fields.split()
+        try:
+            if channel == Channel.QUOTE.name:
+                row = (self.clock(), float(fields[0]), int(fields[1]), float(fields[2]), int(fields[3]))
+                table = self.quotes
+                columns = QUOTE_FIELDS
+            else:
+                row = (self.clock(), float(fields[0]), int(fields[1]))
+                table = self.trades
+                columns = TRADE_FIELDS
+        except (ValueError, IndexError):
+            self.errors += 1
+            return
+        if symbol not in table:
+            table[symbol] = Columns(columns, self.capacity)
+        table[symbol].append(row)
+
+    def quote_rows(self, symbol: str):
+        return self.quotes[symbol].rows if symbol in self.quotes else np.empty(0, dtype=QUOTE_FIELDS)
+
+    def trade_rows(self, symbol: str):
+        return self.trades[symbol].rows if symbol in self.trades else np.empty(0, dtype=TRADE_FIELDS)
+
+    def bars(self, symbol: str, interval: float, since: float = None):
+        """return OHLCV bars with VWAP of symbol's trades per interval seconds, as a structured array;
+           bar times are interval start times, and intervals without trades are omitted
+        """
+        trades = self.trade_rows(symbol)
+        if since is not None:
+            trades = trades[trades['time'] >= since]
+        if not len(trades):
+            return np.empty(0, dtype=BAR_FIELDS)
+        buckets = np.floor(trades['time'] / interval)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], len(trades)) - 1
+        last = trades['last']
+        size = trades['size']
+        bars = np.empty(len(starts), dtype=BAR_FIELDS)
+        bars['time'] = buckets[starts] * interval
+        bars['open'] = last[starts]
+        bars['high'] = np.maximum.reduceat(last, starts)
+        bars['low'] = np.minimum.reduceat(last, starts)
+        bars['close'] = last[ends]
+        bars['volume'] = np.add.reduceat(size, starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bars['vwap'] = np.add.reduceat(last * size, starts) / bars['volume']
+        return bars
+
+    def vwap(self, symbol: str, window: float = None):
+        """return the volume weighted average trade price of symbol over the last window seconds
+           (default all trades), or nan if there were none
+        """
+        trades = self.trade_rows(symbol)
+        if window is not None:
+            trades = trades[trades['time'] >= self.clock() - window]
+        volume = trades['size'].sum()
+        if not volume:
+            return float('nan')
+        return float((trades['last'] * trades['size']).sum() / volume)
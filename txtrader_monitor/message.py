@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  message.py
+  ----------
+
+  TxTrader JSONMessage - channel payloads with lazy, cached JSON decoding
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import ujson
+
+from txtrader_monitor.channel import Channel
+
+JSON_CHANNELS = [
+    Channel.ORDERS,
+    Channel.EXECUTIONS,
+    Channel.ORDER_DATA,
+    Channel.EXECUTION_DATA,
+    Channel.TICKET_DATA,
+    Channel.SYMBOL_DATA,
+]
+
+
+class JSONMessage(str):
+    """str payload of a JSON channel; the decoded object is parsed on first access of .json and cached.
+    Being a str, it can be passed to json.loads(), sliced, compared and tested with isinstance(data, str).
+    """
+
+    @property
+    def json(self):
+        try:
+            return self._json
+        except AttributeError:
+            self._json = ujson.loads(self)
+            return self._json
+
+
+class JSONBuffer(object):
+    """raw mode counterpart of JSONMessage wrapping the memoryview payload"""
+
+    __slots__ = ('raw', '_json')
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __bytes__(self):
+        return bytes(self.raw)
+
+    def __str__(self):
+        return bytes(self.raw).decode()
+
+    @property
+    def json(self):
+        try:
+            return self._json
+        except AttributeError:
+            self._json = ujson.loads(bytes(self.raw))
+            return self._json
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  metrics.py
+  ----------
+
+  TxTrader Metrics - per-channel message counters, callback latency histograms and a Prometheus endpoint
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+import logging
+from collections import defaultdict
+
+from twisted.web.server import Site
+from twisted.web.resource import Resource
+
+logger = logging.getLogger(__name__)
+
+# linear sub-buckets per power of two; bucket width is at most 1/16 of the recorded value
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class Histogram(object):
+    """HDR-style log-linear histogram of durations recorded in seconds with nanosecond resolution"""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, seconds: float):
+        self.record_ns(int(seconds * 1e9))
+
+    def record_ns(self, ns: int):
+        bits = ns.bit_length()
+        if bits <= SUB_BUCKET_BITS:
+            self.counts[ns] += 1
+        else:
+            shift = bits - SUB_BUCKET_BITS
+            self.counts[(shift << (SUB_BUCKET_BITS - 1)) + (ns >> shift)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] += count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    @property
+    def total(self):
+        return self.total_ns / 1e9
+
+    @property
+    def max(self):
+        return self.max_ns / 1e9
+
+    @staticmethod
+    def _value(index):
+        """lowest nanosecond value of bucket index"""
+        if index < (1 << SUB_BUCKET_BITS):
+            return index
+        shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+        return (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+
+    def percentile(self, p: float):
+        """return the duration in seconds at percentile p (0-100)"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return self._value(index) / 1e9
+        return self.max
+
+    def snapshot(self):
+        ret = {'count': self.count, 'mean': self.total / self.count if self.count else 0.0, 'max': self.max}
+        for p in PERCENTILES:
+            ret[f'p{p}'] = self.percentile(p)
+        return ret
+
+
+class Metrics(object):
+    """Counters and histograms fed by a Monitor; see Monitor.enable_metrics()"""
+
+    def __init__(self, controller, sample_interval=1):
+        self.controller = controller
+        self.sample_interval = sample_interval
+        self.started = time.time()
+        self.messages = defaultdict(int)
+        self.bytes_received = 0
+        self.connects = 0
+        self.channel_latency = defaultdict(Histogram)
+        # seconds from disconnect to subscriptions sent on the next connection
+        self.resubscribe_latency = Histogram()
+
+    def callback_latency(self):
+        """callback duration histograms by callback function, merged from the channels it serves"""
+        ret = defaultdict(Histogram)
+        for channel, h in self.channel_latency.items():
+            function = self.controller.callbacks.get(channel)
+            ret[getattr(function, '__qualname__', repr(function))].merge(h)
+        return ret
+
+    def queue_depths(self):
+        depths = {f'executor.{channel}': len(e.queue) for channel, e in self.controller.executors.items()}
+        if self.controller.conflator:
+            depths['conflator'] = len(self.controller.conflator.pending)
+        if self.controller.scheduler:
+            for c in self.controller.scheduler.classes:
+                depths[f'priority.{c.name}'] = len(c.queue)
+        return depths
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            'uptime': elapsed,
+            'connects': self.connects,
+            'reconnects': max(self.connects - 1, 0),
+            'bytes_received': self.bytes_received,
+            'messages': dict(self.messages),
+            'message_rates': {
+                channel: count / elapsed
+                for channel, count in self.messages.items()
+            },
+            'channel_latency': {
+                channel: h.snapshot()
+                for channel, h in self.channel_latency.items()
+            },
+            'callback_latency': {
+                name: h.snapshot()
+                for name, h in self.callback_latency().items()
+            },
+            'queue_depth': self.queue_depths(),
+            'resubscribe_latency': self.resubscribe_latency.snapshot(),
+            'flow': self.controller.flow.snapshot(),
+            'latency': self.controller.latency.snapshot() if self.controller.latency else None,
+            'dedup': self.controller.deduplicator.snapshot() if self.controller.deduplicator else None,
+        }
+
+    def prometheus(self):
+        """return the metrics in Prometheus text exposition format"""
+        lines = [
+            '# TYPE txtrader_monitor_bytes_received_total counter',
+            f'txtrader_monitor_bytes_received_total {self.bytes_received}',
+            '# TYPE txtrader_monitor_reconnects_total counter',
+            f'txtrader_monitor_reconnects_total {max(self.connects - 1, 0)}',
+            '# TYPE txtrader_monitor_messages_total counter',
+        ]
+        for channel, count in self.messages.items():
+            lines.append(f'txtrader_monitor_messages_total{{channel="{channel}"}} {count}')
+        lines.append('# TYPE txtrader_monitor_callback_seconds summary')
+        for channel, h in self.channel_latency.items():
+            for p in PERCENTILES:
+                lines.append(
+                    f'txtrader_monitor_callback_seconds{{channel="{channel}",quantile="{p/100}"}} {h.percentile(p)}'
+                )
+            lines.append(f'txtrader_monitor_callback_seconds_sum{{channel="{channel}"}} {h.total}')
+            lines.append(f'txtrader_monitor_callback_seconds_count{{channel="{channel}"}} {h.count}')
+        lines.append('# TYPE txtrader_monitor_resubscribe_seconds summary')
+        h = self.resubscribe_latency
+        for p in PERCENTILES:
+            lines.append(f'txtrader_monitor_resubscribe_seconds{{quantile="{p/100}"}} {h.percentile(p)}')
+        lines.append(f'txtrader_monitor_resubscribe_seconds_sum {h.total}')
+        lines.append(f'txtrader_monitor_resubscribe_seconds_count {h.count}')
+        flow = self.controller.flow
+        lines += [
+            '# TYPE txtrader_monitor_paused_seconds_total counter',
+            f'txtrader_monitor_paused_seconds_total {flow.paused_seconds}',
+            '# TYPE txtrader_monitor_pauses_total counter',
+            f'txtrader_monitor_pauses_total {flow.pauses}',
+            '# TYPE txtrader_monitor_pending_bytes gauge',
+            f'txtrader_monitor_pending_bytes {flow.pending_bytes}',
+        ]
+        latency = self.controller.latency
+        if latency:
+            lines.append('# TYPE txtrader_monitor_lag_seconds gauge')
+            for channel, stages in latency.stages.items():
+                for stage, window in stages.items():
+                    for p in PERCENTILES:
+                        lines.append(
+                            f'txtrader_monitor_lag_seconds{{channel="{channel}",stage="{stage}",quantile="{p/100}"}} '
+                            f'{window.percentile(p)}'
+                        )
+            lines.append('# TYPE txtrader_monitor_lag_alerts_total counter')
+            for channel, count in latency.alerts.items():
+                lines.append(f'txtrader_monitor_lag_alerts_total{{channel="{channel}"}} {count}')
+            if latency.offset is not None:
+                lines.append('# TYPE txtrader_monitor_clock_offset_seconds gauge')
+                lines.append(f'txtrader_monitor_clock_offset_seconds {latency.offset}')
+        if self.controller.deduplicator:
+            lines.append('# TYPE txtrader_monitor_suppressed_total counter')
+            for channel, count in self.controller.deduplicator.suppressed.items():
+                lines.append(f'txtrader_monitor_suppressed_total{{channel="{channel}"}} {count}')
+        lines.append('# TYPE txtrader_monitor_queue_depth gauge')
+        for queue, depth in self.queue_depths().items():
+            lines.append(f'txtrader_monitor_queue_depth{{queue="{queue}"}} {depth}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsResource(Resource):
+    isLeaf = True
+
+    def __init__(self, metrics):
+        Resource.__init__(self)
+        self.metrics = metrics
+
+    def render_GET(self, request):
+        request.setHeader(b'content-type', b'text/plain; version=0.0.4')
+        return self.metrics.prometheus().encode()
+
+
+def serve_metrics(reactor, metrics, port, interface='127.0.0.1'):
+    """serve Prometheus text metrics over HTTP on a local port; returns the listening port"""
+    logger.info('serving metrics on %s:%s', interface, port)
+    return reactor.listenTCP(port, Site(MetricsResource(metrics)), interface=interface)
@@ -17,32 +17,89 @@ import click
 import time
 import json
 import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from queue import Queue, Empty
 from typing import IO
 from enum import Enum, unique
 
 from signal import signal, Signals, SIG_IGN, SIG_DFL, SIGINT, SIGHUP, SIGQUIT, SIGTERM
 
 from twisted.internet import reactor
-from twisted.internet.task import LoopingCall
 from twisted.internet.error import ReactorNotRunning
 from twisted.internet.protocol import ReconnectingClientFactory
-from twisted.protocols.basic import NetstringReceiver
+from twisted.protocols.basic import NetstringReceiver, NetstringParseError
 
 from txtrader_monitor.version import VERSION
 
 from txtrader_monitor.channel import ALL_CHANNELS, Channel
 from txtrader_monitor.connection_state import ConnectionState
+from txtrader_monitor.protocol import StatusReceiver
+from txtrader_monitor.streaming import NetstringDecoder
+from txtrader_monitor.conflate import Conflator, DEFAULT_CONFLATE_CHANNELS
+from txtrader_monitor.dedup import Deduplicator, DEFAULT_DEDUP_CHANNELS, DEFAULT_MAX_KEYS
+from txtrader_monitor.flow import FlowControl, DEFAULT_HIGH_WATER
+from txtrader_monitor.ticker import TickScheduler
+from txtrader_monitor.scheduler import PriorityScheduler, DEFAULT_PRIORITY_CLASSES, DEFAULT_MAX_PENDING
+from txtrader_monitor.executor import ChannelExecutor, DEFAULT_MAX_QUEUE, check_picklable
+from txtrader_monitor.capture import CaptureWriter, replay
+from txtrader_monitor.archive import ArchiveWriter, DEFAULT_ARCHIVE_CHANNELS
+from txtrader_monitor.metrics import Metrics, serve_metrics
+from txtrader_monitor.latency import LatencyTracker, DEFAULT_LATENCY_CHANNELS, DEFAULT_LAG_THRESHOLD
+from txtrader_monitor.store import OrderBook, ExecutionStore
+from txtrader_monitor.shm import QuoteTableWriter, DEFAULT_SLOTS as DEFAULT_QUOTE_TABLE_SLOTS
+from txtrader_monitor.hub import Hub, DEFAULT_MAX_BUFFER
+from txtrader_monitor.marketdata import MarketData, DEFAULT_CAPACITY as DEFAULT_MARKET_DATA_CAPACITY
+from txtrader_monitor.output import (
+    OutputWriter, FORMATS, DEFAULT_BUFFER_LINES, DEFAULT_FLUSH_INTERVAL, select_channels, payload_text
+)
 
 # 512MB line buffer
 LINE_BUFFER_LENGTH = 0x20000000
 
 CHANNELS = ALL_CHANNELS
 
+# channels supporting streaming parse with per-item callbacks
+STREAM_CHANNELS = [Channel.ORDERS.name, Channel.EXECUTIONS.name]
+
 DEFAULT_TXTRADER_HOST = 'localhost'
 DEFAULT_TXTRADER_TCP_PORT = 50090
 DEFAULT_TXTRADER_USERNAME = 'txtrader_user'
 DEFAULT_TXTRADER_PASSWORD = 'change_this_password'
 
+# reconnection backoff, see Monitor
+DEFAULT_RECONNECT_DELAY = 1
+DEFAULT_RECONNECT_MAX_DELAY = 15
+
+LOGGER_NAME = 'txtrader_monitor'
+LOG_FORMAT = "[%(asctime)s] {%(filename)s:%(lineno)d} %(levelname)s - %(message)s"
+
+# wire trace file is rotated to a single backup at this size
+DEFAULT_WIRE_TRACE_MAX_BYTES = 0x4000000
+
+
+def configure_logger(logger: logging.Logger = None, log_level: str = 'WARNING'):
+    """return logger (default the 'txtrader_monitor' logger) set to log_level; a stderr handler is added
+       to the default logger only if no handlers are configured
+    """
+    if not logger:
+        logger = logging.getLogger(LOGGER_NAME)
+        if not logger.hasHandlers():
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            logger.addHandler(handler)
+    logger.setLevel(log_level)
+    return logger
+
+
+def wire_trace_logger(path: str, max_bytes: int = DEFAULT_WIRE_TRACE_MAX_BYTES):
+    """return a private Logger writing RX/TX traces to path, independent of the logging hierarchy"""
+    trace = logging.Logger(f'{LOGGER_NAME}.wire')
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=1)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    trace.addHandler(handler)
+    return trace
+
 
 class Monitor(object):
 
@@ -55,6 +112,19 @@ class Monitor(object):
         options: dict = {},
         callbacks: dict = {},
         log_level: str = 'WARNING',
+        raw: bool = False,
+        lazy_json: bool = False,
+        item_callbacks: dict = {},
+        logger: logging.Logger = None,
+        wire_trace: str = None,
+        wire_trace_max_bytes: int = DEFAULT_WIRE_TRACE_MAX_BYTES,
+        max_message_length: int = LINE_BUFFER_LENGTH,
+        max_pending_bytes: int = DEFAULT_HIGH_WATER,
+        resubscribe: bool = True,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+        reconnect_max_delay: float = DEFAULT_RECONNECT_MAX_DELAY,
+        reconnect_factor: float = ReconnectingClientFactory.factor,
+        reconnect_jitter: float = ReconnectingClientFactory.jitter,
     ):
         """Initialize Monitor:
           connection parameters: host, port, username, password, 
@@ -66,15 +136,35 @@ class Monitor(object):
             callbacks must return True to continue the monitor.run() loop
             by default, all callbacks will print to stdout; to override this, pass callbacks={}
           log_level: select filter for log: 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'
+          raw: if True, data channel messages are routed on the undecoded bytes and callbacks receive
+            a memoryview of the payload; STATUS and other control messages are still delivered as str
+          lazy_json: if True, payloads of the JSON channels (see message.JSON_CHANNELS) are delivered as
+            JSONMessage (or JSONBuffer in raw mode) objects; the decoded object is parsed on first access
+            of the .json attribute and cached for all consumers of the message; a JSONMessage is a str, so
+            callbacks written for str payloads keep working
+          item_callbacks: {'channel': function ...} for the ORDERS and EXECUTIONS channels
+            the snapshot is parsed while it is received and function(channel, id, record) is called for
+            each order or execution; the channel callback then receives the item count instead of the
+            JSON text.  Item callbacks must be set before run() and return True to continue.
+          logger: Logger used by this monitor and its connection, default logging.getLogger('txtrader_monitor');
+            log_level is applied to it, and a stderr handler is added only if no handlers are configured
+          wire_trace: if set, a file path receiving every RX and TX message, rotated at wire_trace_max_bytes
+          max_message_length: longest message accepted from the server; a longer one closes the connection
+          max_pending_bytes: payload bytes held in executor and priority queues before reading from the server
+            is paused; reading resumes when they fall to half (see flow.FlowControl and Monitor.flow)
+          resubscribe: if True, 'add' commands sent are remembered ('del' forgets them) and sent again after
+            each authorization, followed by 'orders' / 'executions' for the stores of track_orders() and
+            track_executions(); commands already sent on the new connection are not repeated
+          reconnect_delay, reconnect_max_delay, reconnect_factor, reconnect_jitter: reconnection backoff;
+            the first retry waits reconnect_delay seconds, and each failed retry multiplies the delay by
+            reconnect_factor (randomized by reconnect_jitter) up to reconnect_max_delay
         """
-        logging.basicConfig(
-            stream=sys.stderr,
-            level=log_level,
-            format="[%(asctime)s] {%(filename)s:%(lineno)d} %(levelname)s - %(message)s"
-        )
-        logger = logging.getLogger(self.__class__.__name__)
+        self.logger = configure_logger(logger, log_level)
+        self.wire_trace = wire_trace_logger(wire_trace, wire_trace_max_bytes) if wire_trace else None
 
-        logging.info(f"{self} __init__({host}, {port}, {username}, XXXXXXXX, {options}, {callbacks}, {log_level})")
+        self.logger.info(
+            "%s __init__(%s, %s, %s, XXXXXXXX, %s, %s, %s)", self, host, port, username, options, callbacks, log_level
+        )
 
         if not isinstance(options, dict):
             raise ValueError(f'options: expected dict type, got {type(options)}')
@@ -85,20 +175,95 @@ class Monitor(object):
         self.password = password or os.environ.get('TXTRADER_PASSWORD', DEFAULT_TXTRADER_PASSWORD)
 
         self.options = options
+        self.raw = raw
+        self.lazy_json = lazy_json
+
+        # per-channel ChannelExecutors, see set_execution_policy()
+        self.executors = {}
 
         # setup callback map
         self.set_callbacks(callbacks)
+        self.item_callbacks = {}
+        for channel, function in item_callbacks.items():
+            self.set_item_callback(channel, function)
 
-        # store LoopingCall if client calls set_tick_interval
-        self.tickers = set()
+        # named TICK intervals on one reactor timer, see set_tick_interval()
+        self.tick_scheduler = TickScheduler(self)
 
         self.shutdown_pending = False
 
+        # MonitorPool sharing the reactor with other monitors, see pool.MonitorPool
+        self.owner = None
+
+        # optional repeated message suppression stage, see set_dedup()
+        self.deduplicator = None
+
+        # optional QUOTE/TRADE conflation stage, see set_conflation()
+        self.conflator = None
+
+        # optional priority classes between parse and dispatch, see set_priority()
+        self.scheduler = None
+
+        # message and queue memory limits; objects that have paused reading from the server, see _pause()
+        self.max_message_length = max_message_length
+        self.flow = FlowControl(self, max_pending_bytes)
+
+        # functions called with every message before dispatch, see add_tap()
+        self.taps = []
+
+        # functions called with each item of a streamed snapshot, see add_item_tap()
+        self.item_taps = []
+
+        # functions called with the raw bytes of every received netstring, see record()
+        self.wire_taps = []
+        self.recorder = None
+
+        # optional Parquet archive of selected channels, see archive()
+        self.archiver = None
+
+        # optional instrumentation, see enable_metrics()
+        self.metrics = None
+
+        # optional server time to callback lag tracking, see enable_latency()
+        self.latency = None
+
+        # optional order and execution state, see track_orders() and track_executions()
+        self.order_book = None
+        self.execution_store = None
+
+        # optional NumPy quote/trade tables, see enable_market_data()
+        self.market_data = None
+
+        # optional shared memory quote table, see share_quotes()
+        self.quote_table = None
+
+        # optional buffered stdout/file writer, see set_output()
+        self.output = None
+
+        # optional local fan-out server, see serve_hub()
+        self.hub = None
+        self.hub_ports = []
+
+        # background reactor thread, see start()
+        self.thread = None
+        self.authorized_event = threading.Event()
+        # QueueConsumers of pending iter_messages() and request() calls, woken by close()
+        self.consumers = set()
+
         reactor.addSystemEventTrigger('after', 'startup', self.startup_event)
         reactor.addSystemEventTrigger('before', 'shutdown', self.shutdown_event)
 
+        # subscription commands replayed after authorization, see send()
+        self.resubscribe = resubscribe
+        self.subscriptions = {}
+        self.session_commands = set()
+        self.disconnected_at = None
+        self.time_to_resubscribe = None
+
         # create the factory singleton
-        self.factory = StatusClientFactory(self)
+        self.factory = StatusClientFactory(
+            self, reconnect_delay, reconnect_max_delay, reconnect_factor, reconnect_jitter
+        )
 
         self.connection_state = ConnectionState.INITIALIZING
         self.connection_wanted = False
@@ -106,7 +271,7 @@ class Monitor(object):
         self.connector = None
 
     def __del__(self):
-        logging.info(f'{self} __del__()')
+        self.logger.info('%s __del__()', self)
 
     def __repr__(self):
         return self.__str__()
@@ -121,23 +286,36 @@ class Monitor(object):
             callbacks.pop('*')
         else:
             default = self._cb_default
-        self.callbacks = {label: default for label in CHANNELS}
-        if callbacks:
-            self.callbacks.update(callbacks)
+        callbacks = dict({label: default for label in CHANNELS}, **callbacks)
+        for channel, executor in self.executors.items():
+            if executor.policy == 'process':
+                check_picklable(channel, callbacks[channel])
+        self.callbacks = callbacks
 
     def set_callback(self, channel, function):
         """Set a callback function (or None) for a message type"""
         if channel in CHANNELS:
+            if channel in self.executors and self.executors[channel].policy == 'process':
+                check_picklable(channel, function)
             self.callbacks[channel] = function
         else:
             raise ValueError
 
+    def set_item_callback(self, channel, function):
+        """Set a per-item callback function (or None) for a snapshot channel, enabling streaming parse"""
+        if channel not in STREAM_CHANNELS:
+            raise ValueError(f'{channel}: item callbacks are supported for {STREAM_CHANNELS}')
+        if function:
+            self.item_callbacks[channel] = function
+        else:
+            self.item_callbacks.pop(channel, None)
+
     def startup_event(self):
-        logging.info(f'{self} startup_event()')
+        self.logger.info('%s startup_event()', self)
         self._callback(Channel.STATUS, 'reactor startup')
 
     def shutdown_event(self):
-        logging.info(f'{self} shutdown_event()')
+        self.logger.info('%s shutdown_event()', self)
         self.set_connection_state(ConnectionState.SHUTDOWN)
         self._callback(Channel.SHUTDOWN, 'reactor shutdown detected')
         self.shutdown_pending = True
@@ -148,9 +326,9 @@ class Monitor(object):
             self._callback(Channel.CONNECTION, state.name)
 
     def connect(self):
-        logging.info(f'{self} connect()')
+        self.logger.info('%s connect()', self)
         if self.connection_state == ConnectionState.CONNECTED:
-            logging.error('connect: already connected')
+            self.logger.error('connect: already connected')
         else:
             connection_wanted = True
             if not self.connection:
@@ -158,24 +336,55 @@ class Monitor(object):
                 self.connector = reactor.connectTCP(self.host.encode(), self.port, self.factory)
 
     def _connecting(self, connector):
-        logging.info(f'{self} _connecting(connector={hex(id(connector))})')
+        self.logger.info('%s _connecting(connector=%s)', self, hex(id(connector)))
         self.connector == connector
         self.set_connection_state(ConnectionState.CONNECT_PENDING)
 
     def _connected(self, connection):
-        logging.info(f'{self} _connected(connection={hex(id(connection))})')
+        self.logger.info('%s _connected(connection=%s)', self, hex(id(connection)))
         self.connection = connection
+        self.session_commands = set()
+        self.flow.connected()
+        if self.deduplicator:
+            self.deduplicator.clear()
+        if self.metrics:
+            self.metrics.connects += 1
         self.set_connection_state(ConnectionState.CONNECTED)
 
+    def _authorized(self, channel):
+        self.logger.info('%s _authorized(channel=%s)', self, channel)
+        if self.resubscribe:
+            self._resubscribe()
+        self.authorized_event.set()
+
+    def _resubscribe(self):
+        """replay the subscriptions and store snapshots, skipping commands already sent on this connection"""
+        commands = list(self.subscriptions)
+        if self.order_book is not None:
+            commands.append('orders')
+        if self.execution_store is not None:
+            commands.append('executions')
+        for command in commands:
+            if command not in self.session_commands:
+                self.send(command)
+        if self.disconnected_at is not None:
+            self.time_to_resubscribe = time.time() - self.disconnected_at
+            self.disconnected_at = None
+            self.logger.info(
+                '%s resubscribed %s commands in %.3f seconds', self, len(commands), self.time_to_resubscribe
+            )
+            if self.metrics:
+                self.metrics.resubscribe_latency.record(self.time_to_resubscribe)
+
     def _connection_failed(self):
-        logging.info(f'{self} _connection_failed()')
+        self.logger.info('%s _connection_failed()', self)
         self.set_connection_state(ConnectionState.CONNECT_FAILED)
 
     def disconnect(self):
-        logging.info(f'{self} disconnect()')
+        self.logger.info('%s disconnect()', self)
         connection_wanted = False
         if self.connection_state == ConnectionState.DISCONNECTED:
-            logging.error('disconnect: already disconnected')
+            self.logger.error('disconnect: already disconnected')
         else:
             self.set_connection_state(ConnectionState.DISCONNECT_PENDING)
             if self.connection_state in [ConnectionState.CONNECTING, ConnectionState.CONNECT_PENDING]:
@@ -184,58 +393,374 @@ class Monitor(object):
                 self.connector.disconnect()
 
     def _disconnected(self, reason):
-        logging.info(f'{self} _disconnected({reason.getErrorMessage()})')
+        self.logger.info('%s _disconnected(%s)', self, reason.getErrorMessage())
+        self.authorized_event.clear()
+        if not self.shutdown_pending:
+            self.disconnected_at = time.time()
         self.connection = None
         self.connector = None
         self.set_connection_state(ConnectionState.DISCONNECTED)
 
-    def set_tick_interval(self, interval_seconds):
-        looper = LoopingCall(self.ticker)
-        looper.start(interval_seconds)
-        self.tickers.add(looper)
-        return looper
+    def set_tick_interval(self, interval_seconds: float, name: str = None, policy: str = 'skip'):
+        """Deliver a TICK message now and every interval_seconds; the payload is a ticker.Tick, the float wall
+           clock time of the tick with name, monotonic and missed attributes.  name defaults to 'tick1',
+           'tick2'...; policy 'skip' or 'catchup' selects the handling of ticks missed while the reactor was
+           busy (see ticker.TickScheduler).  Returns the Timer; stop it with stop_ticker() or Timer.stop().
+        """
+        return self.tick_scheduler.add(interval_seconds, name, policy)
+
+    def stop_ticker(self, ticker):
+        """stop a timer returned by set_tick_interval(), or the timer named ticker"""
+        self.tick_scheduler.remove(ticker)
+
+    def set_dedup(self, channels: dict = DEFAULT_DEDUP_CHANNELS, keys: dict = {}, max_keys: int = DEFAULT_MAX_KEYS):
+        """Suppress messages that repeat the last value for their key, after the taps and before conflation;
+           see dedup.Deduplicator
+          channels: {channel: None to compare the whole payload, or [JSON field, ...] to compare}
+          keys: {channel: record field or function(data)} overriding the key (symbol, order id...) per channel
+          max_keys: keys remembered, least recently seen dropped first
+        The last values are forgotten on each new connection.  Pass channels=None to disable.
+        Returns the Deduplicator, whose suppressed counters report the messages dropped per channel.
+        """
+        self.deduplicator = Deduplicator(channels, keys, max_keys) if channels else None
+        return self.deduplicator
+
+    def set_conflation(self, channels: list = DEFAULT_CONFLATE_CHANNELS, interval: float = 0):
+        """Deliver only the latest update per symbol for channels, flushing after interval seconds
+           (0 flushes as soon as the reactor is free); pass channels=None to disable conflation
+           returns the Conflator, whose counters report the updates conflated per symbol
+        """
+        if self.conflator:
+            self.conflator.flush()
+            self.conflator.stop()
+        self.conflator = Conflator(self, channels, interval) if channels else None
+        return self.conflator
+
+    def set_priority(self, classes: list = DEFAULT_PRIORITY_CLASSES, max_pending: int = DEFAULT_MAX_PENDING):
+        """Deliver messages by priority class instead of arrival order; see scheduler.PriorityScheduler
+          classes: [(name, [channel, ...], budget), ...] highest priority first, where budget is the callback
+            time in seconds given to the class per reactor iteration, or None for no limit
+          max_pending: messages queued in a class before reading from the server is paused
+        Messages keep their arrival order within a class, but not across classes.  Taps see every message
+        in arrival order before it is queued.  Pass classes=None to return to arrival order.
+        Returns the PriorityScheduler.
+        """
+        if self.scheduler:
+            scheduler, self.scheduler = self.scheduler, None
+            scheduler.flush()
+            scheduler.stop()
+        self.scheduler = PriorityScheduler(self, classes, max_pending) if classes else None
+        return self.scheduler
+
+    def set_execution_policy(
+        self,
+        channel: str,
+        policy: str = 'inline',
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        overflow: str = 'block',
+        workers: int = None,
+    ):
+        """Select how a channel's callback runs:
+          policy: 'inline' (on the reactor thread), 'thread' (reactor thread pool) or 'process' (process pool)
+            with thread or process policies, calls are made one at a time in arrival order
+          max_queue: messages waiting for the callback before the overflow policy applies
+          overflow: 'block' (pause reading from the server), 'drop-oldest' or 'conflate' (latest per symbol)
+          workers: thread pool size suggestion, or process pool size
+          A process policy callback is pickled to the worker, so it must be a module level function; a lambda,
+          closure or bound method (including the default print callback) raises ValueError here or in
+          set_callback()
+        """
+        if channel not in CHANNELS:
+            raise ValueError
+        if channel in self.executors:
+            self.executors.pop(channel).stop()
+        if policy != 'inline':
+            self.executors[channel] = ChannelExecutor(self, channel, policy, max_queue, overflow, workers)
+
+    def _pause(self, source):
+        """stop reading from the server until every source that paused has called _resume()"""
+        self.flow.pause(source)
+
+    def _resume(self, source):
+        self.flow.resume(source)
 
-    def stop_ticker(self, ticker_looper):
-        ticker_looper.stop()
-        self.tickers.discard(looper)
+    def add_tap(self, function, channels: list = None):
+        """Call function(channel, data) for each message on channels (default all) before it is dispatched;
+           the return value is ignored.  Taps run on the reactor thread.
+        """
+        self.taps.append((set(channels) if channels else None, function))
 
-    def ticker(self):
-        self._callback(Channel.TICK, time.time())
+    def remove_tap(self, function):
+        self.taps = [tap for tap in self.taps if tap[1] != function]
+
+    def add_item_tap(self, function, channels: list = None):
+        """Call function(channel, key, item) for each item of a snapshot on channels (default all) that is
+           streamed to item callbacks, before the item callback; the snapshot message that follows carries
+           only the item count.  The return value is ignored.
+        """
+        self.item_taps.append((set(channels) if channels else None, function))
+
+    def record(self, path: str, compress: bool = None):
+        """Append every netstring received from the server to a capture file (gzip if compress or path
+           ends with .gz), flushed every capture.DEFAULT_FLUSH_INTERVAL seconds; see capture.replay() and
+           Monitor.replay()
+        """
+        self.stop_recording()
+        self.recorder = CaptureWriter(path, compress)
+        self.recorder.start()
+        self.wire_taps.append(self.recorder.write)
+
+    def stop_recording(self):
+        if self.recorder:
+            self.wire_taps.remove(self.recorder.write)
+            self.recorder.close()
+            self.recorder = None
+
+    def archive(self, directory: str, channels: list = DEFAULT_ARCHIVE_CHANNELS, **kwargs):
+        """Archive the messages of channels, before any conflation, to compressed Parquet segment files under
+           directory (requires pyarrow); kwargs are archive.ArchiveWriter arguments (batch_rows, flush_interval,
+           rotate_seconds, rotate_bytes, compression, max_batches).  Open segments are finalized by
+           stop_archive() and at shutdown.  Returns the ArchiveWriter.
+        """
+        if self.archiver:
+            raise RuntimeError(f'already archiving to {self.archiver.directory}')
+        self.archiver = ArchiveWriter(self, directory, channels, **kwargs)
+        self.add_tap(self.archiver.tap, self.archiver.channels)
+        self.archiver.start()
+        return self.archiver
+
+    def stop_archive(self):
+        if self.archiver:
+            self.remove_tap(self.archiver.tap)
+            self.archiver.close()
+            self.archiver = None
+
+    def replay(self, path: str, speed: float = None):
+        """Feed a capture file through the normal receive and callback path, as fast as possible (speed=None)
+           or at speed times the recorded rate; returns the number of messages replayed
+        """
+        return replay(self, path, speed)
+
+    def enable_metrics(self, port: int = None, interface: str = '127.0.0.1', sample_interval: int = 10):
+        """Count messages and bytes received, time callbacks per channel and per function, and count
+           reconnects; returns the Metrics object, whose snapshot() method reports the current values.
+           Every sample_interval'th callback on each channel is timed; counters are exact.
+           If port is set, the metrics are also served in Prometheus text format over HTTP.
+        """
+        if not self.metrics:
+            self.metrics = Metrics(self, sample_interval)
+        if port is not None:
+            serve_metrics(reactor, self.metrics, port, interface)
+        return self.metrics
+
+    def enable_latency(
+        self, channels: list = DEFAULT_LATENCY_CHANNELS, threshold: float = DEFAULT_LAG_THRESHOLD, **kwargs
+    ):
+        """Track network, queue, callback and total lag of the messages on channels, using the server times of
+           TIME and EXECUTION_DATA (option 'execution-data') messages; a lag over threshold seconds sends a
+           'latency alert: ...' STATUS message.  kwargs are latency.LatencyTracker arguments (window, offset,
+           offset_window, alert_interval).  Returns the LatencyTracker; percentiles are in its snapshot()
+           and in the metrics.
+        """
+        if not self.latency:
+            self.latency = LatencyTracker(self, channels, threshold, **kwargs)
+            self.add_tap(self.latency.tap, self.latency.channels)
+        return self.latency
+
+    def track_orders(self, **fields):
+        """Keep an OrderBook current from the ORDERS snapshot and ORDER_DATA updates (option 'order-data');
+           fields (key, symbol, account) override the record field names.  Returns the OrderBook.
+           With resubscribe (the default), 'orders' is sent after each authorization to seed and reconcile it.
+        """
+        if self.order_book is None:
+            self.order_book = OrderBook(**fields)
+            self.add_tap(self.order_book.tap, self.order_book.channels)
+            self.add_item_tap(self.order_book.item_tap, self.order_book.channels)
+        return self.order_book
+
+    def track_executions(self, **fields):
+        """Keep an ExecutionStore current from the EXECUTIONS snapshot and EXECUTION_DATA updates
+           (option 'execution-data'); fields (key, symbol, account, order) override the record field names.
+           Returns the ExecutionStore.  With resubscribe, 'executions' is sent after each authorization.
+        """
+        if self.execution_store is None:
+            self.execution_store = ExecutionStore(**fields)
+            self.add_tap(self.execution_store.tap, self.execution_store.channels)
+            self.add_item_tap(self.execution_store.item_tap, self.execution_store.channels)
+        return self.execution_store
+
+    def enable_market_data(self, capacity: int = DEFAULT_MARKET_DATA_CAPACITY):
+        """Parse every QUOTE and TRADE message into per-symbol NumPy columns (requires numpy), before any
+           conflation; returns the MarketData object, which provides bars() and vwap() aggregation.
+           capacity is the initial rows per symbol table.
+        """
+        if not self.market_data:
+            self.market_data = MarketData(capacity)
+            self.add_tap(self.market_data.tap, self.market_data.channels)
+        return self.market_data
+
+    def share_quotes(self, name: str, slots: int = DEFAULT_QUOTE_TABLE_SLOTS):
+        """Publish the latest QUOTE and TRADE per symbol (up to slots symbols) to the shared memory segment
+           name, for local processes using shm.QuoteTableReader(name); the segment is removed at shutdown.
+           Returns the QuoteTableWriter.  Add the symbols to the monitor to start the quote stream.
+        """
+        if not self.quote_table:
+            self.quote_table = QuoteTableWriter(name, slots)
+            self.add_tap(self.quote_table.tap, self.quote_table.channels)
+        return self.quote_table
+
+    def serve_hub(
+        self,
+        port: int = None,
+        path: str = None,
+        interface: str = '127.0.0.1',
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+        slow_consumer: str = 'disconnect',
+    ):
+        """Re-serve this monitor's connection to local clients on a TCP port and/or a Unix socket path;
+           clients are Monitors (or other txtrader clients) using this monitor's username and password.
+           See hub.Hub for max_buffer and slow_consumer.  Returns the Hub.
+        """
+        if not self.hub:
+            self.hub = Hub(self, self.username, self.password, max_buffer, slow_consumer)
+            self.wire_taps.append(self.hub.forward)
+        if port is not None:
+            self.hub_ports.append(reactor.listenTCP(port, self.hub, interface=interface))
+        if path:
+            self.hub_ports.append(reactor.listenUNIX(path, self.hub))
+        return self.hub
+
+    def set_output(
+        self,
+        format: str = 'text',
+        include: list = None,
+        exclude: list = None,
+        stream: IO = None,
+        buffer_lines: int = DEFAULT_BUFFER_LINES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        validate_json: bool = False
+    ):
+        """Write messages of the channels in include (default all) and not in exclude to stream (default stdout)
+           in format 'text', 'ndjson' or 'csv' (QUOTE and TRADE only) through a buffered output.OutputWriter.
+           The writer replaces the callbacks of the selected channels; the default print callbacks of the others
+           are disabled.  The buffer is flushed every flush_interval seconds and at reactor shutdown.
+           validate_json parses every ndjson JSON channel payload that is not already decoded (see OutputWriter).
+           Returns the OutputWriter.
+        """
+        if self.output:
+            raise RuntimeError('output already set')
+        output = OutputWriter(stream, format, buffer_lines, flush_interval, validate_json)
+        selected = select_channels(include, exclude, output.channels)
+        self.output = output
+        for channel in CHANNELS:
+            if channel in selected:
+                self.callbacks[channel] = self.output.write
+            elif self.callbacks[channel] == self._cb_default:
+                self.callbacks[channel] = None
+        self.output.start()
+        reactor.addSystemEventTrigger('after', 'shutdown', self.output.close)
+        return self.output
 
     def _callback(self, channel: Channel, data: str):
         if isinstance(channel, Channel):
             channel = channel.name
+        metrics = self.metrics
+        if metrics:
+            metrics.messages[channel] += 1
+        if self.taps:
+            for channels, function in self.taps:
+                if channels is None or channel in channels:
+                    try:
+                        function(channel, data)
+                    except Exception:
+                        # a failing tap must not drop the connection
+                        self.logger.exception('%s tap %r failed on %s', self, function, channel)
+        if self.deduplicator and channel in self.deduplicator.channels and not self.deduplicator.check(channel, data):
+            return
+        if self.conflator and channel in self.conflator.channels:
+            return self.conflator.put(channel, data)
+        self._schedule(channel, data)
+
+    def _schedule(self, channel: str, data):
+        # SHUTDOWN is delivered at once; the reactor may not run another iteration
+        if self.scheduler and channel != Channel.SHUTDOWN.name:
+            return self.scheduler.put(channel, data)
+        self._dispatch(channel, data)
+
+    def _dispatch(self, channel: str, data: str):
+        if self.executors and channel in self.executors:
+            return self.executors[channel].put(data)
         func = self.callbacks[channel]
-        if func:
-            if not func(channel, data):
-                self.shutdown(f'client requested shutdown')
+        latency = self.latency if self.latency and channel in self.latency.channels else None
+        if not (func or latency):
+            return
+        metrics = self.metrics
+        if func and metrics and not metrics.messages[channel] % metrics.sample_interval:
+            start = time.perf_counter_ns()
+            ret = latency.dispatch(func, channel, data) if latency else func(channel, data)
+            metrics.channel_latency[channel].record_ns(time.perf_counter_ns() - start)
+        elif latency:
+            ret = latency.dispatch(func, channel, data)
+        else:
+            ret = func(channel, data)
+        if not ret:
+            self.shutdown(f'client requested shutdown')
+
+    def _item_callback(self, channel: Channel, key: str, item: dict):
+        for channels, function in self.item_taps:
+            if channels is None or channel.name in channels:
+                function(channel.name, key, item)
+        if not self.item_callbacks[channel.name](channel.name, key, item):
+            self.shutdown(f'client requested shutdown')
 
     def shutdown(self, reason):
         self.shutdown_pending = True
-        logging.info(f'{self} shutdown(reason={reason})')
-        while self.tickers:
-            self.tickers.pop().stop()
+        self.logger.info('%s shutdown(reason=%s)', self, reason)
+        self.tick_scheduler.stop()
+        if self.conflator:
+            self.conflator.stop()
+        if self.scheduler:
+            self.scheduler.stop()
+        for executor in self.executors.values():
+            executor.stop()
+        self.stop_recording()
+        self.stop_archive()
+        if self.hub:
+            while self.hub_ports:
+                self.hub_ports.pop().stopListening()
+            self.hub.stop()
+        if self.quote_table:
+            self.remove_tap(self.quote_table.tap)
+            self.quote_table.close()
+            self.quote_table = None
         if self.connection:
             self.connection.send(f'exit {reason}')
             self.disconnect()
 
     def _cb_default(self, channel, msg):
         #if not self.shutdown_pending:
-        print(f'{channel}: {msg}')
+        print(f'{channel}: {payload_text(msg)}')
         return True
 
     def send(self, command):
+        verb, dummy, symbol = command.partition(' ')
+        if verb == 'add':
+            self.subscriptions[command] = True
+        elif verb == 'del':
+            self.subscriptions.pop(f'add {symbol}', None)
+            self.session_commands.discard(f'add {symbol}')
         if self.connection:
             self.connection.send(command)
+            self.session_commands.add(command)
             ret = True
         else:
-            logging.error(f'send failed; connection state is {self.connection_state.name}')
+            self.logger.error('send failed; connection state is %s', self.connection_state.name)
             ret = False
         return ret
 
     def signal_handler(self, sig, frame):
         signame = Signals(sig).name
-        logging.warning(f'{signame} received; attempting graceful shutdown...')
+        self.logger.warning('%s received; attempting graceful shutdown...', signame)
         # reset all signals back to the default
         self.set_handler(SIG_DFL)
         self.shutdown(f'received {signame}')
@@ -247,113 +772,195 @@ class Monitor(object):
 
     def run(self):
         """React to gateway events, returning data via callback functions."""
-        logging.info(f'{self} run()')
+        self.logger.info('%s run()', self)
         self.set_handler(self.signal_handler)
         reactor.callWhenRunning(self.connect)
         reactor.run()
 
     def stop(self):
+        if self.owner:
+            return self.owner._stopped(self)
         try:
             if reactor.running:
                 reactor.stop()
         except ReactorNotRunning:
             pass
 
+    def start(self, timeout: float = None):
+        """Run the reactor in a background thread and wait until the connection is authorized.
+           For batch scripts using iter_messages() and request(); the reactor can only be started once
+           per process, so keep the Monitor and reuse the connection.  Callbacks still run on the
+           reactor thread; pass callbacks={'*': None} to disable the default print callbacks.
+        """
+        if not self.thread:
+            self.logger.info('%s start()', self)
+            self.thread = threading.Thread(
+                target=reactor.run, kwargs={'installSignalHandlers': False}, name=str(self), daemon=True
+            )
+            reactor.callWhenRunning(self.connect)
+            self.thread.start()
+        if not self.authorized_event.wait(timeout):
+            raise TimeoutError(f'connection not authorized after {timeout} seconds')
+
+    def close(self, timeout: float = None):
+        """Shut down the connection and the background reactor thread started by start(); pending
+           iter_messages() iterators end and pending request() calls raise ConnectionError
+        """
+        for consumer in list(self.consumers):
+            consumer.close()
+        if self.thread:
+            reactor.callFromThread(self.shutdown, 'client requested shutdown')
+            reactor.callFromThread(self.stop)
+            self.thread.join(timeout)
+            self.thread = None
+
+    def iter_messages(self, channels: list = None, timeout: float = None, max_queue: int = DEFAULT_MAX_QUEUE):
+        """Generate (channel, message) tuples from a background reactor thread, see start()
+          channels: channel names to receive (default all)
+          timeout: stop iterating when no message is received for timeout seconds (default wait forever)
+          max_queue: messages buffered before reading from the server is paused
+        """
+        self.start(timeout)
+        consumer = QueueConsumer(self, max_queue)
+        self.consumers.add(consumer)
+        reactor.callFromThread(self.add_tap, consumer.put, channels)
+        try:
+            while True:
+                try:
+                    message = consumer.get(timeout)
+                except Empty:
+                    return
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.consumers.discard(consumer)
+            reactor.callFromThread(self.remove_tap, consumer.put)
+            reactor.callFromThread(consumer.stop)
+
+    def request(self, command: str, response_channel: str, timeout: float = None):
+        """Send command and return the first message received on response_channel, see start()"""
+        self.start(timeout)
+        consumer = QueueConsumer(self, DEFAULT_MAX_QUEUE)
+        self.consumers.add(consumer)
+
+        def _send():
+            self.add_tap(consumer.put, [response_channel])
+            self.send(command)
+
+        reactor.callFromThread(_send)
+        try:
+            message = consumer.get(timeout)
+        except Empty:
+            raise TimeoutError(f'no {response_channel} response to {command} after {timeout} seconds')
+        finally:
+            self.consumers.discard(consumer)
+            reactor.callFromThread(self.remove_tap, consumer.put)
+            reactor.callFromThread(consumer.stop)
+        if message is None:
+            raise ConnectionError(f'monitor closed before a {response_channel} response to {command}')
+        return message[1]
+
+
+class QueueConsumer(object):
+    """Hand messages from the reactor thread to a consumer thread through a bounded queue;
+       reading from the server is paused while the queue is full
+    """
+
+    def __init__(self, controller, max_queue):
+        self.controller = controller
+        self.max_queue = max_queue
+        self.queue = Queue()
+        self.paused = False
+
+    def put(self, channel, data):
+        self.queue.put((channel, data))
+        if self.queue.qsize() >= self.max_queue and not self.paused:
+            self.paused = True
+            self.controller._pause(self)
+
+    def get(self, timeout):
+        """return the next (channel, data), or None once close() was called"""
+        item = self.queue.get(timeout=timeout)
+        if item is None:
+            self.queue.put(None)
+            return None
+        if self.paused and self.queue.qsize() <= self.max_queue // 2:
+            reactor.callFromThread(self.resume)
+        return item
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            self.controller._resume(self)
 
-class StatusClient(NetstringReceiver):
+    def stop(self):
+        self.resume()
 
-    MAX_LENGTH = LINE_BUFFER_LENGTH
+    def close(self):
+        """wake the consumer thread; called from any thread"""
+        self.queue.put(None)
 
-    def __init__(self, controller):
-        logging.info(f'{self} __init__({hex(id(controller))})')
-        self.channel = ''
-        self.message_types = []
-        self.channel_map = {}
-        self.last_account = ''
-        self.controller = controller
 
-    def __repr__(self):
-        return self.__str__()
+class StatusClient(StatusReceiver, NetstringReceiver):
 
-    def __str__(self):
-        return f"{self.__class__.__name__}<{hex(id(self))}>"
+    MAX_LENGTH = LINE_BUFFER_LENGTH
+
+    def __init__(self, controller):
+        self.initReceiver(controller)
+        self.MAX_LENGTH = controller.max_message_length
+        self.logger.info('%s __init__(%s)', self, hex(id(controller)))
 
     def __del__(self):
-        logging.info(f'{self} __del__()')
+        self.logger.info('%s __del__()', self)
 
     def connectionMade(self):
-        logging.info(f"{self} connectionMade()")
+        self.logger.info("%s connectionMade()", self)
+        if self.controller.item_callbacks:
+            self.decoder = NetstringDecoder(self.stringReceived, self.streamRoute, self.MAX_LENGTH)
         self.controller._connected(self)
 
     def connectionLost(self, reason):
-        logging.info(f"{self} connectionLost({reason.getErrorMessage()})")
+        self.logger.info("%s connectionLost(%s)", self, reason.getErrorMessage())
         self.controller._disconnected(reason=reason)
 
-    def send(self, data, mask_password=None):
-        if mask_password:
-            log_data = data.replace(mask_password, 'XXXXXXXX')
-        else:
-            log_data = data
-        logging.info(str(f"{self} send(data={log_data})"))
-        logging.debug(f"TX: {log_data}")
-        self.sendString(data.encode())
-
-    def stringReceived(self, data):
-        data = data.decode()
-        logging.debug(f"RX: {data}")
-        if data.startswith('.'):
-            self.controller._callback(Channel.STATUS, data)
-            if data.lower().startswith('.connected'):
-                self.send(
-                    f"auth {self.controller.username} {self.controller.password} {json.dumps(self.controller.options)}",
-                    mask_password=self.controller.password
-                )
-            elif data.lower().startswith('.authorized'):
-                dummy, self.channel = data.split()[:2]
-                # setup channel map now that we have the channel name
-                self.channel_map = {
-                    '%s.time: ' % self.channel: Channel.TIME,
-                    '%s.error: ' % self.channel: Channel.ERROR,
-                    '%s.order.' % self.channel: Channel.ORDER,
-                    '%s.order-data ' % self.channel: Channel.ORDER_DATA,
-                    '%s.orders: ' % self.channel: Channel.ORDERS,
-                    '%s.ticket.' % self.channel: Channel.TICKET,
-                    '%s.ticket-data ' % self.channel: Channel.TICKET_DATA,
-                    '%s.open-order.' % self.channel: Channel.ORDER,
-                    '%s.execution.' % self.channel: Channel.EXECUTION,
-                    '%s.executions: ' % self.channel: Channel.EXECUTIONS,
-                    '%s.execution-data ' % self.channel: Channel.EXECUTION_DATA,
-                    '%s.symbol: ' % self.channel: Channel.SYMBOL,
-                    '%s.symbol-data: ' % self.channel: Channel.SYMBOL_DATA,
-                    '%s.quote.' % self.channel: Channel.QUOTE,
-                    '%s.trade.' % self.channel: Channel.TRADE
-                }
-                self.account_channel = '%s.current-account' % self.channel
-        else:
-            handled = False
-            for channel, callback_channel in self.channel_map.items():
-                if data.startswith(channel):
-                    handled = True
-                    return self.controller._callback(callback_channel, data[len(channel):])
-            # only return current_account message if different from last one
-            if data.startswith(self.account_channel):
-                if self.last_account == data:
-                    return
-                else:
-                    self.last_account = data
-            self.controller._callback(Channel.STATUS, data)
+    def dataReceived(self, data):
+        if self.controller.metrics:
+            self.controller.metrics.bytes_received += len(data)
+        if self.controller.latency:
+            self.controller.latency.received_at = self.controller.latency.clock()
+        if not self.decoder:
+            return NetstringReceiver.dataReceived(self, data)
+        try:
+            self.decoder.feed(data)
+        except (NetstringParseError, ValueError) as e:
+            self.logger.error('%s %s', self, e)
+            self.transport.loseConnection()
 
 
 class StatusClientFactory(ReconnectingClientFactory):
-    initialDelay = 1
-    maxDelay = 15
+    initialDelay = DEFAULT_RECONNECT_DELAY
+    maxDelay = DEFAULT_RECONNECT_MAX_DELAY
 
-    def __init__(self, controller):
-        logging.info(f"{self} __init__({hex(id(controller))})")
+    def __init__(
+        self,
+        controller,
+        initial_delay: float = DEFAULT_RECONNECT_DELAY,
+        max_delay: float = DEFAULT_RECONNECT_MAX_DELAY,
+        factor: float = ReconnectingClientFactory.factor,
+        jitter: float = ReconnectingClientFactory.jitter,
+    ):
+        self.logger = controller.logger
+        self.logger.info("%s __init__(%s)", self, hex(id(controller)))
         self.controller = controller
+        self.initialDelay = initial_delay
+        self.maxDelay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.resetDelay()
 
     def __del__(self):
-        logging.info(f'{self} __del__()')
+        self.logger.info('%s __del__()', self)
 
     def __repr__(self):
         return self.__str__()
@@ -362,31 +969,40 @@ class StatusClientFactory(ReconnectingClientFactory):
         return f"{self.__class__.__name__}<{hex(id(self))}>"
 
     def startedConnecting(self, connector):
-        logging.info(f"{self} startedConnecting(connector={hex(id(connector))})")
+        self.logger.info("%s startedConnecting(connector=%s)", self, hex(id(connector)))
         self.controller._connecting(connector)
 
     def buildProtocol(self, addr):
-        logging.info(f"{self} buildProtocol(addr={addr}) (connected)")
+        self.logger.info("%s buildProtocol(addr=%s) (connected)", self, addr)
         self.resetDelay()
         return StatusClient(self.controller)
 
     def clientConnectionFailed(self, connector, reason):
-        logging.info(f"{self} clientConnectionFailed(connector={hex(id(connector))} msg={reason.getErrorMessage()})")
+        self.logger.info(
+            "%s clientConnectionFailed(connector=%s msg=%s)", self, hex(id(connector)), reason.getErrorMessage()
+        )
         ReconnectingClientFactory.clientConnectionFailed(self, connector, reason)
 
     def clientConnectionLost(self, connector, reason):
-        logging.info(f"{self} clientConnectionLost(connector={hex(id(connector))} msg={reason.getErrorMessage()})")
+        self.logger.info(
+            "%s clientConnectionLost(connector=%s msg=%s)", self, hex(id(connector)), reason.getErrorMessage()
+        )
         ReconnectingClientFactory.clientConnectionLost(self, connector, reason)
 
     def startFactory(self):
-        logging.info(f"{self} startFactory()")
+        self.logger.info("%s startFactory()", self)
 
     def stopFactory(self):
-        logging.info(f"{self} stopFactory()")
+        self.logger.info("%s stopFactory()", self)
         if self.controller.shutdown_pending:
             self.controller.stop()
 
 
+def channel_list(values):
+    """return the channel names of repeated, comma separated option values (case insensitive)"""
+    return [name.strip().upper() for value in values for name in value.split(',') if name.strip()]
+
+
 @click.command('txtrader_monitor', short_help='monitor txtrader update channel')
 @click.option('-h', '--host', default=DEFAULT_TXTRADER_HOST, envvar='TXTRADER_HOST')
 @click.option('-p', '--port', type=int, default=DEFAULT_TXTRADER_TCP_PORT, envvar='TXTRADER_TCP_PORT')
@@ -403,7 +1019,43 @@ class StatusClientFactory(ReconnectingClientFactory):
     default='WARNING',
     envvar='TXTRADER_LOG_LEVEL'
 )
+@click.option('-f', '--format', type=click.Choice(FORMATS), default='text', help='stdout message format')
+@click.option('-i', '--include', multiple=True, help='write only these channels (comma separated, repeatable)')
+@click.option('-x', '--exclude', multiple=True, help='do not write these channels (comma separated, repeatable)')
+@click.option('--record', type=click.Path(dir_okay=False), help='append received messages to a capture file')
+@click.option('--archive', type=click.Path(file_okay=False), help='archive messages to Parquet files in this directory')
+@click.option('--wire-trace', type=click.Path(dir_okay=False), help='write RX/TX messages to a rotating trace file')
+@click.option('--hub-port', type=int, help='re-serve the connection to local clients on this TCP port')
+@click.option('--hub-socket', type=click.Path(dir_okay=False), help='re-serve the connection on a Unix socket')
+@click.option('--hub-interface', default='127.0.0.1', help='interface for --hub-port')
 @click.version_option(VERSION)
-def txtrader_monitor(host, port, username, password, options, log_level, version):
+def txtrader_monitor(
+    host, port, username, password, options, log_level, version, format, include, exclude, record, archive, wire_trace,
+    hub_port, hub_socket, hub_interface
+):
     options = json.loads(options)
-    Monitor(host, port, username, password, options=options, callbacks={}, log_level=log_level).run()
+    hub = hub_port is not None or hub_socket
+    # in hub mode messages go to the hub clients instead of stdout
+    callbacks = {'*': None} if hub else {}
+    monitor = Monitor(
+        host,
+        port,
+        username,
+        password,
+        options=options,
+        callbacks=callbacks,
+        log_level=log_level,
+        wire_trace=wire_trace
+    )
+    if hub:
+        monitor.serve_hub(hub_port, hub_socket, hub_interface)
+    else:
+        try:
+            monitor.set_output(format, channel_list(include), channel_list(exclude))
+        except ValueError as ex:
+            raise click.BadParameter(str(ex))
+    if record:
+        monitor.record(record)
+    if archive:
+        monitor.archive(archive)
+    monitor.run()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  output.py
+  ---------
+
+  TxTrader OutputWriter - buffered text, NDJSON and CSV output of channel messages
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import sys
+import time
+import logging
+
+import ujson
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.message import JSON_CHANNELS
+from txtrader_monitor.store import decode
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ['text', 'ndjson', 'csv']
+
+# lines held before a write to the stream
+DEFAULT_BUFFER_LINES = 4096
+
+# seconds between flushes of a partly filled buffer
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+# csv output: the QUOTE and TRADE payload fields share one header; server_time is the optional timestamp field
+CSV_CHANNELS = [Channel.QUOTE.name, Channel.TRADE.name]
+CSV_HEADER = 'timestamp,channel,symbol,bid,bid_size,ask,ask_size,last,size,volume,server_time\n'
+
+JSON_CHANNEL_NAMES = frozenset(c.name for c in JSON_CHANNELS)
+
+# closing character of a JSON object or array by its opening character
+JSON_CLOSE = {'{': '}', '[': ']'}
+
+
+def payload_text(data):
+    """return a channel payload as str: str, memoryview, JSONBuffer, or an item count"""
+    if isinstance(data, str):
+        return data
+    if isinstance(data, memoryview):
+        return bytes(data).decode()
+    return str(data)
+
+
+def select_channels(include: list = None, exclude: list = None, channels: list = ALL_CHANNELS):
+    """return the names in channels that are in include (default all) and not in exclude"""
+    for name in (include or []) + (exclude or []):
+        if name not in ALL_CHANNELS:
+            raise ValueError(f'unknown channel {name}')
+    return [c for c in channels if (not include or c in include) and not (exclude and c in exclude)]
+
+
+class OutputWriter(object):
+    """Monitor callback writing each message as a line to stream (default sys.stdout)
+
+    format:
+      text: 'CHANNEL: payload', as the default callbacks print
+      ndjson: {"channel": ..., "timestamp": receive time, "data": ...}; the data of the JSON channels is the
+        record, other payloads and JSON channel payloads that are not a JSON object or array are strings.
+        A plain str payload is only checked for matching outer braces unless validate_json is set; a lazy_json
+        JSONMessage is checked with its cached decode.
+      csv: QUOTE and TRADE messages under CSV_HEADER; other channels are not written
+
+    Lines are collected in memory and written to the stream with one write() when buffer_lines are held,
+    and every flush_interval seconds once start() is called.  If the stream is closed by its reader, write()
+    returns False, which shuts down a Monitor using it as a callback.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        format: str = 'text',
+        buffer_lines: int = DEFAULT_BUFFER_LINES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        validate_json: bool = False
+    ):
+        if format not in FORMATS:
+            raise ValueError(f'unknown format {format}')
+        self.stream = stream or sys.stdout
+        self.format = format
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+        self.validate_json = validate_json
+        self.clock = time.time
+        self.lines = []
+        self.written = 0
+        self.errors = 0
+        # JSON channel payloads written as strings because they did not parse
+        self.invalid = 0
+        self.broken = False
+        self.flusher = None
+        self.write = getattr(self, f'_write_{format}')
+        if format == 'csv':
+            self.lines.append(CSV_HEADER)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    @property
+    def channels(self):
+        """channels this format writes"""
+        return CSV_CHANNELS if self.format == 'csv' else ALL_CHANNELS
+
+    def _append(self, line):
+        lines = self.lines
+        lines.append(line)
+        if len(lines) >= self.buffer_lines:
+            self.flush()
+        return not self.broken
+
+    def _write_text(self, channel, data):
+        return self._append(f'{channel}: {payload_text(data)}\n')
+
+    def _write_ndjson(self, channel, data):
+        if isinstance(data, (int, float)):
+            value = data
+        else:
+            value = payload_text(data)
+            if channel in JSON_CHANNEL_NAMES and '\n' not in value and self._valid_json(data, value):
+                # the server's JSON text is embedded as is
+                return self._append(f'{{"channel":"{channel}","timestamp":{self.clock():.6f},"data":{value}}}\n')
+        if isinstance(value, str) and '"' not in value and '\\' not in value and value.isprintable():
+            # nothing to escape
+            value = f'"{value}"'
+        else:
+            value = ujson.dumps(value, escape_forward_slashes=False)
+        return self._append(f'{{"channel":"{channel}","timestamp":{self.clock():.6f},"data":{value}}}\n')
+
+    def _valid_json(self, data, text):
+        """return True if the payload can be embedded as JSON; parses it only if it caches the decoded object
+           (JSONMessage, JSONBuffer) or validate_json is set, otherwise checks the outer braces of text
+        """
+        if self.validate_json or hasattr(data, 'json'):
+            try:
+                decode(data)
+            except ValueError:
+                self.invalid += 1
+                return False
+            return True
+        text = text.strip()
+        if text and JSON_CLOSE.get(text[0]) == text[-1]:
+            return True
+        self.invalid += 1
+        return False
+
+    def _write_csv(self, channel, data):
+        symbol, dummy, fields = payload_text(data).partition(':')
+        fields = fields.split()
+        if channel == Channel.QUOTE.name and len(fields) >= 4:
+            row = f'{",".join(fields[:4])},,,,{fields[4] if len(fields) > 4 else ""}'
+        elif channel == Channel.TRADE.name and len(fields) >= 3:
+            row = f',,,,{",".join(fields[:3])},{fields[3] if len(fields) > 3 else ""}'
+        else:
+            self.errors += 1
+            return not self.broken
+        return self._append(f'{self.clock():.6f},{channel},{symbol},{row}\n')
+
+    def flush(self):
+        if not self.lines:
+            return
+        data = ''.join(self.lines)
+        count = len(self.lines)
+        self.lines.clear()
+        if self.broken:
+            return
+        try:
+            self.stream.write(data)
+            self.stream.flush()
+        except (BrokenPipeError, ValueError) as ex:
+            # reader went away or the stream was closed
+            logger.warning('%s output stopped: %r', self, ex)
+            self.broken = True
+            return
+        self.written += count
+
+    def start(self, clock=reactor):
+        """flush every flush_interval seconds on clock"""
+        if not self.flusher:
+            self.flusher = LoopingCall(self.flush)
+            self.flusher.clock = clock
+            self.flusher.start(self.flush_interval, now=False)
+
+    def close(self):
+        if self.flusher and self.flusher.running:
+            self.flusher.stop()
+        self.flusher = None
+        self.flush()
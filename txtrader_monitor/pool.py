@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  pool.py
+  -------
+
+  TxTrader MonitorPool - several txtrader connections in one reactor, merged into one source-tagged dispatch
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+import logging
+from signal import signal, Signals, SIG_DFL, SIGINT, SIGQUIT, SIGTERM
+
+from twisted.internet import reactor
+from twisted.internet.error import ReactorNotRunning
+
+from txtrader_monitor.channel import Channel
+from txtrader_monitor.connection_state import ConnectionState
+from txtrader_monitor.monitor import Monitor, CHANNELS, LOGGER_NAME, configure_logger
+from txtrader_monitor.output import payload_text
+
+
+class MonitorPool(object):
+    """Run one Monitor per txtrader server or account in a shared reactor
+
+    pool = MonitorPool(callbacks={'*': function})
+    pool.add('broker1', host='gw1', username=...)
+    pool.add('broker2', host='gw2', username=...)
+    pool.run()
+
+    Callbacks receive (source, channel, message), where source is the name given to add(); a callback
+    returning False shuts down every connection and ends run().  The reactor stops when all of the
+    pool's monitors have stopped.
+    """
+
+    def __init__(self, callbacks: dict = {}, log_level: str = 'WARNING'):
+        self.logger = configure_logger(None, log_level)
+        self.log_level = log_level
+        self.monitors = {}
+        self.stopped = set()
+        self.stats = {}
+        self.shutdown_pending = False
+        self.set_callbacks(callbacks)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def set_callbacks(self, callbacks: dict = {}):
+        """Set all callback functions with a dict; supports '*' for default, and None values to disable"""
+        callbacks = dict(callbacks)
+        default = callbacks.pop('*', self._cb_default)
+        self.callbacks = {label: default for label in CHANNELS}
+        self.callbacks.update(callbacks)
+
+    def set_callback(self, channel, function):
+        """Set a callback function (or None) for a message type"""
+        if channel not in CHANNELS:
+            raise ValueError
+        self.callbacks[channel] = function
+
+    def add(self, source: str, **kwargs):
+        """Create the Monitor for source; kwargs are Monitor arguments other than callbacks and log_level.
+           Returns the Monitor, which may be configured further (set_priority(), track_orders(), ...).
+        """
+        if source in self.monitors:
+            raise ValueError(f'{source}: already in pool')
+        kwargs.setdefault('logger', logging.getLogger(f'{LOGGER_NAME}.{source}'))
+        self.stats[source] = {'messages': 0, 'connects': 0, 'last_message': None}
+        monitor = Monitor(callbacks={'*': self._dispatcher(source)}, log_level=self.log_level, **kwargs)
+        monitor.owner = self
+        self.monitors[source] = monitor
+        if reactor.running:
+            monitor.connect()
+        return monitor
+
+    def _dispatcher(self, source):
+        stats = self.stats[source]
+
+        def _dispatch(channel, data):
+            stats['messages'] += 1
+            stats['last_message'] = time.time()
+            if channel == Channel.CONNECTION.name and data == ConnectionState.CONNECTED.name:
+                stats['connects'] += 1
+            func = self.callbacks[channel]
+            if func and not func(source, channel, data):
+                self.shutdown('client requested shutdown')
+            return True
+
+        return _dispatch
+
+    def _cb_default(self, source, channel, msg):
+        print(f'{source} {channel}: {payload_text(msg)}')
+        return True
+
+    def send(self, source: str, command: str):
+        return self.monitors[source].send(command)
+
+    def health(self):
+        """return {source: {...}} with each connection's state, channel name, authorization, connect count,
+           message count and seconds since the last message (None if none received)
+        """
+        now = time.time()
+        ret = {}
+        for source, monitor in self.monitors.items():
+            stats = self.stats[source]
+            ret[source] = {
+                'state': monitor.connection_state.name,
+                'channel': monitor.connection.channel if monitor.connection else None,
+                'authorized': monitor.authorized_event.is_set(),
+                'connects': stats['connects'],
+                'messages': stats['messages'],
+                'idle': now - stats['last_message'] if stats['last_message'] else None,
+            }
+        return ret
+
+    def shutdown(self, reason):
+        if self.shutdown_pending:
+            return
+        self.shutdown_pending = True
+        self.logger.info('%s shutdown(reason=%s)', self, reason)
+        for monitor in self.monitors.values():
+            connected = monitor.connection is not None
+            monitor.shutdown(reason)
+            if not connected:
+                # not connected: stop retrying; there is no connection to close
+                monitor.factory.stopTrying()
+                if monitor.connector and monitor.connection_state == ConnectionState.CONNECT_PENDING:
+                    monitor.connector.stopConnecting()
+                self._stopped(monitor)
+
+    def _stopped(self, monitor):
+        self.stopped.add(monitor)
+        if len(self.stopped) >= len(self.monitors):
+            self.stop()
+
+    def signal_handler(self, sig, frame):
+        signame = Signals(sig).name
+        self.logger.warning('%s received; attempting graceful shutdown...', signame)
+        self.set_handler(SIG_DFL)
+        self.shutdown(f'received {signame}')
+        self.stop()
+
+    def set_handler(self, handler):
+        for s in [SIGINT, SIGQUIT, SIGTERM]:
+            signal(s, handler)
+
+    def run(self):
+        """Connect every monitor and run the reactor until the pool is shut down"""
+        self.logger.info('%s run()', self)
+        self.set_handler(self.signal_handler)
+        for monitor in self.monitors.values():
+            reactor.callWhenRunning(monitor.connect)
+        reactor.run()
+
+    def stop(self):
+        try:
+            if reactor.running:
+                reactor.stop()
+        except ReactorNotRunning:
+            pass
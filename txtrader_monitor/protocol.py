@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  protocol.py
+  -----------
+
+  TxTrader StatusReceiver - server handshake and message routing shared by the Twisted and asyncio clients
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import json
+
+from txtrader_monitor.channel import Channel
+from txtrader_monitor.dispatch import ChannelDispatcher
+from txtrader_monitor.message import JSON_CHANNELS, JSONMessage, JSONBuffer
+from txtrader_monitor.streaming import ItemStreamConsumer, WireTapConsumer
+
+
+class StatusReceiver(object):
+    """Mixin for a netstring protocol connected to the txtrader server
+
+    The protocol class provides sendString(bytes) and calls stringReceived(bytes) for each netstring;
+    the controller provides the connection parameters and receives messages through _callback().
+    """
+
+    def initReceiver(self, controller):
+        self.channel = ''
+        self.controller = controller
+        self.logger = controller.logger
+        self.wire_trace = controller.wire_trace
+        self.raw = controller.raw
+        self.dispatcher = ChannelDispatcher(self.channel, self.raw)
+        self.wrappers = {}
+        if controller.lazy_json:
+            wrapper = JSONBuffer if self.raw else JSONMessage
+            self.wrappers = {channel: wrapper for channel in JSON_CHANNELS}
+        self.account_channel = None
+        self.last_account = ''
+        self.decoder = None
+        self.stream_dispatcher = None
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def streamRoute(self, header):
+        """return (consumer, offset) if the message starting with header is streamed to item callbacks"""
+        if not self.stream_dispatcher:
+            return None
+        callback_channel, offset = self.stream_dispatcher.route(header)
+        if callback_channel and callback_channel.name in self.controller.item_callbacks:
+            consumer = ItemStreamConsumer(self.controller, callback_channel)
+            if self.controller.wire_taps:
+                return WireTapConsumer(self.controller, consumer, offset), 0
+            return consumer, offset
+        return None
+
+    def send(self, data, mask_password=None):
+        if mask_password:
+            log_data = data.replace(mask_password, 'XXXXXXXX')
+        else:
+            log_data = data
+        self.logger.info("%s send(data=%s)", self, log_data)
+        if self.wire_trace:
+            self.wire_trace.info("TX: %s", log_data)
+        self.sendString(data.encode())
+
+    def stringReceived(self, data):
+        if self.controller.wire_taps:
+            for function in self.controller.wire_taps:
+                function(data)
+        # arguments are formatted only when a handler accepts the record
+        self.logger.debug("RX: %r", data)
+        if self.wire_trace:
+            self.wire_trace.info("RX: %r", data)
+        if self.raw:
+            if data.startswith(b'.'):
+                return self.controlReceived(data.decode())
+            callback_channel, offset = self.dispatcher.route(data)
+            if callback_channel:
+                data = memoryview(data)[offset:]
+                if self.wrappers and callback_channel in self.wrappers:
+                    data = self.wrappers[callback_channel](data)
+                return self.controller._callback(callback_channel, data)
+            return self.unmappedReceived(data.decode())
+        data = data.decode()
+        if data.startswith('.'):
+            return self.controlReceived(data)
+        callback_channel, offset = self.dispatcher.route(data)
+        if callback_channel:
+            data = data[offset:]
+            if self.wrappers and callback_channel in self.wrappers:
+                data = self.wrappers[callback_channel](data)
+            return self.controller._callback(callback_channel, data)
+        self.unmappedReceived(data)
+
+    def controlReceived(self, data):
+        self.controller._callback(Channel.STATUS, data)
+        if data.lower().startswith('.connected'):
+            self.send(
+                f"auth {self.controller.username} {self.controller.password} {json.dumps(self.controller.options)}",
+                mask_password=self.controller.password
+            )
+        elif data.lower().startswith('.authorized'):
+            dummy, self.channel = data.split()[:2]
+            # setup channel dispatcher now that we have the channel name
+            self.dispatcher = ChannelDispatcher(self.channel, self.raw)
+            if self.decoder:
+                self.stream_dispatcher = ChannelDispatcher(self.channel, raw=True)
+            self.account_channel = '%s.current-account' % self.channel
+            self.controller._authorized(self.channel)
+
+    def unmappedReceived(self, data):
+        # only return current_account message if different from last one
+        if self.account_channel and data.startswith(self.account_channel):
+            if self.last_account == data:
+                return
+            else:
+                self.last_account = data
+        self.controller._callback(Channel.STATUS, data)
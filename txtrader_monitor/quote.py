@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  quote.py
+  --------
+
+  TxTrader quote and trade message helpers
+
+  QUOTE and TRADE payloads have the form 'SYMBOL:field field ...'
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+# longest symbol examined in a raw (memoryview) payload
+MAX_SYMBOL_LENGTH = 32
+
+
+def message_symbol(data):
+    """return the symbol of a QUOTE or TRADE payload (str or raw memoryview)"""
+    if isinstance(data, str):
+        i = data.find(':')
+        return data[:i] if i >= 0 else data
+    head = bytes(data[:MAX_SYMBOL_LENGTH])
+    i = head.find(b':')
+    return (head[:i] if i >= 0 else head).decode()
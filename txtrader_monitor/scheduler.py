@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  scheduler.py
+  ------------
+
+  TxTrader PriorityScheduler - deliver order, execution and status events ahead of queued market data
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+from collections import deque
+
+from twisted.internet import reactor
+
+from txtrader_monitor.channel import ALL_CHANNELS, Channel
+from txtrader_monitor.flow import message_size
+
+# (name, channels, budget seconds per reactor iteration or None for no limit), highest priority first;
+# channels not listed are in the last class
+DEFAULT_PRIORITY_CLASSES = [
+    (
+        'high', [
+            Channel.ORDER.name,
+            Channel.ORDER_DATA.name,
+            Channel.EXECUTION.name,
+            Channel.EXECUTION_DATA.name,
+            Channel.TICKET.name,
+            Channel.TICKET_DATA.name,
+            Channel.ERROR.name,
+            Channel.STATUS.name,
+            Channel.CONNECTION.name,
+            Channel.SHUTDOWN.name,
+        ], None
+    ),
+    ('normal', [Channel.ORDERS.name, Channel.EXECUTIONS.name, Channel.SYMBOL.name, Channel.SYMBOL_DATA.name], 0.005),
+    ('low', [Channel.QUOTE.name, Channel.TRADE.name, Channel.TICK.name, Channel.TIME.name], 0.005),
+]
+
+# messages waiting in a class before reading from the server is paused
+DEFAULT_MAX_PENDING = 100000
+
+
+class PriorityClass(object):
+
+    def __init__(self, name: str, channels: list, budget: float = None):
+        self.name = name
+        self.channels = channels
+        self.budget = budget
+        self.queue = deque()
+        self.delivered = 0
+
+
+class PriorityScheduler(object):
+    """Queue messages by channel priority class and deliver them when the reactor is free
+
+    Each drain delivers the classes in priority order; a class with a budget stops after that many
+    seconds of callbacks, and the rest of its queue waits for the next reactor iteration, so newly
+    read high priority messages are delivered before the remaining lower priority backlog.  When a
+    class holds max_pending messages, reading from the server is paused until it drains to half; queued
+    payload bytes also count toward the monitor's max_pending_bytes limit.
+    """
+
+    def __init__(self, controller, classes: list = DEFAULT_PRIORITY_CLASSES, max_pending: int = DEFAULT_MAX_PENDING):
+        self.controller = controller
+        self.flow = controller.flow
+        self.classes = [PriorityClass(*c) for c in classes]
+        self.max_pending = max_pending
+        self.clock = reactor
+        self.by_channel = {}
+        for c in reversed(self.classes):
+            for channel in c.channels:
+                if channel not in ALL_CHANNELS:
+                    raise ValueError(f'{c.name}: unknown channel {channel}')
+                self.by_channel[channel] = c
+        for channel in ALL_CHANNELS:
+            self.by_channel.setdefault(channel, self.classes[-1])
+        self.drain_call = None
+        self.blocked = False
+
+    @property
+    def pending(self):
+        return sum(len(c.queue) for c in self.classes)
+
+    def put(self, channel: str, data):
+        queue = self.by_channel[channel].queue
+        queue.append((channel, data))
+        self.flow.queued(message_size(data))
+        if len(queue) >= self.max_pending and not self.blocked:
+            self.blocked = True
+            self.controller._pause(self)
+        if not self.drain_call:
+            self.drain_call = self.clock.callLater(0, self.drain)
+
+    def drain(self):
+        self.drain_call = None
+        dispatch = self.controller._dispatch
+        released = self.flow.released
+        for c in self.classes:
+            queue = c.queue
+            if not queue:
+                continue
+            deadline = None if c.budget is None else time.perf_counter() + c.budget
+            while queue:
+                channel, data = queue.popleft()
+                released(message_size(data))
+                c.delivered += 1
+                dispatch(channel, data)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        if self.blocked and all(len(c.queue) <= self.max_pending // 2 for c in self.classes):
+            self.blocked = False
+            self.controller._resume(self)
+        if not self.drain_call and any(c.queue for c in self.classes):
+            self.drain_call = self.clock.callLater(0, self.drain)
+
+    def flush(self):
+        """deliver everything queued now, in priority order"""
+        for c in self.classes:
+            while c.queue:
+                channel, data = c.queue.popleft()
+                self.flow.released(message_size(data))
+                c.delivered += 1
+                self.controller._dispatch(channel, data)
+
+    def stop(self):
+        if self.drain_call and self.drain_call.active():
+            self.drain_call.cancel()
+        self.drain_call = None
+        for c in self.classes:
+            self.flow.released(sum(message_size(data) for channel, data in c.queue))
+            c.queue.clear()
+        if self.blocked:
+            self.blocked = False
+            self.controller._resume(self)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  shm.py
+  ------
+
+  TxTrader shared-memory quote table - one Monitor publishes the latest quote and trade per symbol
+  into a fixed-layout shared memory segment that other local processes read without a connection
+
+  Layout: a header followed by fixed-size slots, one per symbol.  Each slot starts with a sequence
+  counter that the writer makes odd while updating and even when done (a seqlock); readers retry
+  until they see the same even sequence before and after unpacking the slot.
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import sys
+import time
+import struct
+import logging
+from collections import namedtuple
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+from txtrader_monitor.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+SHM_MAGIC = b'TXTQUOTE'
+SHM_VERSION = 1
+
+# magic, version, slots, symbols assigned
+HEADER = struct.Struct('<8sIII4x')
+# sequence, then the slot body
+SEQUENCE = struct.Struct('<Q')
+# symbol, bid, bid_size, ask, ask_size, last, size, time
+BODY = struct.Struct('<16sdqdqdqd')
+SLOT_SIZE = SEQUENCE.size + BODY.size
+
+MAX_SYMBOL_LENGTH = 16
+DEFAULT_SLOTS = 4096
+
+# reader retries before reporting a slot as busy
+MAX_READ_RETRIES = 1000
+
+# segments created by writers in this process
+_created = set()
+
+Quote = namedtuple('Quote', ['symbol', 'bid', 'bid_size', 'ask', 'ask_size', 'last', 'size', 'time'])
+
+
+def _slot_offset(index):
+    return HEADER.size + index*SLOT_SIZE
+
+
+class QuoteTableWriter(object):
+    """Create the shared memory segment name and publish QUOTE and TRADE updates into it;
+       see Monitor.share_quotes().  The segment is removed by close().
+    """
+
+    def __init__(self, name: str, slots: int = DEFAULT_SLOTS):
+        if shared_memory is None:
+            raise ImportError('QuoteTableWriter requires multiprocessing.shared_memory (python 3.8+)')
+        self.name = name
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=_slot_offset(slots))
+        _created.add(name)
+        self.buf = self.shm.buf
+        self.index = {}
+        self.values = []
+        self.dropped = 0
+        self.clock = time.time
+        HEADER.pack_into(self.buf, 0, SHM_MAGIC, SHM_VERSION, slots, 0)
+        logger.info('%s created %s slots, %s bytes', self, slots, self.shm.size)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{self.name}>"
+
+    @property
+    def channels(self):
+        return [Channel.QUOTE.name, Channel.TRADE.name]
+
+    def _slot(self, symbol):
+        if len(self.index) == self.slots or len(symbol) > MAX_SYMBOL_LENGTH:
+            return None
+        slot = len(self.index)
+        self.index[symbol] = slot
+        values = [symbol.encode(), 0.0, 0, 0.0, 0, 0.0, 0, 0.0]
+        self.values.append(values)
+        self._publish(slot, values)
+        # readers discover the symbol once the assigned count includes its slot
+        HEADER.pack_into(self.buf, 0, SHM_MAGIC, SHM_VERSION, self.slots, len(self.index))
+        return slot
+
+    def _publish(self, slot, values):
+        offset = _slot_offset(slot)
+        sequence = SEQUENCE.unpack_from(self.buf, offset)[0] + 1
+        SEQUENCE.pack_into(self.buf, offset, sequence)
+        BODY.pack_into(self.buf, offset + SEQUENCE.size, *values)
+        SEQUENCE.pack_into(self.buf, offset, sequence + 1)
+
+    def tap(self, channel: str, data):
+        """Monitor tap function; see Monitor.add_tap()"""
+        if not isinstance(data, str):
+            data = bytes(data).decode()
+        symbol, dummy, fields = data.partition(':')
+        slot = self.index.get(symbol)
+        if slot is None:
+            slot = self._slot(symbol)
+            if slot is None:
+                self.dropped += 1
+                return
+        values = self.values[slot]
+        fields = fields.split()
+        try:
+            if channel == Channel.QUOTE.name:
+                values[1:5] = float(fields[0]), int(fields[1]), float(fields[2]), int(fields[3])
+            else:
+                values[5:7] = float(fields[0]), int(fields[1])
+        except (ValueError, IndexError):
+            self.dropped += 1
+            return
+        values[7] = self.clock()
+        self._publish(slot, values)
+
+    def close(self):
+        if self.shm:
+            logger.info('%s close()', self)
+            self.buf = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+            _created.discard(self.name)
+
+
+class QuoteTableReader(object):
+    """Attach to the shared memory segment published by a QuoteTableWriter and read the latest
+       Quote per symbol; reads unpack one slot directly from the shared buffer
+    """
+
+    def __init__(self, name: str):
+        if shared_memory is None:
+            raise ImportError('QuoteTableReader requires multiprocessing.shared_memory (python 3.8+)')
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name)
+        if sys.version_info < (3, 13) and name not in _created:
+            # attaching registers the segment for removal when this process exits; only the writer owns it
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.buf = self.shm.buf
+        magic, version, self.slots, dummy = HEADER.unpack_from(self.buf, 0)
+        if magic != SHM_MAGIC or version != SHM_VERSION:
+            self.close()
+            raise ValueError(f'{name}: not a txtrader quote table')
+        self.index = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _refresh(self):
+        count = HEADER.unpack_from(self.buf, 0)[3]
+        for slot in range(len(self.index), count):
+            self.index[self._read(slot).symbol] = slot
+
+    def _read(self, slot):
+        offset = _slot_offset(slot)
+        for retry in range(MAX_READ_RETRIES):
+            before = SEQUENCE.unpack_from(self.buf, offset)[0]
+            if before & 1:
+                continue
+            values = BODY.unpack_from(self.buf, offset + SEQUENCE.size)
+            if SEQUENCE.unpack_from(self.buf, offset)[0] == before:
+                return Quote(values[0].rstrip(b'\0').decode(), *values[1:])
+        raise BlockingIOError(f'{self.name}: slot {slot} is busy')
+
+    @property
+    def symbols(self):
+        self._refresh()
+        return list(self.index)
+
+    def get(self, symbol: str):
+        """return the latest Quote for symbol, or None if it has not been published"""
+        slot = self.index.get(symbol)
+        if slot is None:
+            self._refresh()
+            slot = self.index.get(symbol)
+            if slot is None:
+                return None
+        return self._read(slot)
+
+    def close(self):
+        if self.shm:
+            self.buf = None
+            self.shm.close()
+            self.shm = None
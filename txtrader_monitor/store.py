@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  store.py
+  --------
+
+  TxTrader OrderBook and ExecutionStore - indexed order and execution state kept current by a Monitor
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import logging
+from collections import defaultdict
+
+import ujson
+
+from txtrader_monitor.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+
+def decode(data):
+    """return the decoded JSON object of a channel payload: str, JSONMessage, JSONBuffer or memoryview"""
+    if hasattr(data, 'json'):
+        return data.json
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return ujson.loads(data)
+
+
+class RecordStore(object):
+    """Records keyed by id with symbol and account indexes
+
+    Seeded from a snapshot channel (a JSON object of id: record) and updated from a data channel
+    (one JSON record per message).  Lookups return the stored record dicts; treat them as read-only.
+    """
+
+    snapshot_channel = None
+    data_channel = None
+
+    def __init__(self, key: str, symbol: str, account: str):
+        self.key = key
+        self.symbol = symbol
+        self.account = account
+        self.records = {}
+        self.symbols = defaultdict(dict)
+        self.accounts = defaultdict(dict)
+        self.seeded = False
+        self.updates = 0
+        # messages that were not valid JSON or held a record without a key field
+        self.errors = 0
+        # result of the latest seed(), e.g. the reconciliation after a reconnect
+        self.last_diff = None
+        # records of a snapshot being streamed to item callbacks, see item_tap()
+        self.streamed = {}
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    @property
+    def channels(self):
+        return [self.snapshot_channel.name, self.data_channel.name]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def get(self, key, default=None):
+        return self.records.get(key, default)
+
+    def by_symbol(self, symbol):
+        """return a list of the records for symbol"""
+        return list(self.symbols.get(symbol, {}).values())
+
+    def by_account(self, account):
+        """return a list of the records for account"""
+        return list(self.accounts.get(account, {}).values())
+
+    def tap(self, channel: str, data):
+        """Monitor tap function; see Monitor.add_tap().  Invalid messages are counted in errors and skipped."""
+        try:
+            if channel == self.data_channel.name:
+                self.update(decode(data))
+            elif channel == self.snapshot_channel.name:
+                if isinstance(data, int):
+                    # item count of a streamed snapshot; its records arrived through item_tap()
+                    snapshot, self.streamed = self.streamed, {}
+                else:
+                    snapshot = decode(data)
+                self.last_diff = self.seed(snapshot)
+        except (ValueError, AttributeError, TypeError) as e:
+            self.errors += 1
+            logger.error('%s %s: %s', self, channel, e)
+
+    def item_tap(self, channel: str, key, record: dict):
+        """Monitor item tap function, collecting the records of a streamed snapshot; see Monitor.add_item_tap()"""
+        self.streamed[key] = record
+
+    def seed(self, snapshot: dict):
+        """replace the store contents with snapshot {id: record, ...};
+           returns {'added': [ids], 'changed': [ids], 'removed': [ids]} relative to the previous contents
+        """
+        diff = {'added': [], 'changed': [], 'removed': []}
+        for key in list(self.records):
+            if key not in snapshot:
+                self._remove(key)
+                diff['removed'].append(key)
+        for key, record in snapshot.items():
+            previous = self.records.get(key)
+            if previous is None:
+                diff['added'].append(key)
+            elif previous != record:
+                diff['changed'].append(key)
+            else:
+                continue
+            self._index(key, record)
+        self.seeded = True
+        return diff
+
+    def update(self, record: dict):
+        """add or replace one record; returns the record key"""
+        key = record.get(self.key)
+        if key is None:
+            raise ValueError(f'{self.__class__.__name__}: record has no {self.key} field')
+        self._index(key, record)
+        self.updates += 1
+        return key
+
+    def _index(self, key, record):
+        if key in self.records:
+            self._remove(key)
+        self.records[key] = record
+        self._add_index(key, record)
+
+    def _add_index(self, key, record):
+        self.symbols[record.get(self.symbol)][key] = record
+        self.accounts[record.get(self.account)][key] = record
+
+    def _remove(self, key):
+        record = self.records.pop(key)
+        self._remove_index(key, record)
+
+    def _remove_index(self, key, record):
+        for index, field in ((self.symbols, self.symbol), (self.accounts, self.account)):
+            value = record.get(field)
+            records = index[value]
+            records.pop(key, None)
+            if not records:
+                del index[value]
+
+
+class OrderBook(RecordStore):
+    """Orders by order id, seeded from ORDERS and updated from ORDER_DATA (option 'order-data')"""
+
+    snapshot_channel = Channel.ORDERS
+    data_channel = Channel.ORDER_DATA
+
+    def __init__(self, key: str = 'permid', symbol: str = 'symbol', account: str = 'account'):
+        super().__init__(key, symbol, account)
+
+
+class ExecutionStore(RecordStore):
+    """Executions by fill id, also indexed by order id; seeded from EXECUTIONS and updated from
+       EXECUTION_DATA (option 'execution-data')
+    """
+
+    snapshot_channel = Channel.EXECUTIONS
+    data_channel = Channel.EXECUTION_DATA
+
+    def __init__(
+        self, key: str = 'FILL_ID', symbol: str = 'DISP_NAME', account: str = 'ACCOUNT', order: str = 'ORDER_ID'
+    ):
+        self.order = order
+        self.orders = defaultdict(dict)
+        super().__init__(key, symbol, account)
+
+    def by_order(self, order_id):
+        """return a list of the executions for order_id"""
+        return list(self.orders.get(order_id, {}).values())
+
+    def _add_index(self, key, record):
+        super()._add_index(key, record)
+        self.orders[record.get(self.order)][key] = record
+
+    def _remove_index(self, key, record):
+        super()._remove_index(key, record)
+        value = record.get(self.order)
+        records = self.orders[value]
+        records.pop(key, None)
+        if not records:
+            del self.orders[value]
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  streaming.py
+  ------------
+
+  TxTrader streaming parsers - incremental netstring framing and JSON object item extraction
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import re
+
+import ujson
+from twisted.protocols.basic import NetstringParseError
+
+# bytes of a netstring payload examined to decide if the message is streamed
+HEADER_PEEK_LENGTH = 256
+
+# maximum number of digits in a netstring length prefix
+MAX_LENGTH_DIGITS = 12
+
+NON_WHITESPACE = re.compile(rb'\S')
+STRING_SPECIAL = re.compile(rb'["\\]')
+VALUE_SPECIAL = re.compile(rb'["{}\[\],]')
+
+
+class JSONItemStream(object):
+    """Incrementally split a top-level JSON object into (key, value) items as the bytes arrive
+
+    feed() returns the list of items completed by the new data; only the bytes of the item currently
+    being received are retained, so memory is bounded by the largest single item.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pos = 0
+        self.mark = 0
+        self.state = 'object'
+        self.key = None
+        self.depth = 0
+        self.in_string = False
+        self.done = False
+
+    def feed(self, data):
+        items = []
+        buf = self.buffer
+        buf += data
+        while not self.done:
+            if self.state in ('object', 'key', 'colon'):
+                match = NON_WHITESPACE.search(buf, self.pos)
+                if not match:
+                    self.pos = len(buf)
+                    break
+                c = buf[match.start()]
+                self.pos = match.start() + 1
+                if self.state == 'object':
+                    if c != ord('{'):
+                        raise ValueError('expected JSON object')
+                    self.state = 'key'
+                elif self.state == 'key':
+                    if c == ord('}'):
+                        self.done = True
+                    elif c == ord('"'):
+                        self.mark = match.start()
+                        self.state = 'key_string'
+                    elif c != ord(','):
+                        raise ValueError(f'unexpected {chr(c)!r} before object key')
+                else:
+                    if c != ord(':'):
+                        raise ValueError(f'expected \':\', got {chr(c)!r}')
+                    self.state = 'value_start'
+            elif self.state == 'key_string':
+                end = self._scan_string(buf)
+                if end is None:
+                    break
+                self.key = ujson.loads(bytes(buf[self.mark:end]))
+                self.state = 'colon'
+            elif self.state == 'value_start':
+                match = NON_WHITESPACE.search(buf, self.pos)
+                if not match:
+                    self.pos = len(buf)
+                    break
+                self.mark = match.start()
+                self.pos = match.start()
+                self.depth = 0
+                self.in_string = False
+                self.state = 'value'
+            else:
+                end = self._scan_value(buf)
+                if end is None:
+                    break
+                items.append((self.key, ujson.loads(bytes(buf[self.mark:end]))))
+                self.pos = end
+                self.state = 'key'
+        # discard bytes that are no longer needed
+        cut = self.mark if self.state in ('key_string', 'value') else self.pos
+        if cut:
+            del buf[:cut]
+            self.pos -= cut
+            self.mark = max(self.mark - cut, 0)
+        return items
+
+    def _scan_string(self, buf):
+        """advance past the closing quote of the string at self.pos; return end offset or None"""
+        while True:
+            match = STRING_SPECIAL.search(buf, self.pos)
+            if not match:
+                self.pos = len(buf)
+                return None
+            if buf[match.start()] == ord('"'):
+                self.pos = match.start() + 1
+                return self.pos
+            if match.start() + 1 >= len(buf):
+                self.pos = match.start()
+                return None
+            self.pos = match.start() + 2
+
+    def _scan_value(self, buf):
+        """advance to the end of the value at self.mark; return end offset or None"""
+        while True:
+            if self.in_string:
+                if self._scan_string(buf) is None:
+                    return None
+                self.in_string = False
+                if not self.depth:
+                    return self.pos
+                continue
+            match = VALUE_SPECIAL.search(buf, self.pos)
+            if not match:
+                self.pos = len(buf)
+                return None
+            c = buf[match.start()]
+            self.pos = match.start() + 1
+            if c == ord('"'):
+                self.in_string = True
+            elif c in (ord('{'), ord('[')):
+                self.depth += 1
+            elif self.depth:
+                if c != ord(','):
+                    self.depth -= 1
+                    if not self.depth:
+                        return self.pos
+            else:
+                # ',' or closing bracket terminating a scalar value
+                self.pos = match.start()
+                return self.pos
+
+
+class NetstringDecoder(object):
+    """Incremental netstring framing that can hand a message payload to a stream consumer as it arrives
+
+    stream_router(header) is called with the first HEADER_PEEK_LENGTH bytes of each payload; it returns
+    (consumer, offset) to stream the payload after offset into consumer.feed()/consumer.close(), or None
+    to buffer the whole message and pass it to string_received().
+    """
+
+    def __init__(self, string_received, stream_router, max_length):
+        self.string_received = string_received
+        self.stream_router = stream_router
+        self.max_length = max_length
+        self.buffer = bytearray()
+        self.state = 'length'
+        self.remaining = 0
+        self.skip = 0
+        self.consumer = None
+
+    def feed(self, data):
+        buf = self.buffer
+        buf += data
+        while True:
+            if self.state == 'length':
+                i = buf.find(b':', 0, MAX_LENGTH_DIGITS + 1)
+                if i < 0:
+                    if len(buf) > MAX_LENGTH_DIGITS:
+                        raise NetstringParseError('netstring length prefix too long')
+                    break
+                try:
+                    self.remaining = int(buf[:i])
+                except ValueError:
+                    raise NetstringParseError(f'invalid netstring length {bytes(buf[:i])!r}')
+                if self.remaining > self.max_length:
+                    raise NetstringParseError(f'netstring length {self.remaining} exceeds {self.max_length}')
+                del buf[:i + 1]
+                self.state = 'header'
+            elif self.state == 'header':
+                if len(buf) < min(self.remaining, HEADER_PEEK_LENGTH):
+                    break
+                route = self.stream_router(bytes(buf[:HEADER_PEEK_LENGTH]))
+                if route:
+                    self.consumer, self.skip = route
+                    self.state = 'stream'
+                else:
+                    self.state = 'payload'
+            elif self.state == 'payload':
+                if len(buf) < self.remaining:
+                    break
+                data = bytes(buf[:self.remaining])
+                del buf[:self.remaining]
+                self.state = 'comma'
+                self.string_received(data)
+            elif self.state == 'stream':
+                count = min(len(buf), self.remaining)
+                skip = min(count, self.skip)
+                if count > skip:
+                    self.consumer.feed(bytes(buf[skip:count]))
+                self.skip -= skip
+                self.remaining -= count
+                del buf[:count]
+                if self.remaining:
+                    break
+                consumer, self.consumer = self.consumer, None
+                self.state = 'comma'
+                consumer.close()
+            else:
+                if not buf:
+                    break
+                if buf[0] != ord(','):
+                    raise NetstringParseError('missing netstring terminator')
+                del buf[:1]
+                self.state = 'length'
+
+
+class ItemStreamConsumer(object):
+    """Deliver each item of a streamed JSON object payload to the controller's item callback"""
+
+    def __init__(self, controller, channel):
+        self.controller = controller
+        self.channel = channel
+        self.parser = JSONItemStream()
+        self.count = 0
+
+    def feed(self, data):
+        for key, item in self.parser.feed(data):
+            self.count += 1
+            self.controller._item_callback(self.channel, key, item)
+
+    def close(self):
+        if not self.parser.done:
+            raise NetstringParseError(f'{self.channel.name}: incomplete JSON object')
+        self.controller._callback(self.channel, self.count)
+
+
+class WireTapConsumer(object):
+    """Stream a payload into consumer after offset, keeping the whole message for the controller's wire taps
+
+    The taps are called with the complete netstring payload when it ends, before consumer.close(), so a
+    recording or hub sees streamed messages as it sees buffered ones.
+    """
+
+    def __init__(self, controller, consumer, offset):
+        self.controller = controller
+        self.consumer = consumer
+        self.skip = offset
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        skip = min(len(data), self.skip)
+        self.skip -= skip
+        if len(data) > skip:
+            self.consumer.feed(data[skip:])
+
+    def close(self):
+        data = bytes(self.buffer)
+        self.buffer = None
+        for function in self.controller.wire_taps:
+            function(data)
+        self.consumer.close()
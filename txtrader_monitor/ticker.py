@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+  ticker.py
+  ---------
+
+  TxTrader TickScheduler - any number of named TICK intervals on one reactor timer, without drift
+
+  Copyright (c) 2015 Reliance Systems Inc. <mkrueger@rstms.net>
+  Licensed under the MIT license.  See LICENSE for details.
+
+"""
+
+import time
+import heapq
+import logging
+from itertools import count
+
+from twisted.internet import reactor
+
+from txtrader_monitor.channel import Channel
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ['skip', 'catchup']
+
+# most overdue ticks of one timer delivered at once by the 'catchup' policy; older ones count as missed
+DEFAULT_MAX_CATCHUP = 10
+
+
+class Tick(float):
+    """TICK payload: the wall clock time of the tick, as the float the TICK channel has always carried, with
+      name: the timer name
+      monotonic: the time.monotonic() the tick was due
+      missed: ticks of this timer skipped since the previous one was delivered
+    """
+
+    __slots__ = ('name', 'monotonic', 'missed')
+
+    def __new__(cls, value: float, name: str, monotonic: float, missed: int = 0):
+        self = super().__new__(cls, value)
+        self.name = name
+        self.monotonic = monotonic
+        self.missed = missed
+        return self
+
+    def __reduce__(self):
+        return (Tick, (float(self), self.name, self.monotonic, self.missed))
+
+
+class Timer(object):
+    """One named interval of a TickScheduler; due times are start + n * interval"""
+
+    def __init__(self, scheduler, name: str, interval: float, policy: str, start: float):
+        self.scheduler = scheduler
+        self.name = name
+        self.interval = interval
+        self.policy = policy
+        self.due = start
+        self.ticks = 0
+        self.missed = 0
+        self.running = True
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}<{self.name} {self.interval}s {self.policy}>"
+
+    def stop(self):
+        self.scheduler.remove(self)
+
+
+class TickScheduler(object):
+    """Deliver TICK messages for named intervals from a single reactor DelayedCall
+
+    Timers are kept in a heap by due time, and one callLater is pending for the earliest.  Due times advance
+    by whole intervals from the start time, so ticks do not drift with reactor delays.  When the reactor
+    was busy past one or more due times of a timer:
+      skip: one tick is delivered, with missed set to the number of ticks skipped
+      catchup: a tick is delivered for each overdue time, up to max_catchup; earlier ones count as missed
+    Either way the next due time is in the future, so ticks do not pile up during bursts.
+    """
+
+    def __init__(self, controller, max_catchup: int = DEFAULT_MAX_CATCHUP):
+        self.controller = controller
+        self.max_catchup = max_catchup
+        self.clock = reactor
+        self.monotonic = time.monotonic
+        self.wall = time.time
+        self.timers = {}
+        self.heap = []
+        self.sequence = count()
+        self.call = None
+        self.call_due = None
+        self.names = count(1)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}<{hex(id(self))}>"
+
+    def add(self, interval: float, name: str = None, policy: str = 'skip', now: bool = True):
+        """start a timer delivering a tick every interval seconds, the first at once if now is True;
+           returns the Timer, which has a stop() method
+        """
+        if interval <= 0:
+            raise ValueError(f'interval: expected a positive number of seconds, got {interval}')
+        if policy not in POLICIES:
+            raise ValueError(f'policy: expected one of {POLICIES}, got {policy}')
+        if name is None:
+            name = f'tick{next(self.names)}'
+        if name in self.timers:
+            raise ValueError(f'{name}: timer already set')
+        start = self.monotonic()
+        timer = self.timers[name] = Timer(self, name, interval, policy, start if now else start + interval)
+        self._push(timer)
+        self._schedule()
+        return timer
+
+    def remove(self, timer):
+        """stop timer, a Timer or its name; its heap entry is discarded when it comes due"""
+        if not isinstance(timer, Timer):
+            timer = self.timers.get(timer)
+        if timer and self.timers.get(timer.name) is timer:
+            del self.timers[timer.name]
+            timer.running = False
+        if not self.timers:
+            self.stop()
+
+    def stop(self):
+        for timer in self.timers.values():
+            timer.running = False
+        self.timers.clear()
+        self.heap.clear()
+        if self.call and self.call.active():
+            self.call.cancel()
+        self.call = None
+        self.call_due = None
+
+    def _push(self, timer):
+        heapq.heappush(self.heap, (timer.due, next(self.sequence), timer))
+
+    def _schedule(self):
+        while self.heap and not self.heap[0][2].running:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return
+        due = self.heap[0][0]
+        if self.call and self.call.active():
+            if self.call_due <= due:
+                return
+            self.call.cancel()
+        self.call_due = due
+        self.call = self.clock.callLater(max(due - self.monotonic(), 0), self._fire)
+
+    def _fire(self):
+        self.call = None
+        self.call_due = None
+        now = self.monotonic()
+        ticks = []
+        while self.heap and self.heap[0][0] <= now:
+            due, dummy, timer = heapq.heappop(self.heap)
+            if not timer.running:
+                continue
+            overdue = int((now-due) // timer.interval)
+            if timer.policy == 'catchup':
+                deliver = min(overdue, self.max_catchup - 1)
+                missed = overdue - deliver
+                for n in range(deliver + 1):
+                    ticks.append((timer, due + (missed+n) * timer.interval, missed if n == 0 else 0))
+            else:
+                missed = overdue
+                ticks.append((timer, due + missed * timer.interval, missed))
+            timer.missed += missed
+            timer.due = due + (overdue+1) * timer.interval
+            self._push(timer)
+        self._schedule()
+        wall = self.wall() - now
+        for timer, due, missed in ticks:
+            if timer.running:
+                timer.ticks += 1
+                self.controller._callback(Channel.TICK, Tick(wall + due, timer.name, due, missed))